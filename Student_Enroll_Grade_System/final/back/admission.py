@@ -0,0 +1,196 @@
+# 选课的准入队列
+#
+# 选课开放时大量 POST /api/enroll 同时到达，SQLite 同一时间只能执行一个写事务，请求排队等锁直至超时。
+# POST /api/enroll/queue 只做检查并写入一行排队号（admission_ticket），立即返回排队号和位置（202）。
+# 后台线程按课程成批处理：同一门课的一批请求在一个事务里按到达的先后分配剩余名额，
+# 一次 UPDATE 扣减名额、一次 bulk_create 写入选课记录，没有分到名额的学生写入等待名单（waitlist 表），
+# 之后有学生退课或容量增加时由 seats.promote 按先后顺序补上。
+# 排队号和处理结果都保存在数据库中：多进程部署时任何一个进程都能查询排队号，
+# 每个进程的后台线程都处理数据库里所有排队中的请求，一批请求的读取和分配在同一个事务里，不会被处理两次；
+# 进程退出时没有处理的请求仍然排队，由下一次被唤醒的后台线程处理。
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from back import catalog, seats
+from back.models import admission_ticket, course, enrollment, waitlist
+
+logger = logging.getLogger(__name__)
+
+# 同一门课一个事务最多处理的请求数
+BATCH_SIZE = 500
+
+# 数据库暂时出错（例如等锁超时）时后台线程重试前等待的秒数，每次失败加倍，最多 MAX_RETRY_DELAY
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30
+
+PENDING = 'pending'
+ENROLLED = 'enrolled'
+WAITLISTED = 'waitlisted'
+REJECTED = 'rejected'
+
+
+def admit(course_id, student_ids):
+    """
+    在一个事务里按顺序为一批学生分配名额
+    返回 {student_id: (状态, 说明)}；没有分到名额的学生加入等待名单
+    """
+    results = {}
+    with transaction.atomic():
+        course_instance = course.objects.select_related('available').filter(pk=course_id).first()
+        slot = course_instance.available if course_instance is not None else None
+        # 排队期间课程或开课信息被删除
+        if slot is None:
+            return {student_id: (REJECTED, "Course, student, or available course not found")
+                    for student_id in student_ids}
+        # 排队期间可能已经过了报名截止日期，按分配名额时的日期判断
+        if slot.registration_deadline is not None and timezone.now().date() > slot.registration_deadline:
+            return {student_id: (REJECTED, "Registration deadline has passed") for student_id in student_ids}
+        # 等待名单中的学生排在这一批之前
+        seats.promote(course_instance)
+        student_ids = list(dict.fromkeys(student_ids))
+        enrolled = set(enrollment.objects.filter(course=course_instance, student_id__in=student_ids)
+                       .values_list('student_id', flat=True))
+        listed = set(waitlist.objects.filter(course=course_instance, student_id__in=student_ids)
+                     .values_list('student_id', flat=True))
+        candidates = []
+        for student_id in student_ids:
+            if student_id in enrolled:
+                results[student_id] = (REJECTED, "Enrollment already exists")
+            elif student_id in listed:
+                results[student_id] = (WAITLISTED, None)
+            else:
+                candidates.append(student_id)
+        granted = seats.reserve_many(slot.pk, len(candidates))
+        enrollment.objects.bulk_create([
+            enrollment(course=course_instance, student_id=student_id, available=slot, semester=slot.semester)
+            for student_id in candidates[:granted]
+        ])
+        waitlist.objects.bulk_create([
+            waitlist(course=course_instance, student_id=student_id) for student_id in candidates[granted:]
+        ])
+    # bulk_create 不发信号
+    catalog.invalidate()
+    results.update((student_id, (ENROLLED, None)) for student_id in candidates[:granted])
+    results.update((student_id, (WAITLISTED, None)) for student_id in candidates[granted:])
+    return results
+
+
+def waitlist_position(course_id, student_id):
+    """学生在等待名单中的位置（从 1 开始），不在名单中返回 None"""
+    entry_id = waitlist.objects.filter(course_id=course_id, student_id=student_id).values_list('id', flat=True).first()
+    if entry_id is None:
+        return None
+    return waitlist.objects.filter(course_id=course_id, id__lt=entry_id).count() + 1
+
+
+class AdmissionQueue:
+    """按课程排队的选课请求，排队号保存在数据库里，由一个后台线程成批处理"""
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def submit(self, course_id, student_id):
+        """写入一个排队号并返回；同一个学生对同一门课重复提交时返回排队中的排队号"""
+        ticket = admission_ticket.objects.filter(course_id=course_id, student_id=student_id,
+                                                 status=PENDING).first()
+        if ticket is None:
+            ticket = admission_ticket.objects.create(ticket=uuid.uuid4().hex, course_id=course_id,
+                                                     student_id=student_id)
+        # 测试中设为 False，由调用方执行 drain()
+        if getattr(settings, 'ENROLLMENT_QUEUE_WORKER', True):
+            self._start()
+            self._wakeup.set()
+        return ticket
+
+    def get(self, ticket_id):
+        return admission_ticket.objects.filter(ticket=ticket_id).first()
+
+    def position(self, ticket):
+        """排队中的请求在这门课的队列中的位置（从 1 开始），已处理的返回 None"""
+        if ticket.status != PENDING:
+            return None
+        return admission_ticket.objects.filter(course_id=ticket.course_id, status=PENDING, id__lte=ticket.id).count()
+
+    def describe(self, ticket):
+        """排队号的当前状态；进入等待名单的请求从数据库读出现在的位置，已经补上名额的显示为 enrolled"""
+        position = self.position(ticket)
+        status = ticket.status
+        if status == WAITLISTED:
+            position = waitlist_position(ticket.course_id, ticket.student_id)
+            if position is None and enrollment.objects.filter(course_id=ticket.course_id,
+                                                              student_id=ticket.student_id).exists():
+                status = ENROLLED
+        return {"ticket": ticket.ticket, "course_id": ticket.course_id, "status": status, "position": position,
+                "message": ticket.message}
+
+    def drain(self):
+        """
+        处理数据库里全部排队中的请求，返回处理的数量
+        数据库出错（DatabaseError，例如等锁超时）时这一批回滚，排队号保持 pending，异常继续抛出，由调用方稍后重试；
+        其他异常是这一批请求本身的问题，重试也不会成功，这一批标记为 rejected
+        """
+        handled = 0
+        while True:
+            # 最早的排队号所在的课程先处理
+            course_id = (admission_ticket.objects.filter(status=PENDING).order_by('id')
+                         .values_list('course_id', flat=True).first())
+            if course_id is None:
+                return handled
+            try:
+                with transaction.atomic():
+                    # 另一个进程的后台线程可能同时在处理，读取和写回结果在同一个事务里
+                    tickets = list(admission_ticket.objects.select_for_update()
+                                   .filter(course_id=course_id, status=PENDING).order_by('id')[:self.batch_size])
+                    results = admit(course_id, [ticket.student_id for ticket in tickets])
+                    self._finish(tickets, results)
+            except DatabaseError:
+                raise
+            except Exception as e:
+                tickets = list(admission_ticket.objects.filter(course_id=course_id, status=PENDING)
+                               .order_by('id')[:self.batch_size])
+                self._finish(tickets, {ticket.student_id: (REJECTED, ("Enrollment failed: " + str(e))[:200])
+                                       for ticket in tickets})
+            handled += len(tickets)
+
+    def _finish(self, tickets, results):
+        by_result = {}
+        for ticket in tickets:
+            by_result.setdefault(results[ticket.student_id], []).append(ticket.id)
+        for (status, message), ids in by_result.items():
+            admission_ticket.objects.filter(id__in=ids).update(status=status, message=message)
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='enrollment-admission', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        delay = RETRY_DELAY
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.drain()
+                delay = RETRY_DELAY
+                continue
+            except DatabaseError:
+                logger.warning("Admission batch failed, retrying in %.1f s", delay, exc_info=True)
+            finally:
+                connection.close()
+            # 排队号仍是 pending，等一会儿再处理
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+            self._wakeup.set()
+
+
+queue = AdmissionQueue()
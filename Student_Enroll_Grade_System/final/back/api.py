@@ -1,10 +1,11 @@
 from datetime import date, datetime, timedelta
+from django.http import HttpResponse, HttpResponseNotModified
 from django.utils import timezone
 from ninja import NinjaAPI, Router
 from sympy import Sum
-from back.scheme import User, NoMessage, LoginSuccess, ErrorResponse, Course, Grade, UserChange, CourseChange, GradeChange, Enrollment, Me, TeacherCourse, CreateCourse, AvailableCourse, CreateCourseSchema, EnrollmentDetail, EnrolledStudentInfo, Login
-from back.models import newuser, course, grade, enrollment, available, enrollment
-from typing import List
+from back.scheme import User, NoMessage, LoginSuccess, ErrorResponse, Course, Grade, UserChange, CourseChange, GradeChange, Enrollment, Me, TeacherCourse, CreateCourse, AvailableCourse, CreateCourseSchema, EnrollmentDetail, EnrolledStudentInfo, Login, QueueTicket, WaitlistEntry, BulkResult
+from back.models import newuser, course, grade, enrollment, available, enrollment, waitlist
+from typing import List, Optional
 from ninja.security import django_auth, HttpBearer
 from ninja.errors import HttpError
 from jose import jwt
@@ -17,6 +18,8 @@ import string
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.auth.hashers import make_password, check_password
 from back.permission import IsTeacher
+from back import admission, bulk, catalog, seats
+from django.db import IntegrityError
 from django.contrib.admin.views.decorators import staff_member_required
 
 
@@ -209,34 +212,28 @@ def update_user(request, info: UserChange):
 #     return 200, list(course.objects.all().values())
 
 #输入信息搜索课程
-@api.get('/course', response={200: List[AvailableCourse]}, auth=AuthBearer())
-def all_course(request):
-    courses = course.objects.all()
-    
-    course_data = []
-    for c in courses:
-        if c.available:
-            remaining_capacity = c.available.capacity - c.enrollment_set.count()
-            year = c.available.year
-            semester = c.available.semester
-            registration_deadline = c.available.registration_deadline
-        else:
-            remaining_capacity = 0
-            year = None
-            semester = 'N/A'
-            registration_deadline = None
-        
-        course_data.append({
-            'course_id': c.course_id,
-            'course_name': c.course_name,
-            'teacher_name': c.teacher.username,
-            'year': year or 0,  # 如果 year 为 None,则替换为 0
-            'semester': semester,
-            'remaining_capacity': remaining_capacity,
-            'registration_deadline': registration_deadline.strftime("%Y-%m-%d") if registration_deadline else None
-        })
-    
-    return 200, course_data
+# 筛选参数都是可选的；给出 limit 或 cursor 时按 course_id 分页，下一页的 cursor 在 X-Next-Cursor 响应头中
+@api.get('/course', response={200: List[AvailableCourse], 400: ErrorResponse}, auth=AuthBearer())
+def all_course(request, response: HttpResponse, year: Optional[int] = None, semester: Optional[str] = None,
+               teacher: Optional[str] = None, has_capacity: Optional[bool] = None,
+               deadline_open: Optional[bool] = None, limit: Optional[int] = None, cursor: Optional[str] = None):
+    if limit is not None and limit < 1:
+        return 400, {"message": "limit must be a positive integer"}
+    params = catalog.normalize(year=year, semester=semester, teacher=teacher, has_capacity=has_capacity,
+                               deadline_open=deadline_open, limit=limit, cursor=cursor)
+    tag = catalog.etag(params)
+    if catalog.matches(tag, request.headers.get('If-None-Match', '')):
+        not_modified = HttpResponseNotModified()
+        not_modified['ETag'] = tag
+        return not_modified
+    try:
+        rows, next_cursor = catalog.page(tag, params)
+    except catalog.InvalidCursor:
+        return 400, {"message": "Invalid cursor"}
+    response['ETag'] = tag
+    if next_cursor is not None:
+        response['X-Next-Cursor'] = next_cursor
+    return 200, rows
 
 @api.get('/course/{course_id}', response={200: Course, 404: ErrorResponse}, auth=AuthBearer())
 def one_course(request, course_id: int):
@@ -345,6 +342,7 @@ def create_teacher_course(request, info: CreateCourseSchema):
             year=info.year,
             semester=info.semester,
             capacity=info.capacity,
+            seats_left=info.capacity,
             registration_deadline=info.registrationDeadline
         )
         available_instance.save()
@@ -390,14 +388,19 @@ def update_course(request, course_id: str, info: CourseChange):
             # Check if the available instance exists or create/update it
             if course_instance.available:
                 available_instance = course_instance.available
+                available_instance.year = info.year
+                available_instance.semester = info.semester
+                available_instance.registration_deadline = info.registrationDeadline
+                # 不写回 seats_left，剩余名额只由 seats 模块修改
+                available_instance.save(update_fields=['year', 'semester', 'registration_deadline'])
+                if info.capacity is not None:
+                    seats.resize(available_instance.pk, info.capacity)
             else:
-                available_instance = available(year=info.year, semester=info.semester, capacity=info.capacity or 0)
+                available_instance = available(year=info.year, semester=info.semester, capacity=info.capacity or 0,
+                                               seats_left=info.capacity or 0,
+                                               registration_deadline=info.registrationDeadline)
+                available_instance.save()
                 course_instance.available = available_instance
-            available_instance.year = info.year
-            available_instance.semester = info.semester
-            available_instance.capacity = info.capacity
-            available_instance.registration_deadline = info.registrationDeadline
-            available_instance.save()
         course_instance.save()
         return 200, {
             "course_id": course_instance.course_id,
@@ -426,6 +429,18 @@ def all_grade(request):
 
 
 
+# 批量录入成绩：JSON 数组或 CSV（Content-Type: text/csv），列为 course_id、student_id、score
+# 要注册在 /grade/{grade_id} 之前，否则 bulk 会被当作 grade_id
+@api.post('/grade/bulk', response={200: BulkResult, 400: ErrorResponse}, auth=AuthBearer())
+def bulk_create_grade(request):
+    if not request.auth.is_teacher:
+        raise HttpError(403, "Forbidden")
+    try:
+        rows = bulk.parse_rows(request, ('course_id', 'student_id', 'score'))
+    except bulk.BulkError as e:
+        return 400, {"message": str(e)}
+    return 200, bulk.import_grades(rows, request.auth)
+
 @api.get('/grade/{grade_id}', response={200: Grade, 404: ErrorResponse}, auth=AuthBearer())
 def one_grade(request, grade_id: int):
     try:
@@ -524,7 +539,8 @@ def teacher_create_course(request, info: CreateCourse):
     if not request.auth.is_teacher:
         raise HttpError(403, "Forbidden")
     
-    available_instance = available.objects.create(year=info.year, semester=info.semester, capacity=info.capacity)
+    available_instance = available.objects.create(year=info.year, semester=info.semester, capacity=info.capacity,
+                                                  seats_left=info.capacity)
     new_course = course.objects.create(course_id=generate_course_id(), course_name=info.name, teacher=request.auth, available=available_instance)
     
     return 201, {
@@ -576,36 +592,86 @@ def all_enrollment(request):
         })
     return 200, enrollment_data
 
-@api.post('/enroll', response={201: Enrollment, 400: ErrorResponse, 404: ErrorResponse, 409: ErrorResponse}, auth=AuthBearer())
-def create_enrollment(request, info: Enrollment):
+# 报名截止日期已过；没有开课信息或没有设置截止日期时不限制
+def deadline_passed(available_instance):
+    deadline = available_instance.registration_deadline if available_instance is not None else None
+    return deadline is not None and timezone.now().date() > deadline
+
+# 选课前的检查（只读），返回 (错误响应, (课程, 学生, 开课信息))，检查通过时错误响应为 None
+def check_enrollment(info: Enrollment):
     course_instance = course.objects.filter(course_id=info.course_id).first()
     student_instance = newuser.objects.filter(student_id=info.student_id).first()
     available_instance = available.objects.filter(course=course_instance).first()
 
     if not course_instance or not student_instance or not available_instance:
-        return 404, {"message": "Course, student, or available course not found"}
+        return (404, {"message": "Course, student, or available course not found"}), None
 
-    if timezone.now().date() > available_instance.registration_deadline:
-        return 400, {"message": "Registration deadline has passed"}
+    if deadline_passed(available_instance):
+        return (400, {"message": "Registration deadline has passed"}), None
 
     if enrollment.objects.filter(course=course_instance, student=student_instance).exists():
-        return 409, {"message": "Enrollment already exists"}
+        return (409, {"message": "Enrollment already exists"}), None
 
-    if enrollment.objects.filter(course=course_instance).count() >= available_instance.capacity:
-        return 400, {"message": "Course capacity reached"}
+    return None, (course_instance, student_instance, available_instance)
 
-    new_enrollment = enrollment.objects.create(
-    course=course_instance,
-    student=student_instance,
-    available=available_instance,
-    semester=available_instance.semester  # 从 available 实例获取 semester 值
-    )
+@api.post('/enroll', response={201: Enrollment, 400: ErrorResponse, 404: ErrorResponse, 409: ErrorResponse}, auth=AuthBearer())
+def create_enrollment(request, info: Enrollment):
+    error, instances = check_enrollment(info)
+    if error:
+        return error
+    course_instance, student_instance, available_instance = instances
+
+    try:
+        new_enrollment = seats.enroll(course_instance, student_instance, available_instance)
+    except seats.CourseFull:
+        return 400, {"message": "Course capacity reached"}
+    except IntegrityError:
+        # 同一个学生的并发请求
+        return 409, {"message": "Enrollment already exists"}
     return 201, {
     "course_id": new_enrollment.course.course_id,
     "student_id": new_enrollment.student.student_id,
     "semester": new_enrollment.semester
     }
 
+# 批量选课（管理员或课程的教师）：JSON 数组或 CSV（Content-Type: text/csv），列为 course_id、student_id
+@api.post('/enroll/bulk', response={200: BulkResult, 400: ErrorResponse}, auth=AuthBearer())
+def bulk_create_enrollment(request):
+    if not (request.auth.is_staff or request.auth.is_teacher):
+        raise HttpError(403, "Forbidden")
+    try:
+        rows = bulk.parse_rows(request, ('course_id', 'student_id'))
+    except bulk.BulkError as e:
+        return 400, {"message": str(e)}
+    return 200, bulk.enroll_rows(rows, request.auth)
+
+# 选课开放时使用：请求进入准入队列，立即返回排队号和位置，之后用 GET /enroll/queue/{ticket} 查询结果
+@api.post('/enroll/queue', response={202: QueueTicket, 400: ErrorResponse, 404: ErrorResponse, 409: ErrorResponse}, auth=AuthBearer())
+def queue_enrollment(request, info: Enrollment):
+    error, instances = check_enrollment(info)
+    if error:
+        return error
+    course_instance, student_instance, _ = instances
+    ticket = admission.queue.submit(course_instance.course_id, student_instance.student_id)
+    return 202, admission.queue.describe(ticket)
+
+@api.get('/enroll/queue/{ticket}', response={200: QueueTicket, 404: ErrorResponse}, auth=AuthBearer())
+def get_queued_enrollment(request, ticket: str):
+    ticket_instance = admission.queue.get(ticket)
+    if ticket_instance is None:
+        return 404, {"message": "Ticket not found"}
+    return 200, admission.queue.describe(ticket_instance)
+
+# 当前用户在等待名单中的课程
+@api.get('/waitlist', response={200: List[WaitlistEntry]}, auth=AuthBearer())
+def my_waitlist(request):
+    entries = waitlist.objects.filter(student_id=request.auth.student_id).select_related('course')
+    return 200, [{
+        'course_id': entry.course.course_id,
+        'course_name': entry.course.course_name,
+        'position': admission.waitlist_position(entry.course_id, entry.student_id),
+    } for entry in entries]
+
 @api.delete('/enroll/{enroll_id}', response={200: NoMessage, 400: ErrorResponse, 404: ErrorResponse}, auth=AuthBearer())
 def delete_enrollment(request, enroll_id: int):
     try:
@@ -613,18 +679,11 @@ def delete_enrollment(request, enroll_id: int):
     except enrollment.DoesNotExist:
         return 404, {"message": "Enrollment not found"}
     
-    if timezone.now().date() > enrollment_instance.available.registration_deadline:
+    if deadline_passed(enrollment_instance.available):
         return 400, {"message": "Cannot drop the course after the registration deadline"}
     
-    course_instance = enrollment_instance.course
-    available_instance = course_instance.available
-    
-    enrollment_instance.delete()
-    
-    # 更新课程的剩余容量
-    current_enrollment_count = enrollment.objects.filter(course=course_instance).count()
-    available_instance.capacity = available_instance.capacity - current_enrollment_count
-    available_instance.save()
+    # 删除选课记录并归还名额
+    seats.drop(enrollment_instance)
     
     return 200, {"message": "Enrollment deleted"}
 
@@ -642,7 +701,7 @@ def update_enrollment(request, enroll_id: int, info: Enrollment):
         enrollment_instance.semester = info.semester
     if hasattr(info, 'registrationDeadline') and enrollment_instance.available:
         enrollment_instance.available.registration_deadline = info.registrationDeadline
-        enrollment_instance.available.save()
+        enrollment_instance.available.save(update_fields=['registration_deadline'])
 
     enrollment_instance.save()
     return 200, {
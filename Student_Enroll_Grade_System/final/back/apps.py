@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BackConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'back'
+
+    def ready(self):
+        # 注册课程目录缓存失效的信号
+        from back import catalog  # noqa: F401
@@ -0,0 +1,199 @@
+# 批量选课和批量导入成绩
+#
+# 请求体为 JSON 数组或 CSV（Content-Type: text/csv，第一行为列名），每行一条记录。
+# 先用几次 IN 查询把涉及的课程、学生、选课记录和成绩一次读出，在内存里逐行检查；
+# 再把通过检查的行按 BATCH_SIZE 分批，每批一个事务用 bulk_create 写入。
+# 每一行都有结果（created 或 error 及原因），一行出错不影响其他行；
+# 检查之后同一条记录被并发写入时，所在的一批回滚，这一批的行都报错。
+import csv
+import io
+import json
+import math
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from back import catalog, seats
+from back.models import course, enrollment, grade, newuser
+
+# 一个事务写入的行数
+BATCH_SIZE = 1000
+
+# 一次请求最多的行数
+MAX_ROWS = 20000
+
+CREATED = 'created'
+ERROR = 'error'
+
+
+class BulkError(ValueError):
+    """请求体无法解析"""
+
+
+def parse_rows(request, columns):
+    """把请求体解析成 dict 的列表，每行必须包含 columns 中的列"""
+    body = request.body.decode('utf-8-sig')
+    if request.content_type == 'text/csv':
+        reader = csv.DictReader(io.StringIO(body))
+        missing = [name for name in columns if name not in (reader.fieldnames or [])]
+        if missing:
+            raise BulkError("Missing columns: " + ", ".join(missing))
+        rows = list(reader)
+    else:
+        try:
+            rows = json.loads(body)
+        except json.JSONDecodeError:
+            raise BulkError("Invalid JSON")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise BulkError("Expected a JSON array of objects")
+    if len(rows) > MAX_ROWS:
+        raise BulkError(f"Too many rows (at most {MAX_ROWS})")
+    return rows
+
+
+def _text(row, name):
+    value = row.get(name)
+    return str(value).strip() if value is not None else ''
+
+
+def _result(results, index, status, message=None):
+    results[index] = {"row": index + 1, "status": status, "message": message}
+
+
+def _summary(results):
+    created = sum(1 for result in results if result["status"] == CREATED)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+def _batches(items):
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def import_grades(rows, teacher):
+    """
+    rows 的每行为 course_id、student_id、score；只能给自己的课程录入成绩
+    与 POST /grade 相同，已有成绩的选课记录不会被覆盖
+    """
+    results = [None] * len(rows)
+    keys = {}
+    for index, row in enumerate(rows):
+        course_id, student_id = _text(row, 'course_id'), _text(row, 'student_id')
+        try:
+            score = float(row.get('score'))
+        except (TypeError, ValueError):
+            score = math.nan
+        if not course_id or not student_id:
+            _result(results, index, ERROR, "course_id and student_id are required")
+        elif not math.isfinite(score):
+            _result(results, index, ERROR, "Invalid score")
+        else:
+            keys[index] = (course_id, student_id, score)
+
+    course_ids = {course_id for course_id, _, _ in keys.values()}
+    student_ids = {student_id for _, student_id, _ in keys.values()}
+    owners = dict(course.objects.filter(course_id__in=course_ids).values_list('course_id', 'teacher_id'))
+    enrollments = {
+        (course_id, student_id): (enroll_id, grade_id)
+        for enroll_id, course_id, student_id, grade_id in enrollment.objects.filter(
+            course_id__in=course_ids, student_id__in=student_ids
+        ).values_list('id', 'course_id', 'student_id', 'grade__id')
+    }
+
+    pending, seen = [], set()
+    for index, (course_id, student_id, score) in keys.items():
+        if course_id not in owners:
+            _result(results, index, ERROR, "Course not found")
+        elif owners[course_id] != teacher.student_id:
+            _result(results, index, ERROR, "Forbidden")
+        elif (course_id, student_id) not in enrollments:
+            _result(results, index, ERROR, "Enrollment not found")
+        elif (course_id, student_id) in seen:
+            _result(results, index, ERROR, "Duplicate row")
+        elif enrollments[(course_id, student_id)][1] is not None:
+            _result(results, index, ERROR, "Grade already exists")
+        else:
+            seen.add((course_id, student_id))
+            pending.append((index, enrollments[(course_id, student_id)][0], score))
+
+    for batch in _batches(pending):
+        try:
+            with transaction.atomic():
+                grade.objects.bulk_create([grade(enroll_id=enroll_id, score=score) for _, enroll_id, score in batch])
+        except IntegrityError:
+            for index, _, _ in batch:
+                _result(results, index, ERROR, "Grade already exists")
+            continue
+        for index, _, _ in batch:
+            _result(results, index, CREATED)
+    return _summary(results)
+
+
+def enroll_rows(rows, user):
+    """
+    rows 的每行为 course_id、student_id；管理员可以为任何课程选课，教师只能为自己的课程选课
+    检查与 POST /enroll 相同；名额按行的先后分配，名额用完后的行报错
+    """
+    results = [None] * len(rows)
+    keys = {}
+    for index, row in enumerate(rows):
+        course_id, student_id = _text(row, 'course_id'), _text(row, 'student_id')
+        if not course_id or not student_id:
+            _result(results, index, ERROR, "course_id and student_id are required")
+        else:
+            keys[index] = (course_id, student_id)
+
+    course_ids = {course_id for course_id, _ in keys.values()}
+    student_ids = {student_id for _, student_id in keys.values()}
+    courses = course.objects.filter(course_id__in=course_ids).select_related('available').in_bulk()
+    students = set(newuser.objects.filter(student_id__in=student_ids).values_list('student_id', flat=True))
+    enrolled = set(enrollment.objects.filter(course_id__in=course_ids, student_id__in=student_ids)
+                   .values_list('course_id', 'student_id'))
+    today = timezone.now().date()
+
+    pending, seen = [], set()
+    for index, (course_id, student_id) in keys.items():
+        course_instance = courses.get(course_id)
+        if course_instance is None or course_instance.available is None or student_id not in students:
+            _result(results, index, ERROR, "Course, student, or available course not found")
+        elif not user.is_staff and course_instance.teacher_id != user.student_id:
+            _result(results, index, ERROR, "Forbidden")
+        elif (course_instance.available.registration_deadline is not None
+              and today > course_instance.available.registration_deadline):
+            _result(results, index, ERROR, "Registration deadline has passed")
+        elif (course_id, student_id) in enrolled or (course_id, student_id) in seen:
+            _result(results, index, ERROR, "Enrollment already exists")
+        else:
+            seen.add((course_id, student_id))
+            pending.append((index, course_instance, student_id))
+
+    for batch in _batches(pending):
+        by_course = {}
+        for item in batch:
+            by_course.setdefault(item[1].course_id, []).append(item)
+        created, full = [], []
+        try:
+            with transaction.atomic():
+                for items in by_course.values():
+                    slot = items[0][1].available
+                    granted = seats.reserve_many(slot.pk, len(items))
+                    created += items[:granted]
+                    full += items[granted:]
+                enrollment.objects.bulk_create([
+                    enrollment(course=course_instance, student_id=student_id, available=course_instance.available,
+                               semester=course_instance.available.semester)
+                    for _, course_instance, student_id in created
+                ])
+        except IntegrityError:
+            # 回滚后名额也恢复了
+            for index, _, _ in batch:
+                _result(results, index, ERROR, "Enrollment already exists")
+            continue
+        for index, _, _ in created:
+            _result(results, index, CREATED)
+        for index, _, _ in full:
+            _result(results, index, ERROR, "Course capacity reached")
+    # bulk_create 和 UPDATE 不发信号
+    if pending:
+        catalog.invalidate()
+    return _summary(results)
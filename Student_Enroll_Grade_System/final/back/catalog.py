@@ -0,0 +1,160 @@
+# 课程目录 GET /api/course 的查询、筛选、分页和缓存
+#
+# 查询：教师姓名和开课信息用 JOIN 取出，剩余容量用选课人数的 COUNT 在同一条查询里算出。
+# 筛选：year、semester、teacher（教师的 student_id）、has_capacity（还有剩余容量）、
+#       deadline_open（报名截止日期不早于今天，与 /enroll 的判断相同）。
+# 分页：按 course_id 的 keyset 分页，不用 OFFSET；cursor 是上一页最后一门课的 course_id（base64 编码）。
+# 缓存：每一页的结果保存在 Django 缓存（CACHES 的 default），所有用户共享。
+#       缓存键包含目录的版本号，课程、开课信息、选课或用户变化时版本号更新，旧的页自然不再命中。
+#       版本号保存在数据库（catalog_version）里，不在缓存里：gunicorn 的多个 worker 各有自己的
+#       本地缓存时，任何一个 worker 处理的修改也会让其他 worker 的旧页和旧 ETag 立即失效。
+#       版本号随修改所在的事务一起提交或回滚；更新时取 max(旧值 + 1, 当前时间的纳秒数)，
+#       回滚后不会再次用到同一个版本号。
+#       bulk_create / update / delete 不发信号，批量修改数据后需要调用 invalidate()。
+# ETag 由版本号和请求参数算出，If-None-Match 匹配时只需要按主键读一次版本号。
+import base64
+import binascii
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BigIntegerField, Count, F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.http import parse_etags
+
+from back.models import available, catalog_version, course, enrollment, newuser
+
+# catalog_version 中唯一一行的主键
+VERSION_ID = 1
+
+# 每页最多的课程数
+MAX_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    """cursor 不是本接口返回的值"""
+
+
+def cache_timeout():
+    return getattr(settings, 'COURSE_CATALOG_CACHE_TIMEOUT', 300)
+
+
+def course_catalog():
+    """
+    课程目录：教师姓名和开课信息用 JOIN 取出，剩余容量用选课人数的 COUNT 在同一条查询里算出
+    没有开课信息的课程 year 为 0、semester 为 'N/A'、剩余容量为 0
+    """
+    return course.objects.annotate(
+        teacher_name=F('teacher__username'),
+        year=Coalesce('available__year', Value(0)),
+        semester=Coalesce('available__semester', Value('N/A')),
+        remaining_capacity=Coalesce(F('available__capacity') - Count('enrollment'), Value(0)),
+        registration_deadline=F('available__registration_deadline'),
+    ).values('course_id', 'course_name', 'teacher_name', 'year', 'semester', 'remaining_capacity',
+             'registration_deadline')
+
+
+def encode_cursor(course_id):
+    return base64.urlsafe_b64encode(course_id.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return base64.b64decode(cursor.encode(), altchars=b'-_', validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def version():
+    """当前目录版本号；第一次使用时从当前时间开始"""
+    current = catalog_version.objects.filter(pk=VERSION_ID).values_list('value', flat=True).first()
+    if current is None:
+        current = catalog_version.objects.get_or_create(pk=VERSION_ID, defaults={'value': time.time_ns()})[0].value
+    return current
+
+
+def invalidate():
+    updated = catalog_version.objects.filter(pk=VERSION_ID).update(
+        value=Greatest(F('value') + 1, Value(time.time_ns(), output_field=BigIntegerField())))
+    if not updated:
+        version()
+
+
+def normalize(year=None, semester=None, teacher=None, has_capacity=None, deadline_open=None, limit=None, cursor=None):
+    """只保留给出的参数；deadline_open 的结果随日期变化，附上今天的日期"""
+    params = {
+        'year': year, 'semester': semester, 'teacher': teacher, 'has_capacity': has_capacity,
+        'deadline_open': deadline_open, 'limit': min(limit, MAX_LIMIT) if limit else None, 'cursor': cursor,
+    }
+    params = {key: value for key, value in params.items() if value is not None}
+    if deadline_open is not None:
+        params['today'] = timezone.now().date().isoformat()
+    return params
+
+
+def _digest(current, params):
+    content = json.dumps([current, params], sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+
+def etag(params):
+    """当前版本下这组参数的 ETag，也用作缓存键"""
+    return f'"catalog-{_digest(version(), params)}"'
+
+
+def matches(tag, if_none_match):
+    """If-None-Match 请求头是否包含 tag：逐个比较解析出的 ETag（弱比较），* 匹配任何 ETag"""
+    etags = parse_etags(if_none_match)
+    return etags == ['*'] or any(value.removeprefix('W/') == tag for value in etags)
+
+
+def query(params):
+    """返回 (本页课程, 下一页 cursor)；没有 limit 时返回全部课程，没有下一页时 cursor 为 None"""
+    catalog = course_catalog().order_by('course_id')
+    if 'year' in params:
+        catalog = catalog.filter(available__year=params['year'])
+    if 'semester' in params:
+        catalog = catalog.filter(available__semester=params['semester'])
+    if 'teacher' in params:
+        catalog = catalog.filter(teacher_id=params['teacher'])
+    if 'has_capacity' in params:
+        catalog = (catalog.filter(remaining_capacity__gt=0) if params['has_capacity']
+                   else catalog.filter(remaining_capacity__lte=0))
+    if 'deadline_open' in params:
+        today = params['today']
+        catalog = (catalog.filter(available__registration_deadline__gte=today) if params['deadline_open']
+                   else catalog.exclude(available__registration_deadline__gte=today))
+    if 'cursor' in params:
+        catalog = catalog.filter(course_id__gt=decode_cursor(params['cursor']))
+    limit = params.get('limit')
+    if limit is None:
+        return list(catalog), None
+    # 多取一行判断是否还有下一页
+    page = list(catalog[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(page[-1]['course_id'])
+
+
+def page(tag, params):
+    """带缓存的 query，tag 为 etag(params) 的结果"""
+    key = f'course-catalog:page:{tag}'
+    cached = cache.get(key)
+    if cached is None:
+        cached = query(params)
+        cache.set(key, cached, cache_timeout())
+    return cached
+
+
+@receiver([post_save, post_delete], sender=course)
+@receiver([post_save, post_delete], sender=available)
+@receiver([post_save, post_delete], sender=enrollment)
+@receiver([post_save, post_delete], sender=newuser)
+def _catalog_changed(sender, **kwargs):
+    invalidate()
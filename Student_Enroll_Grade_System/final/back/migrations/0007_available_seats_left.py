@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_seats(apps, schema_editor):
+    available = apps.get_model('back', 'available')
+    for instance in available.objects.annotate(enrolled=Count('course__enrollment')):
+        instance.seats_left = instance.capacity - instance.enrolled
+        instance.save(update_fields=['seats_left'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0006_enrollment_semester'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='available',
+            name='seats_left',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_seats, migrations.RunPython.noop),
+    ]
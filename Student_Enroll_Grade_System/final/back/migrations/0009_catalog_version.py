@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0008_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='catalog_version',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('back', '0009_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='admission_ticket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket', models.CharField(max_length=32, unique=True)),
+                ('status', models.CharField(default='pending', max_length=10)),
+                ('message', models.CharField(default=None, max_length=200, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='back.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'course'], name='back_admiss_status_43e0b0_idx')],
+            },
+        ),
+    ]
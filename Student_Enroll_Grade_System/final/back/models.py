@@ -27,6 +27,8 @@ class available(models.Model):
     semester = models.CharField(max_length=10)
     capacity = models.IntegerField(default=0)
     registration_deadline = models.DateField(null=True, default=None)
+    # 剩余名额，由 back/seats.py 原子地增减；容量改小到已选人数以下时为负数
+    seats_left = models.IntegerField(default=0)
 
     def __str__(self):
         return str(self.year) + " " + self.semester
@@ -45,6 +47,39 @@ class enrollment(models.Model):
     
 
 
+class waitlist(models.Model):
+    # 名额已满时排队的学生，按 id 先后分配退出的名额
+    course = models.ForeignKey(course, on_delete=models.CASCADE)
+    student = models.ForeignKey(newuser, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        unique_together = (('student', 'course'),)
+
+    def __str__(self):
+        return f"{self.student.username} - {self.course.course_name}"
+
+
+class admission_ticket(models.Model):
+    # POST /enroll/queue 的排队号，由 back/admission.py 维护；保存在数据库里，任何一个 Web 进程都能查询和处理
+    # status 为 pending / enrolled / waitlisted / rejected，id 的先后即到达的先后
+    ticket = models.CharField(max_length=32, unique=True)
+    course = models.ForeignKey(course, on_delete=models.CASCADE)
+    student = models.ForeignKey(newuser, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, default='pending')
+    message = models.CharField(max_length=200, null=True, default=None)
+    created_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        indexes = [models.Index(fields=['status', 'course'])]
+
+    def __str__(self):
+        return f"{self.ticket} - {self.status}"
+
+
+class catalog_version(models.Model):
+    # 课程目录的版本号，只有一行，由 back/catalog.py 维护；放在数据库里，所有 Web 进程看到同一个值
+    value = models.BigIntegerField()
+
+
 class grade(models.Model):
     enroll = models.OneToOneField(enrollment, on_delete=models.CASCADE, null=True, default=None)
     score = models.FloatField()
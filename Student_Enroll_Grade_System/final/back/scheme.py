@@ -1,6 +1,6 @@
 from ninja import Schema
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 class User(Schema):
@@ -104,4 +104,25 @@ class EnrolledStudentInfo(Schema):
     student_id: str
     student_name: str
     score: Optional[float] = None
-    grade_id: Optional[int] = None
\ No newline at end of file
+    grade_id: Optional[int] = None
+class QueueTicket(Schema):
+    ticket: str
+    course_id: str
+    status: str  # pending / enrolled / waitlisted / rejected
+    position: Optional[int] = None  # pending 时为队列中的位置，waitlisted 时为等待名单中的位置
+    message: Optional[str] = None
+
+class WaitlistEntry(Schema):
+    course_id: str
+    course_name: str
+    position: int
+
+class BulkRowResult(Schema):
+    row: int  # 从 1 开始的行号（CSV 不含列名行）
+    status: str  # created / error
+    message: Optional[str] = None
+
+class BulkResult(Schema):
+    created: int
+    failed: int
+    results: List[BulkRowResult]
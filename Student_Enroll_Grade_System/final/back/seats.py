@@ -0,0 +1,103 @@
+# 选课名额
+#
+# 每个 available 行的 seats_left 记录剩余名额。选课时在同一个事务里用条件 UPDATE
+# （seats_left > 0 时减一）占用名额，再插入选课记录；UPDATE 影响 0 行说明名额已满。
+# 判断和扣减是一条语句，并发的请求不会超出容量，也不需要每次 COUNT 选课人数。
+# 插入失败（重复选课）时事务回滚，名额随之恢复。
+# 名额已满时学生可以进入等待名单（waitlist），退课或容量增加时 promote 按先后顺序把名额分给他们，
+# 所以等待名单不为空时 seats_left 总是 0。
+from django.db import transaction
+from django.db.models import F
+
+from back import catalog
+from back.models import available, course, enrollment, waitlist
+
+
+class CourseFull(Exception):
+    """没有剩余名额"""
+
+
+def reserve(available_id):
+    """占用一个名额，成功返回 True"""
+    return available.objects.filter(pk=available_id, seats_left__gt=0).update(seats_left=F('seats_left') - 1) == 1
+
+
+def reserve_many(available_id, count):
+    """最多占用 count 个名额，返回实际占用的数量；用读到的 seats_left 作为 UPDATE 的条件，被并发修改时重试"""
+    while count > 0:
+        seats_left = available.objects.values_list('seats_left', flat=True).get(pk=available_id)
+        granted = min(count, seats_left)
+        if granted <= 0:
+            return 0
+        if available.objects.filter(pk=available_id, seats_left=seats_left).update(
+                seats_left=F('seats_left') - granted):
+            return granted
+    return 0
+
+
+def release(available_id):
+    available.objects.filter(pk=available_id).update(seats_left=F('seats_left') + 1)
+
+
+def enroll(course_instance, student_instance, available_instance):
+    """
+    占用名额并创建选课记录
+    名额已满抛出 CourseFull，已经选过这门课抛出 IntegrityError，两种情况都不占用名额
+    """
+    with transaction.atomic():
+        if not reserve(available_instance.pk):
+            raise CourseFull
+        return enrollment.objects.create(
+            course=course_instance,
+            student=student_instance,
+            available=available_instance,
+            semester=available_instance.semester  # 从 available 实例获取 semester 值
+        )
+
+
+def drop(enrollment_instance):
+    """删除选课记录并归还名额"""
+    with transaction.atomic():
+        enrollment_instance.delete()
+        course_instance = enrollment_instance.course
+        if course_instance.available_id is not None:
+            release(course_instance.available_id)
+            promote(course_instance)
+
+
+def resize(available_id, capacity):
+    """修改容量，剩余名额增减相同的数量"""
+    with transaction.atomic():
+        old = available.objects.select_for_update().values_list('capacity', flat=True).get(pk=available_id)
+        available.objects.filter(pk=available_id).update(
+            capacity=capacity, seats_left=F('seats_left') + (capacity - old))
+        for course_instance in course.objects.filter(available_id=available_id):
+            promote(course_instance)
+    # UPDATE 不发 post_save 信号
+    catalog.invalidate()
+
+
+def promote(course_instance):
+    """剩余名额按加入的先后分给等待名单中的学生，返回选上的人数"""
+    if course_instance.available_id is None:
+        return 0
+    with transaction.atomic():
+        seats_left, semester = available.objects.values_list('seats_left', 'semester').get(
+            pk=course_instance.available_id)
+        if seats_left <= 0:
+            return 0
+        entries = list(waitlist.objects.filter(course=course_instance).order_by('id')
+                       .values_list('id', 'student_id')[:seats_left])
+        granted = reserve_many(course_instance.available_id, len(entries))
+        if not granted:
+            return 0
+        entries = entries[:granted]
+        enrollment.objects.bulk_create([
+            enrollment(course=course_instance, student_id=student_id, available_id=course_instance.available_id,
+                       semester=semester)
+            for _, student_id in entries
+        ])
+        waitlist.objects.filter(pk__in=[entry_id for entry_id, _ in entries]).delete()
+    # bulk_create 和 UPDATE 不发信号
+    catalog.invalidate()
+    return granted
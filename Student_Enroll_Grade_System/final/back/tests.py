@@ -1,3 +1,523 @@
-from django.test import TestCase
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import OperationalError, connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from jose import jwt
+
+from back import admission, api, bulk, catalog
+from back.models import admission_ticket, available, course, enrollment, grade, newuser, waitlist
+
+
+def auth_header(user):
+    """与 /login 相同的 JWT"""
+    token = jwt.encode({"sub": user.student_id, "exp": datetime.utcnow() + timedelta(hours=1)},
+                       api.JWT_SECRET_KEY, algorithm="HS256")
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+class CourseCatalogTests(TestCase):
+    """GET /api/course 的查询数量不随课程数量增长"""
+
+    COURSES = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = newuser.objects.create(student_id="t001", username="teacher", is_teacher=True)
+        cls.students = newuser.objects.bulk_create([
+            newuser(student_id=f"s{i:03d}", username=f"student{i}") for i in range(5)
+        ])
+        slots = available.objects.bulk_create([
+            available(year=2024, semester="Fall", capacity=30, registration_deadline=date(2024, 9, 1))
+            for _ in range(cls.COURSES)
+        ])
+        courses = course.objects.bulk_create([
+            course(course_id=f"{i:04d}", course_name=f"course{i}", teacher=cls.teacher, available=slots[i])
+            for i in range(cls.COURSES)
+        ])
+        # 第 i 门课有 i % 6 个学生
+        enrollment.objects.bulk_create([
+            enrollment(course=c, student=student, available=c.available, semester="Fall")
+            for i, c in enumerate(courses) for student in cls.students[:i % 6]
+        ])
+        course.objects.create(course_id="9999", course_name="unscheduled", teacher=cls.teacher)
+
+    def setUp(self):
+        # 缓存不随测试的事务回滚
+        cache.clear()
+
+    def test_query_count(self):
+        # 一次查询用户（认证），一次读取目录版本号，一次查询课程目录
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/course", **auth_header(self.teacher))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), self.COURSES + 1)
+
+    def test_catalog_values(self):
+        catalog = {c["course_id"]: c for c in self.client.get("/api/course", **auth_header(self.teacher)).json()}
+        self.assertEqual(catalog["0007"], {
+            "course_id": "0007",
+            "course_name": "course7",
+            "teacher_name": "teacher",
+            "year": 2024,
+            "semester": "Fall",
+            "remaining_capacity": 29,
+            "registration_deadline": "2024-09-01",
+        })
+        self.assertEqual(catalog["0005"]["remaining_capacity"], 25)
+        self.assertEqual(catalog["9999"], {
+            "course_id": "9999",
+            "course_name": "unscheduled",
+            "teacher_name": "teacher",
+            "year": 0,
+            "semester": "N/A",
+            "remaining_capacity": 0,
+            "registration_deadline": None,
+        })
+
+
+class CatalogFilterCacheTests(TestCase):
+    """GET /api/course 的筛选、分页、缓存和 ETag"""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        cls.alice = newuser.objects.create(student_id="t001", username="alice", is_teacher=True)
+        cls.bob = newuser.objects.create(student_id="t002", username="bob", is_teacher=True)
+        cls.student = newuser.objects.create(student_id="s001", username="student")
+        open_fall = available.objects.create(year=2024, semester="Fall", capacity=1,
+                                             registration_deadline=today + timedelta(days=7))
+        closed_spring = available.objects.create(year=2025, semester="Spring", capacity=10,
+                                                 registration_deadline=today - timedelta(days=1))
+        open_spring = available.objects.create(year=2025, semester="Spring", capacity=10,
+                                               registration_deadline=today)
+        course.objects.create(course_id="C1", course_name="full", teacher=cls.alice, available=open_fall)
+        course.objects.create(course_id="C2", course_name="closed", teacher=cls.bob, available=closed_spring)
+        course.objects.create(course_id="C3", course_name="open", teacher=cls.alice, available=open_spring)
+        course.objects.create(course_id="C4", course_name="unscheduled", teacher=cls.bob)
+        full = course.objects.get(course_id="C1")
+        enrollment.objects.create(course=full, student=cls.student, available=open_fall, semester="Fall")
+
+    def setUp(self):
+        cache.clear()
+        self.auth = auth_header(self.student)
+
+    def course_ids(self, query=""):
+        response = self.client.get(f"/api/course{query}", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return [c["course_id"] for c in response.json()]
+
+    def test_filters(self):
+        self.assertEqual(self.course_ids(), ["C1", "C2", "C3", "C4"])
+        self.assertEqual(self.course_ids("?year=2025"), ["C2", "C3"])
+        self.assertEqual(self.course_ids("?semester=Fall"), ["C1"])
+        self.assertEqual(self.course_ids("?teacher=t002"), ["C2", "C4"])
+        self.assertEqual(self.course_ids("?has_capacity=true"), ["C2", "C3"])
+        self.assertEqual(self.course_ids("?has_capacity=false"), ["C1", "C4"])
+        # 截止日期当天仍可报名，没有开课信息的课程不能报名
+        self.assertEqual(self.course_ids("?deadline_open=true"), ["C1", "C3"])
+        self.assertEqual(self.course_ids("?deadline_open=false"), ["C2", "C4"])
+        self.assertEqual(self.course_ids("?year=2025&has_capacity=true&deadline_open=true&teacher=t001"), ["C3"])
+
+    def test_keyset_pagination(self):
+        pages, query = [], "?limit=3"
+        while True:
+            response = self.client.get(f"/api/course{query}", **self.auth)
+            self.assertEqual(response.status_code, 200)
+            pages.append([c["course_id"] for c in response.json()])
+            if "X-Next-Cursor" not in response:
+                break
+            query = f"?limit=3&cursor={response['X-Next-Cursor']}"
+        self.assertEqual(pages, [["C1", "C2", "C3"], ["C4"]])
+
+    def test_invalid_paging(self):
+        self.assertEqual(self.client.get("/api/course?limit=0", **self.auth).status_code, 400)
+        self.assertEqual(self.client.get("/api/course?cursor=%25%25", **self.auth).status_code, 400)
+
+    def test_cached_page(self):
+        first = self.client.get("/api/course?year=2025", **self.auth)
+        # 第二次只查询用户（认证）和目录版本号
+        with self.assertNumQueries(2):
+            second = self.client.get("/api/course?year=2025", **self.auth)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_invalidated_on_enrollment(self):
+        first = self.client.get("/api/course?has_capacity=true", **self.auth)
+        self.assertEqual([c["remaining_capacity"] for c in first.json()], [10, 10])
+        open_course = course.objects.get(course_id="C3")
+        enrollment.objects.create(course=open_course, student=self.student, available=open_course.available,
+                                  semester="Spring")
+        second = self.client.get("/api/course?has_capacity=true", **self.auth)
+        self.assertEqual([c["remaining_capacity"] for c in second.json()], [10, 9])
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_not_modified(self):
+        tag = self.client.get("/api/course", **self.auth)["ETag"]
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/course", HTTP_IF_NONE_MATCH=tag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], tag)
+        course.objects.filter(course_id="C4").get().save()
+        self.assertEqual(self.client.get("/api/course", HTTP_IF_NONE_MATCH=tag, **self.auth).status_code, 200)
+
+    def test_if_none_match_compares_whole_tags(self):
+        tag = self.client.get("/api/course", **self.auth)["ETag"]
+        for header in (f'"other", W/{tag}', "*"):
+            response = self.client.get("/api/course", HTTP_IF_NONE_MATCH=header, **self.auth)
+            self.assertEqual(response.status_code, 304, header)
+        # 只是包含 tag 的字符串不算匹配
+        for header in (tag + "x", f'"x{tag}"', tag[:-1]):
+            response = self.client.get("/api/course", HTTP_IF_NONE_MATCH=header, **self.auth)
+            self.assertEqual(response.status_code, 200, header)
+
+    def test_write_in_another_worker_invalidates(self):
+        first = self.client.get("/api/course?has_capacity=true", **self.auth)
+        # 另一个 gunicorn worker 有自己的本地缓存，修改只经过数据库传过来
+        with mock.patch.object(catalog, "cache", LocMemCache("other-worker", {})):
+            open_course = course.objects.get(course_id="C3")
+            enrollment.objects.create(course=open_course, student=self.student, available=open_course.available,
+                                      semester="Spring")
+        response = self.client.get("/api/course?has_capacity=true", HTTP_IF_NONE_MATCH=first["ETag"], **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c["remaining_capacity"] for c in response.json()], [10, 9])
+
+
+class SeatReservationTests(TestCase):
+    """选课、退课和修改容量时剩余名额的变化"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = newuser.objects.create(student_id="t001", username="teacher", is_teacher=True)
+        cls.students = [newuser.objects.create(student_id=f"s{i:03d}", username=f"student{i}") for i in range(3)]
+        cls.slot = available.objects.create(year=2024, semester="Fall", capacity=2, seats_left=2,
+                                            registration_deadline=timezone.now().date() + timedelta(days=7))
+        cls.course = course.objects.create(course_id="C1", course_name="course", teacher=cls.teacher,
+                                           available=cls.slot)
+
+    def enroll(self, student):
+        return self.client.post("/api/enroll", {"course_id": "C1", "student_id": student.student_id, "semester": "Fall"},
+                                content_type="application/json", **auth_header(student))
+
+    def seats_left(self):
+        return available.objects.get(pk=self.slot.pk).seats_left
+
+    def test_capacity(self):
+        self.assertEqual(self.enroll(self.students[0]).status_code, 201)
+        self.assertEqual(self.enroll(self.students[1]).status_code, 201)
+        self.assertEqual(self.seats_left(), 0)
+        response = self.enroll(self.students[2])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message": "Course capacity reached"})
+
+    def test_duplicate_keeps_seat(self):
+        self.assertEqual(self.enroll(self.students[0]).status_code, 201)
+        self.assertEqual(self.enroll(self.students[0]).status_code, 409)
+        self.assertEqual(self.seats_left(), 1)
+
+    def test_drop_releases_seat(self):
+        self.enroll(self.students[0])
+        enroll_id = enrollment.objects.get(student=self.students[0]).pk
+        response = self.client.delete(f"/api/enroll/{enroll_id}", **auth_header(self.students[0]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.seats_left(), 2)
+        self.assertEqual(available.objects.get(pk=self.slot.pk).capacity, 2)
+
+    def test_resize(self):
+        self.enroll(self.students[0])
+        response = self.client.patch("/api/course/C1", {"year": 2024, "semester": "Fall", "capacity": 5,
+                                                        "registrationDeadline": str(self.slot.registration_deadline)},
+                                     content_type="application/json", **auth_header(self.teacher))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.seats_left(), 4)
+
+
+class ConcurrentEnrollmentTests(TransactionTestCase):
+    """大量并发选课请求不会超出容量"""
+
+    STUDENTS = 2000
+    CAPACITY = 150
+    WORKERS = 32
+
+    def setUp(self):
+        cache.clear()
+        teacher = newuser.objects.create(student_id="t001", username="teacher", is_teacher=True)
+        self.students = newuser.objects.bulk_create([
+            newuser(student_id=f"s{i:04d}", username=f"student{i}") for i in range(self.STUDENTS)
+        ])
+        self.slot = available.objects.create(year=2024, semester="Fall", capacity=self.CAPACITY,
+                                             seats_left=self.CAPACITY,
+                                             registration_deadline=timezone.now().date() + timedelta(days=7))
+        course.objects.create(course_id="C1", course_name="popular", teacher=teacher, available=self.slot)
+
+    def enroll(self, student):
+        try:
+            return Client().post("/api/enroll", {"course_id": "C1", "student_id": student.student_id,
+                                                 "semester": "Fall"},
+                                 content_type="application/json", **auth_header(student)).status_code
+        finally:
+            connection.close()
+
+    def test_stampede(self):
+        with ThreadPoolExecutor(self.WORKERS) as executor:
+            statuses = list(executor.map(self.enroll, self.students))
+        self.assertEqual(statuses.count(201), self.CAPACITY)
+        self.assertEqual(statuses.count(400), self.STUDENTS - self.CAPACITY)
+        self.assertEqual(enrollment.objects.filter(course_id="C1").count(), self.CAPACITY)
+        self.assertEqual(available.objects.get(pk=self.slot.pk).seats_left, 0)
+
+
+@override_settings(ENROLLMENT_QUEUE_WORKER=False)
+class AdmissionQueueTests(TestCase):
+    """POST /api/enroll/queue：按先后分配名额，多出的请求进入等待名单"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = newuser.objects.create(student_id="t001", username="teacher", is_teacher=True)
+        cls.students = [newuser.objects.create(student_id=f"s{i:03d}", username=f"student{i}") for i in range(4)]
+        cls.slot = available.objects.create(year=2024, semester="Fall", capacity=2, seats_left=2,
+                                            registration_deadline=timezone.now().date() + timedelta(days=7))
+        cls.course = course.objects.create(course_id="C1", course_name="course", teacher=cls.teacher,
+                                           available=cls.slot)
+
+    def queue(self, student):
+        return self.client.post("/api/enroll/queue", {"course_id": "C1", "student_id": student.student_id,
+                                                      "semester": "Fall"},
+                                content_type="application/json", **auth_header(student))
+
+    def status(self, ticket, student):
+        return self.client.get(f"/api/enroll/queue/{ticket}", **auth_header(student)).json()
+
+    def test_fifo_and_waitlist(self):
+        tickets = []
+        for i, student in enumerate(self.students):
+            response = self.queue(student)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()["status"], "pending")
+            self.assertEqual(response.json()["position"], i + 1)
+            tickets.append(response.json()["ticket"])
+        # 重复提交返回同一个排队号
+        self.assertEqual(self.queue(self.students[0]).json()["ticket"], tickets[0])
+
+        self.assertEqual(admission.queue.drain(), 4)
+        statuses = [self.status(ticket, student) for ticket, student in zip(tickets, self.students)]
+        self.assertEqual([(s["status"], s["position"]) for s in statuses],
+                         [("enrolled", None), ("enrolled", None), ("waitlisted", 1), ("waitlisted", 2)])
+        self.assertEqual(available.objects.get(pk=self.slot.pk).seats_left, 0)
+        self.assertEqual(self.queue(self.students[0]).status_code, 409)
+
+        # 退课后等待名单的第一个学生补上
+        dropped = enrollment.objects.get(student=self.students[0])
+        self.client.delete(f"/api/enroll/{dropped.pk}", **auth_header(self.students[0]))
+        self.assertEqual(self.status(tickets[2], self.students[2])["status"], "enrolled")
+        self.assertEqual(self.status(tickets[3], self.students[3])["position"], 1)
+        self.assertEqual(available.objects.get(pk=self.slot.pk).seats_left, 0)
+        self.assertEqual(self.client.get("/api/waitlist", **auth_header(self.students[3])).json(),
+                         [{"course_id": "C1", "course_name": "course", "position": 1}])
+
+    def test_capacity_increase_promotes(self):
+        for student in self.students:
+            self.queue(student)
+        admission.queue.drain()
+        response = self.client.patch("/api/course/C1", {"year": 2024, "semester": "Fall", "capacity": 3,
+                                                        "registrationDeadline": str(self.slot.registration_deadline)},
+                                     content_type="application/json", **auth_header(self.teacher))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(enrollment.objects.filter(student=self.students[2]).exists())
+        self.assertEqual(list(waitlist.objects.values_list("student_id", flat=True)), ["s003"])
+
+    def test_ticket_shared_between_workers(self):
+        ticket = self.queue(self.students[0]).json()["ticket"]
+        # 另一个 gunicorn worker 有自己的 AdmissionQueue，排队号只经过数据库传过来
+        other_worker = admission.AdmissionQueue()
+        self.assertEqual(other_worker.describe(other_worker.get(ticket))["position"], 1)
+        self.assertEqual(other_worker.drain(), 1)
+        self.assertEqual(admission.queue.drain(), 0)
+        self.assertEqual(self.status(ticket, self.students[0])["status"], "enrolled")
+
+    def test_deadline_checked_when_granting(self):
+        ticket = self.queue(self.students[0]).json()["ticket"]
+        available.objects.filter(pk=self.slot.pk).update(registration_deadline=timezone.now().date() - timedelta(days=1))
+        admission.queue.drain()
+        self.assertEqual(self.status(ticket, self.students[0]),
+                         {"ticket": ticket, "course_id": "C1", "status": "rejected", "position": None,
+                          "message": "Registration deadline has passed"})
+        self.assertFalse(enrollment.objects.exists())
+        self.assertFalse(waitlist.objects.exists())
+        self.assertEqual(available.objects.get(pk=self.slot.pk).seats_left, 2)
+
+    def test_database_error_keeps_tickets_pending(self):
+        ticket = self.queue(self.students[0]).json()["ticket"]
+        with mock.patch.object(admission, "admit", side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                admission.queue.drain()
+        self.assertEqual(self.status(ticket, self.students[0])["status"], "pending")
+        # 下一次重试时正常处理
+        self.assertEqual(admission.queue.drain(), 1)
+        self.assertEqual(self.status(ticket, self.students[0])["status"], "enrolled")
+
+    def test_removed_slot_rejected(self):
+        ticket = self.queue(self.students[0]).json()["ticket"]
+        course.objects.filter(pk="C1").update(available=None)
+        self.assertEqual(admission.queue.drain(), 1)
+        self.assertEqual(self.status(ticket, self.students[0])["message"],
+                         "Course, student, or available course not found")
+
+    def test_without_deadline(self):
+        available.objects.filter(pk=self.slot.pk).update(registration_deadline=None)
+        ticket = self.queue(self.students[0]).json()["ticket"]
+        admission.queue.drain()
+        self.assertEqual(self.status(ticket, self.students[0])["status"], "enrolled")
+        enrolled = enrollment.objects.get(student=self.students[0])
+        response = self.client.delete(f"/api/enroll/{enrolled.pk}", **auth_header(self.students[0]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_ticket(self):
+        self.assertEqual(self.client.get("/api/enroll/queue/missing", **auth_header(self.students[0])).status_code,
+                         404)
+
+
+class AdmissionWorkerTests(TransactionTestCase):
+    """后台线程处理并发提交的请求，先到的请求先分到名额"""
+
+    STUDENTS = 1000
+    CAPACITY = 100
+
+    def setUp(self):
+        cache.clear()
+        teacher = newuser.objects.create(student_id="t001", username="teacher", is_teacher=True)
+        self.students = newuser.objects.bulk_create([
+            newuser(student_id=f"s{i:04d}", username=f"student{i}") for i in range(self.STUDENTS)
+        ])
+        slot = available.objects.create(year=2024, semester="Fall", capacity=self.CAPACITY, seats_left=self.CAPACITY,
+                                        registration_deadline=timezone.now().date() + timedelta(days=7))
+        course.objects.create(course_id="C1", course_name="popular", teacher=teacher, available=slot)
+
+    def queue(self, student):
+        try:
+            return Client().post("/api/enroll/queue", {"course_id": "C1", "student_id": student.student_id,
+                                                       "semester": "Fall"},
+                                 content_type="application/json", **auth_header(student)).json()
+        finally:
+            connection.close()
+
+    def test_stampede(self):
+        with ThreadPoolExecutor(32) as executor:
+            responses = list(executor.map(self.queue, self.students))
+        self.assertTrue(all(r["status"] in ("pending", "enrolled", "waitlisted") for r in responses))
+        deadline = time.monotonic() + 60
+        while admission_ticket.objects.filter(status=admission.PENDING).exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        tickets = list(admission_ticket.objects.order_by("id"))
+        self.assertEqual(sorted(t.ticket for t in tickets), sorted(r["ticket"] for r in responses))
+        self.assertEqual([t.status for t in tickets],
+                         ["enrolled"] * self.CAPACITY + ["waitlisted"] * (self.STUDENTS - self.CAPACITY))
+        self.assertEqual(enrollment.objects.count(), self.CAPACITY)
+        self.assertEqual(list(waitlist.objects.order_by("id").values_list("student_id", flat=True)),
+                         [t.student_id for t in tickets[self.CAPACITY:]])
+
+
+class BulkImportTests(TestCase):
+    """POST /api/enroll/bulk 和 /api/grade/bulk：集合查询检查、分批写入、逐行返回结果"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = newuser.objects.create(student_id="a001", username="admin", is_staff=True)
+        cls.teacher = newuser.objects.create(student_id="t001", username="teacher", is_teacher=True)
+        cls.other = newuser.objects.create(student_id="t002", username="other", is_teacher=True)
+        cls.students = newuser.objects.bulk_create([
+            newuser(student_id=f"s{i:04d}", username=f"student{i}") for i in range(30)
+        ])
+        deadline = timezone.now().date() + timedelta(days=7)
+        big = available.objects.create(year=2024, semester="Fall", capacity=100, seats_left=100,
+                                       registration_deadline=deadline)
+        small = available.objects.create(year=2024, semester="Fall", capacity=2, seats_left=2,
+                                         registration_deadline=deadline)
+        closed = available.objects.create(year=2024, semester="Fall", capacity=10, seats_left=10,
+                                          registration_deadline=timezone.now().date() - timedelta(days=1))
+        course.objects.create(course_id="C1", course_name="big", teacher=cls.teacher, available=big)
+        course.objects.create(course_id="C2", course_name="small", teacher=cls.teacher, available=small)
+        course.objects.create(course_id="C3", course_name="closed", teacher=cls.teacher, available=closed)
+        course.objects.create(course_id="C4", course_name="other", teacher=cls.other, available=big)
+
+    def post(self, path, user, data, csv_text=None):
+        if csv_text is not None:
+            return self.client.post(path, csv_text, content_type="text/csv", **auth_header(user))
+        return self.client.post(path, data, content_type="application/json", **auth_header(user))
+
+    def test_bulk_enrollment(self):
+        rows = [{"course_id": "C1", "student_id": s.student_id} for s in self.students[:20]]
+        rows += [
+            {"course_id": "C1", "student_id": "s0000"},     # 重复
+            {"course_id": "C2", "student_id": "s0000"},
+            {"course_id": "C2", "student_id": "s0001"},
+            {"course_id": "C2", "student_id": "s0002"},     # 名额已满
+            {"course_id": "C3", "student_id": "s0000"},     # 截止日期已过
+            {"course_id": "C9", "student_id": "s0000"},     # 课程不存在
+            {"course_id": "C1"},
+        ]
+        # 认证、三次集合查询，一个事务（测试中为 SAVEPOINT 和 RELEASE）里每门课读取并扣减名额、一次插入，
+        # 最后更新目录版本号
+        with self.assertNumQueries(1 + 3 + 2 + 2 * 2 + 1 + 1):
+            response = self.post("/api/enroll/bulk", self.admin, rows)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (22, 5))
+        self.assertEqual([(r["row"], r["message"]) for r in body["results"] if r["status"] == "error"], [
+            (21, "Enrollment already exists"),
+            (24, "Course capacity reached"),
+            (25, "Registration deadline has passed"),
+            (26, "Course, student, or available course not found"),
+            (27, "course_id and student_id are required"),
+        ])
+        self.assertEqual(enrollment.objects.count(), 22)
+        self.assertEqual(available.objects.get(course__course_id="C2").seats_left, 0)
+
+    def test_teacher_limited_to_own_courses(self):
+        response = self.post("/api/enroll/bulk", self.teacher, None,
+                             "course_id,student_id\nC1,s0000\nC4,s0001\n")
+        self.assertEqual([r["status"] for r in response.json()["results"]], ["created", "error"])
+        self.assertEqual(self.post("/api/enroll/bulk", self.students[0], []).status_code, 403)
+
+    def test_bulk_grades(self):
+        self.post("/api/enroll/bulk", self.admin,
+                  [{"course_id": "C1", "student_id": s.student_id} for s in self.students[:10]])
+        existing = enrollment.objects.get(course_id="C1", student_id="s0009")
+        grade.objects.create(enroll=existing, score=60)
+        lines = ["student_id,course_id,score"] + [f"s{i:04d},C1,{80 + i}" for i in range(10)]
+        lines += ["s0000,C1,99", "s0020,C1,70", "s0001,C1,abc", "s0001,C4,70"]
+        # 认证、两次集合查询，一个事务里一次插入
+        with self.assertNumQueries(1 + 2 + 2 + 1):
+            response = self.post("/api/grade/bulk", self.teacher, None, "\n".join(lines))
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (9, 5))
+        self.assertEqual([(r["row"], r["message"]) for r in body["results"] if r["status"] == "error"], [
+            (10, "Grade already exists"),
+            (11, "Duplicate row"),
+            (12, "Enrollment not found"),
+            (13, "Invalid score"),
+            (14, "Forbidden"),
+        ])
+        self.assertEqual(grade.objects.get(enroll__student_id="s0003").score, 83)
+
+    def test_batches(self):
+        rows = [{"course_id": "C1", "student_id": s.student_id} for s in self.students]
+        original = bulk.BATCH_SIZE
+        bulk.BATCH_SIZE = 7
+        try:
+            body = self.post("/api/enroll/bulk", self.admin, rows).json()
+        finally:
+            bulk.BATCH_SIZE = original
+        self.assertEqual(body["created"], 30)
+        self.assertEqual(available.objects.get(course__course_id="C1").seats_left, 70)
+
+    def test_invalid_body(self):
+        self.assertEqual(self.post("/api/grade/bulk", self.teacher, {"course_id": "C1"}).status_code, 400)
+        response = self.post("/api/grade/bulk", self.teacher, None, "course_id,student_id\nC1,s0000\n")
+        self.assertEqual(response.json(), {"message": "Missing columns: score"})
@@ -0,0 +1,88 @@
+# 比较逐行接口（POST /api/enroll、POST /api/grade）和批量接口（/api/enroll/bulk、/api/grade/bulk）的吞吐量
+#
+# 在 final 目录下运行：python benchmarks/bulk_import.py [行数]
+# 使用与测试相同的临时数据库（settings 中 DATABASES 的 TEST 设置），不会修改 last.db。
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'final.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from back.models import available, course, enrollment, grade, newuser  # noqa: E402
+from back.tests import auth_header  # noqa: E402
+
+
+def reset(slot, rows):
+    grade.objects.all().delete()
+    enrollment.objects.all().delete()
+    available.objects.filter(pk=slot.pk).update(capacity=rows, seats_left=rows)
+
+
+def timed(label, rows, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{rows:>7} 行 {elapsed:>8.2f} 秒 {rows / elapsed:>10.0f} 行/秒")
+    return elapsed
+
+
+def main(rows):
+    teacher = newuser.objects.create(student_id="t001", username="teacher", is_teacher=True, is_staff=True)
+    students = newuser.objects.bulk_create([
+        newuser(student_id=f"s{i:06d}", username=f"student{i}") for i in range(rows)
+    ])
+    slot = available.objects.create(year=2024, semester="Fall", capacity=rows, seats_left=rows,
+                                    registration_deadline=timezone.now().date() + timedelta(days=7))
+    course.objects.create(course_id="C1", course_name="bench", teacher=teacher, available=slot)
+    client = Client()
+    teacher_auth = auth_header(teacher)
+    student_auth = [auth_header(student) for student in students]
+    enroll_rows = [{"course_id": "C1", "student_id": student.student_id, "semester": "Fall"} for student in students]
+    grade_rows = [{"course_id": "C1", "student_id": student.student_id, "score": 60 + i % 40}
+                  for i, student in enumerate(students)]
+
+    def single_enroll():
+        for row, auth in zip(enroll_rows, student_auth):
+            assert client.post("/api/enroll", row, content_type="application/json", **auth).status_code == 201
+
+    def single_grade():
+        for row in grade_rows:
+            assert client.post("/api/grade", row, content_type="application/json", **teacher_auth).status_code == 201
+
+    def bulk_enroll():
+        body = client.post("/api/enroll/bulk", enroll_rows, content_type="application/json", **teacher_auth).json()
+        assert body["created"] == rows, body["failed"]
+
+    def bulk_grade():
+        csv_text = "course_id,student_id,score\n" + "\n".join(
+            f"{row['course_id']},{row['student_id']},{row['score']}" for row in grade_rows)
+        body = client.post("/api/grade/bulk", csv_text, content_type="text/csv", **teacher_auth).json()
+        assert body["created"] == rows, body["failed"]
+
+    single = timed("POST /api/enroll", rows, single_enroll)
+    single += timed("POST /api/grade", rows, single_grade)
+    reset(slot, rows)
+    batched = timed("POST /api/enroll/bulk (JSON)", rows, bulk_enroll)
+    batched += timed("POST /api/grade/bulk (CSV)", rows, bulk_grade)
+    print(f"批量接口快 {single / batched:.0f} 倍")
+
+
+if __name__ == '__main__':
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -67,13 +67,16 @@ CORS_ORIGIN_WHITELIST = [
     'http://192.168.8.115:3000',
 ]
 CORS_ALLOW_METHODS =( 'DELETE', 'GET', 'OPTIONS', 'PATCH', 'POST', 'PUT', 'VIEW')
-CORS_ALLOW_HEADERS = ('XMLHttpRequest', 'X_FILENAME', 'accept-encoding', 'authorization', 'content-type', 'dnt', 'origin', 'user-agent', 'x-csrftoken', 'x-requested-with')
+CORS_ALLOW_HEADERS = ('XMLHttpRequest', 'X_FILENAME', 'accept-encoding', 'authorization', 'content-type', 'dnt', 'origin', 'user-agent', 'x-csrftoken', 'x-requested-with', 'if-none-match')
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
 ]
 
-CORS_EXPOSE_HEADERS = ['Authorization']
+CORS_EXPOSE_HEADERS = ['Authorization', 'ETag', 'X-Next-Cursor']
+
+# 课程目录每一页的缓存时间（秒），数据变化时会提前失效
+COURSE_CATALOG_CACHE_TIMEOUT = 300
 
 
 ROOT_URLCONF = 'final.urls'
@@ -117,6 +120,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'last.db',
+        # 事务开始时就取得写锁，并发的写事务排队等待（最多 timeout 秒），不会在升级锁时失败
+        # transaction_mode 需要 Django 5.1 以上（见 requirements.txt）
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # 测试数据库使用文件，多线程的测试才能并发写入（内存数据库的共享缓存只有表锁，不会等待）
+        'TEST': {
+            'NAME': BASE_DIR / 'test_last.db',
+        },
     }
 }
 
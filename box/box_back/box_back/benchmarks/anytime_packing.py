@@ -0,0 +1,33 @@
+"""
+时间预算基准：预算越长，装填率越高
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.anytime_packing
+对 algorithm_bench 的合成语料分别给 0（只装一次）、0.5、2、5 秒的预算，
+输出实际耗时、完成的迭代次数、其中带来改进的次数和装填率。
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'box_back.settings')
+django.setup()
+
+from box_back.app.algorithm_bench import synthetic_cases  # noqa: E402
+from box_back.app.packing_algorithm import pack_anytime  # noqa: E402
+
+BUDGETS = (0, 0.5, 2, 5)
+
+
+def main():
+    print(f"{'case':>12} {'items':>6} {'budget s':>8} {'time s':>7} {'iters':>6} {'better':>6} {'fill':>6}")
+    for case in synthetic_cases():
+        space = {'x': case.space[0], 'y': case.space[1], 'z': case.space[2]}
+        for budget in BUDGETS:
+            _, stats = pack_anytime(case.items, space, time_budget=budget)
+            print(f"{case.name:>12} {len(case.items):>6} {budget:>8} {stats['elapsed']:>7.2f} "
+                  f"{stats['iterations']:>6} {stats['improvements']:>6} {stats['fill_ratio']:>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
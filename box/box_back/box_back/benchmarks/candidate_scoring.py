@@ -0,0 +1,50 @@
+"""
+候选打分基准：空闲空间表大小不同时，纯 Python 与 NumPy 路径一次 FreeSpaces.best 的耗时
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.candidate_scoring
+先用 place_items 的引擎摆好不同数量的箱子，再把同一张空间表分别交给两条路径，
+对随机尺寸的物品（6 种方向）打分，输出单次打分的耗时。NUMPY_MIN_SPACES 按两者的交叉点选取。
+"""
+import random
+import time
+
+from box_back.app.candidate_scoring import FreeSpaces
+from box_back.app.packing_algorithm import _Packer, orientations
+
+SPACE = (60.0, 40.0, 60.0)
+PLACED = (5, 10, 20, 40, 100, 300, 1000, 3000)
+ROUNDS = 200
+
+
+def build_packer(count, seed=0):
+    rng = random.Random(seed)
+    packer = _Packer(SPACE)
+    dims = [(float(rng.randint(1, 5)), float(rng.randint(1, 5)), float(rng.randint(1, 5))) for _ in range(count)]
+    dims.sort(key=lambda d: -(d[0] * d[1] * d[2]))
+    for item in dims:
+        packer.place(orientations(item, False), (1.0, 1.0, 1.0), False)
+    return packer
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'placed':>6} {'free spaces':>11} {'python us':>10} {'numpy us':>9}")
+    for count in PLACED:
+        packer = build_packer(count)
+        rows = [row for row in packer.spaces.rows if row is not None]
+        shapes = [orientations((float(rng.randint(1, 5)), float(rng.randint(1, 5)), float(rng.randint(1, 5))), False)
+                  for _ in range(ROUNDS)]
+        timings = []
+        for use_numpy in (False, True):
+            spaces = FreeSpaces(SPACE, use_numpy)
+            spaces.add(rows)
+            start = time.perf_counter()
+            for shape in shapes:
+                spaces.best(shape)
+            timings.append((time.perf_counter() - start) / ROUNDS * 1e6)
+        print(f"{count:>6} {len(rows):>11} {timings[0]:>10.0f} {timings[1]:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+需要数据库的基准共用的测试数据库
+
+    with test_database():
+        ...
+使用 Django 测试数据库，不会改动 db.sqlite3；SQLite 时放在临时文件里，提交和读盘的开销才能体现出来。
+"""
+import contextlib
+import os
+import tempfile
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'box_back.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+
+@contextlib.contextmanager
+def test_database():
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,79 @@
+"""
+物品写入基准：逐行 Item.objects.create 与批量 bulk_create 对比
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.item_insert
+使用 benchmarks/db.py 的临时测试数据库，不会改动 db.sqlite3。
+分别写入 10 / 1000 / 10000 个物品，输出耗时和 SQL 语句数量。
+SQLite 单条语句的参数个数有上限，Django 会把过大的批次再拆小，实际每批行数可能小于 ITEM_BATCH_SIZE。
+"""
+import time
+
+from django.db import connection
+
+from benchmarks.db import test_database  # 导入时完成 django.setup()
+from box_back.app.jobs import save_items
+from box_back.app.models import Item, Task, User
+
+SIZES = (10, 1000, 10000)
+
+
+def placed_items(count):
+    return [{
+        'order_id': i + 1,
+        'name': f'item{i}',
+        'position': {'x': i % 10, 'y': i // 100, 'z': i // 10 % 10},
+        'dimensions': {'x': 1.0, 'y': 1.0, 'z': 1.0},
+        'face_up': False,
+        'fragile': i % 7 == 0,
+    } for i in range(count)]
+
+
+def save_one_by_one(task, items):
+    """改造前的写法：每个物品一条 INSERT，没有外层事务"""
+    for item_data in items:
+        Item.objects.create(
+            task=task,
+            order_id=item_data['order_id'],
+            name=item_data['name'],
+            position_x=item_data['position']['x'],
+            position_y=item_data['position']['y'],
+            position_z=item_data['position']['z'],
+            width=item_data['dimensions']['x'],
+            height=item_data['dimensions']['y'],
+            depth=item_data['dimensions']['z'],
+            face_up=item_data.get('face_up', False),
+            fragile=item_data.get('fragile', False)
+        )
+
+
+def measure(save, creator, items):
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        task = Task.objects.create(creator=creator, space_x=10, space_y=10, space_z=10)
+        save(task, items)
+        elapsed = time.perf_counter() - start
+    assert task.items.count() == len(items)
+    return elapsed, queries
+
+
+def main():
+    with test_database():
+        creator = User.objects.create(name='benchmark')
+        print(f"{'items':>6} {'before s':>9} {'queries':>8} {'after s':>8} {'queries':>8}")
+        for size in SIZES:
+            items = placed_items(size)
+            before = measure(save_one_by_one, creator, items)
+            after = measure(save_items, creator, items)
+            print(f"{size:>6} {before[0]:>9.3f} {before[1]:>8} {after[0]:>8.3f} {after[1]:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+二进制布局格式基准：与 get_task 的 JSON 对比大小、编码和解码耗时
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.layout_format
+JSON 一侧为 encoders.encode_task 的物品结构经 DRF JSONRenderer 渲染、json.loads 解析；
+布局一侧为 layout_format.encode_layout / decode_layout。物品数据直接在内存里生成，不需要数据库。
+"""
+import json
+import os
+import random
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'box_back.settings')
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from box_back.app.encoders import encode_item  # noqa: E402
+from box_back.app.layout_format import decode_layout, encode_layout  # noqa: E402
+
+SIZES = (100, 1000, 10000, 100000)
+ROUNDS = 5
+NAMES = ('carton', 'pallet box', 'crate', '纸箱', 'tote')
+
+
+def rows(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (i + 1, rng.choice(NAMES),
+         rng.uniform(0, 100), rng.uniform(0, 100), rng.uniform(0, 100),
+         rng.uniform(1, 10), rng.uniform(1, 10), rng.uniform(1, 10),
+         rng.random() < 0.2, rng.random() < 0.1)
+        for i in range(count)
+    ]
+
+
+def best_of(func):
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    renderer = JSONRenderer()
+    print(f"{'items':>7} {'json KB':>9} {'layout KB':>10} {'ratio':>6} "
+          f"{'json enc ms':>12} {'layout enc ms':>14} {'json dec ms':>12} {'layout dec ms':>14}")
+    for size in SIZES:
+        data = rows(size)
+        space = (100.0, 100.0, 100.0)
+        json_enc, json_bytes = best_of(lambda: renderer.render({
+            'id': 1, 'space_info': {'x': 100.0, 'y': 100.0, 'z': 100.0},
+            'items': [encode_item(row) for row in data]}))
+        layout_enc, layout_bytes = best_of(lambda: encode_layout(1, space, data))
+        json_dec, _ = best_of(lambda: json.loads(json_bytes))
+        layout_dec, decoded = best_of(lambda: decode_layout(layout_bytes))
+        assert len(decoded['items']) == size
+        print(f"{size:>7} {len(json_bytes) / 1024:>9.1f} {len(layout_bytes) / 1024:>10.1f} "
+              f"{len(json_bytes) / len(layout_bytes):>6.1f} {json_enc * 1e3:>12.1f} {layout_enc * 1e3:>14.1f} "
+              f"{json_dec * 1e3:>12.1f} {layout_dec * 1e3:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
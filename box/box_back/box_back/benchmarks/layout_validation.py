@@ -0,0 +1,58 @@
+"""
+布局检查基准：layout_check.validate 在大布局上的耗时
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.layout_validation
+生成 1 万到 5 万个物品的合法布局（50 x 50 根柱子，每层高度随机，柱顶偶尔是易碎品），
+用 NumPy 路径计时；纯 Python 路径只在 2000 个物品上计时，并确认两条路径结果相同。
+"""
+import random
+import time
+
+from box_back.app import layout_check
+
+SIZES = (10000, 25000, 50000)
+PYTHON_SIZE = 2000
+
+
+def layout(count, seed=0):
+    """底面 1 x 1 的物品排成 50 x 50 的柱子，每根柱子最多 20 层，柱顶偶尔是易碎品"""
+    rng = random.Random(seed)
+    boxes = []
+    fragile = []
+    columns = [(x, z) for x in range(50) for z in range(50)]
+    per_column = -(-count // len(columns))
+    for x, z in columns:
+        y = 0.0
+        for level in range(per_column):
+            if len(boxes) == count:
+                break
+            height = rng.choice((0.5, 1.0, 1.5))
+            boxes.append(((float(x), y, float(z)), (1.0, height, 1.0)))
+            fragile.append(level == per_column - 1 and rng.random() < 0.2)
+            y += height
+    return boxes, fragile
+
+
+def main():
+    space = (50, 40, 50)
+    print(f"{'items':>6} {'numpy ms':>9} {'violations':>10}")
+    for size in SIZES:
+        boxes, fragile = layout(size)
+        start = time.perf_counter()
+        result = layout_check.validate(boxes, space, fragile)
+        elapsed = time.perf_counter() - start
+        violations = result['overlaps'] + result['out_of_bounds'] + result['unsupported'] + result['fragile_loaded']
+        print(f"{size:>6} {elapsed * 1000:>9.1f} {violations:>10}")
+
+    boxes, fragile = layout(PYTHON_SIZE)
+    start = time.perf_counter()
+    python = layout_check.validate(boxes, space, fragile, use_numpy=False)
+    elapsed = time.perf_counter() - start
+    numpy = layout_check.validate(boxes, space, fragile, use_numpy=True)
+    assert python['details'] == numpy['details'], "numpy and python paths disagree"
+    print(f"python path, {PYTHON_SIZE} items: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+摆放方向搜索基准：允许的方向越多，装填率越高，耗时也越长
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.orientation_search
+同一批物品分别按三种方式装箱，输出耗时、装入数量和装填率：
+    fixed     只用输入方向（place_items(..., rotate=False)）
+    vertical  全部标记 face_up，只绕竖直轴旋转，最多 2 种方向
+    all       普通物品，最多 6 种方向
+容器尺寸按物品总体积约为容器的 1.1 倍选取，装填率才能反映方向搜索的效果；物品数量都是完整的。
+"""
+import random
+import time
+
+from box_back.app.packing_algorithm import place_items
+
+CASES = (
+    # (物品数量, 容器尺寸, 物品边长范围, 易碎品比例)
+    (1000, (34, 34, 34), (1, 6), 0.0),
+    (1000, (34, 34, 34), (1, 6), 0.1),
+    (5000, (70, 40, 70), (1, 6), 0.0),
+    (5000, (120, 40, 120), (2, 8), 0.05),
+)
+MODES = ('fixed', 'vertical', 'all')
+
+
+def random_items(count, sides, fragile_ratio, seed=0):
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        items.append({
+            'name': f'item{i}',
+            'dimensions': {'x': rng.randint(*sides), 'y': rng.randint(*sides), 'z': rng.randint(*sides)},
+            'face_up': False,
+            'fragile': rng.random() < fragile_ratio,
+        })
+    return items
+
+
+def run(items, space, mode):
+    if mode == 'vertical':
+        items = [dict(item, face_up=True) for item in items]
+    start = time.perf_counter()
+    placed = place_items(items, {'x': space[0], 'y': space[1], 'z': space[2]}, rotate=mode != 'fixed')
+    elapsed = time.perf_counter() - start
+    volume = sum(p['dimensions']['x'] * p['dimensions']['y'] * p['dimensions']['z'] for p in placed)
+    return elapsed, len(placed), volume / (space[0] * space[1] * space[2])
+
+
+def main():
+    print(f"{'items':>6} {'space':>14} {'fragile':>7} {'mode':>9} {'time s':>7} {'placed':>7} {'fill':>6}")
+    for count, space, sides, fragile_ratio in CASES:
+        items = random_items(count, sides, fragile_ratio)
+        for mode in MODES:
+            elapsed, placed, fill = run(items, space, mode)
+            print(f"{len(items):>6} {str(space):>14} {fragile_ratio:>7} {mode:>9} {elapsed:>7.2f} {placed:>7} {fill:>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+多起点并行装箱基准：进程数与耗时、装填率的关系
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.parallel_packing [最大进程数]
+同一批物品用 16 个种子（每个 4 次迭代）运行多起点装箱。先在当前进程里依次运行（sequential），
+再用 1、2、4、8、16 个进程（不超过给定的最大值，默认 CPU 核数）运行 pack_multistart，
+输出耗时、相对依次运行的加速比和装填率。进程池在计时前预热。
+single 一列是单个种子的平均装填率，fill 是多起点取最好后的装填率；
+各进程数的结果应当与依次运行完全相同，最后一列检查这一点。
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.orientation_search import random_items
+from box_back.app.packing_algorithm import best_of, pack_anytime, pack_multistart
+
+CASES = (
+    # (物品数量, 容器尺寸, 物品边长范围, 易碎品比例)
+    (400, (24, 20, 24), (2, 6), 0.0),
+    (1000, (24, 24, 24), (1, 6), 0.1),
+)
+SEEDS = list(range(16))
+ITERATIONS = 4
+WORKER_COUNTS = (1, 2, 4, 8, 16)
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    context = multiprocessing.get_context('spawn')
+    print(f"cpu count {os.cpu_count()}, seeds {len(SEEDS)}, iterations per seed {ITERATIONS}")
+    print(f"{'items':>6} {'workers':>10} {'time s':>7} {'speedup':>7} {'single':>6} {'fill':>6} {'same':>5}")
+    for count, space, sides, fragile_ratio in CASES:
+        items = random_items(count, sides, fragile_ratio)
+        space_data = {'x': space[0], 'y': space[1], 'z': space[2]}
+
+        start = time.perf_counter()
+        results = [pack_anytime(items, space_data, iterations=ITERATIONS, seed=seed) for seed in SEEDS]
+        baseline = time.perf_counter() - start
+        reference, stats = best_of(results)
+        single = sum(result[1]['fill_ratio'] for result in results) / len(results)
+        print(f"{len(items):>6} {'sequential':>10} {baseline:>7.2f} {1:>7.2f} {single:>6.3f} {stats['fill_ratio']:>6.3f}")
+
+        for workers in WORKER_COUNTS:
+            if workers > max_workers:
+                break
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                list(executor.map(abs, range(workers)))
+                start = time.perf_counter()
+                placed, stats = pack_multistart(items, space_data, SEEDS, iterations=ITERATIONS, executor=executor)
+                elapsed = time.perf_counter() - start
+            print(f"{len(items):>6} {workers:>10} {elapsed:>7.2f} {baseline / elapsed:>7.2f} {single:>6.3f} "
+                  f"{stats['fill_ratio']:>6.3f} {str(placed == reference):>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+装箱引擎基准：5000 个物品的完整清单，目标是一次 place_items 在 1 秒内完成
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.place_items
+物品边长在 1~10 之间随机，总体积约 82 万；同一份清单分别装进几种尺寸的容器，
+输出耗时、装入数量和装填率。容器越大装入的物品越多，耗时也越长。
+第一行是一个 1000 万次空循环的耗时，用来换算到其他机器：普通开发机上约为 0.15~0.2 秒。
+"""
+import random
+import time
+
+from box_back.app.packing_algorithm import place_items
+
+COUNT = 5000
+SIDES = (1, 10)
+SPACES = ((50, 40, 50), (60, 60, 60), (80, 60, 80), (120, 40, 120), (240, 30, 100))
+
+
+def manifest(count, sides, seed=0):
+    rng = random.Random(seed)
+    return [{'name': f'item{i}', 'dimensions': {axis: rng.randint(*sides) for axis in 'xyz'},
+             'face_up': False, 'fragile': False} for i in range(count)]
+
+
+def loop_baseline():
+    start = time.perf_counter()
+    for _ in range(10_000_000):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"10M loop baseline: {loop_baseline():.2f} s")
+    items = manifest(COUNT, SIDES)
+    print(f"{'items':>6} {'space':>15} {'time s':>7} {'placed':>7} {'fill':>6}")
+    for space in SPACES:
+        start = time.perf_counter()
+        placed = place_items(items, {'x': space[0], 'y': space[1], 'z': space[2]})
+        elapsed = time.perf_counter() - start
+        volume = sum(p['dimensions']['x'] * p['dimensions']['y'] * p['dimensions']['z'] for p in placed)
+        print(f"{len(items):>6} {str(space):>15} {elapsed:>7.2f} {len(placed):>7} "
+              f"{volume / (space[0] * space[1] * space[2]):>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
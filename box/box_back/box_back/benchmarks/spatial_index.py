@@ -0,0 +1,75 @@
+"""
+空间索引微基准：GridIndex 与逐个遍历的线性扫描对比
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.spatial_index
+箱子数量翻倍时，线性扫描的单次查询耗时随之翻倍，网格索引基本保持不变。
+"""
+import random
+import time
+
+from box_back.app.spatial_index import EPS, GridIndex, overlaps
+
+SIZES = (1000, 2000, 5000, 10000, 20000)
+QUERIES = 2000
+
+
+def random_boxes(count, seed=0):
+    rng = random.Random(seed)
+    # 保持箱子密度不变，空间随数量放大
+    side = (count * 27 / 0.5) ** (1 / 3)
+    space = (side, side, side)
+    boxes = []
+    for _ in range(count):
+        w, h, d = rng.uniform(1, 5), rng.uniform(1, 5), rng.uniform(1, 5)
+        x, y, z = rng.uniform(0, side - w), rng.uniform(0, side - h), rng.uniform(0, side - d)
+        boxes.append((x, y, z, x + w, y + h, z + d))
+    return space, boxes
+
+
+def linear_overlapping(boxes, box):
+    return [index for index, other in enumerate(boxes) if overlaps(other, box)]
+
+
+def linear_top_surface(boxes, x0, z0, x1, z1, height):
+    best = 0.0
+    for other in boxes:
+        if (best < other[4] <= height + EPS and
+                other[0] < x1 - EPS and x0 < other[3] - EPS and
+                other[2] < z1 - EPS and z0 < other[5] - EPS):
+            best = other[4]
+    return best
+
+
+def timed(function, queries):
+    start = time.perf_counter()
+    results = [function(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+
+def main():
+    print(f"{'boxes':>7} {'insert ms':>10} {'overlap us':>11} {'linear us':>10} "
+          f"{'top us':>8} {'linear us':>10}")
+    for count in SIZES:
+        space, boxes = random_boxes(count)
+        start = time.perf_counter()
+        index = GridIndex.for_count(space, count)
+        for box in boxes:
+            index.insert(box)
+        insert_ms = (time.perf_counter() - start) * 1e3
+
+        probes = random_boxes(count, seed=1)[1][:QUERIES]
+        footprints = [(p[0], p[2], p[3], p[5], p[4]) for p in probes]
+
+        grid_overlap, grid_hits = timed(lambda box: sorted(index.overlapping(box)), probes)
+        scan_overlap, scan_hits = timed(lambda box: linear_overlapping(boxes, box), probes)
+        grid_top, grid_tops = timed(lambda f: index.top_surface(*f), footprints)
+        scan_top, scan_tops = timed(lambda f: linear_top_surface(boxes, *f), footprints)
+        assert grid_hits == scan_hits and grid_tops == scan_tops
+
+        print(f"{count:>7} {insert_ms:>10.1f} {grid_overlap:>11.1f} {scan_overlap:>10.1f} "
+              f"{grid_top:>8.1f} {scan_top:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
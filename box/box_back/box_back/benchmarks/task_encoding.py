@@ -0,0 +1,74 @@
+"""
+任务编码基准：TaskSerializer 与 encoders.encode_task 对比
+
+在 manage.py 所在目录运行：
+    python -m benchmarks.task_encoding
+为不同物品数量的任务分别计时：编码成 Python 结构，以及渲染成 JSON 字节。
+两条路径渲染出的 JSON 必须逐字节相同。
+"""
+import time
+
+from benchmarks.db import test_database  # 导入时完成 django.setup()
+
+from rest_framework.renderers import JSONRenderer
+
+from box_back.app.encoders import encode_task
+from box_back.app.jobs import save_items
+from box_back.app.models import Task, User
+from box_back.app.serializers import TaskSerializer
+
+SIZES = (10, 1000, 10000)
+ROUNDS = 5
+
+
+def create_task(creator, count):
+    task = Task.objects.create(creator=creator, worker=creator, space_x=100, space_y=100, space_z=100)
+    save_items(task, [{
+        'order_id': i + 1,
+        'name': f'item{i}',
+        'position': {'x': i % 10 * 1.5, 'y': i // 100 * 0.5, 'z': i // 10 % 10 * 2.0},
+        'dimensions': {'x': 1.5, 'y': 0.5, 'z': 2.0},
+        'face_up': i % 3 == 0,
+        'fragile': i % 7 == 0,
+    } for i in range(count)])
+    return task.id
+
+
+def drf(task_id):
+    task = Task.objects.select_related('creator', 'worker').prefetch_related('items').get(id=task_id)
+    return TaskSerializer(task).data
+
+
+def fast(task_id):
+    task = Task.objects.select_related('creator', 'worker').get(id=task_id)
+    return encode_task(task)
+
+
+def best_of(func, *args):
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    renderer = JSONRenderer()
+    with test_database():
+        creator = User.objects.create(name='benchmark')
+        print(f"{'items':>6} {'drf ms':>8} {'fast ms':>8} {'drf+json ms':>12} {'fast+json ms':>13}")
+        for size in SIZES:
+            task_id = create_task(creator, size)
+            drf_time, drf_data = best_of(drf, task_id)
+            fast_time, fast_data = best_of(fast, task_id)
+            drf_json_time, drf_bytes = best_of(lambda: renderer.render(drf(task_id)))
+            fast_json_time, fast_bytes = best_of(lambda: renderer.render(fast(task_id)))
+            assert drf_bytes == fast_bytes, "encoder output differs from TaskSerializer"
+            print(f"{size:>6} {drf_time * 1e3:>8.1f} {fast_time * 1e3:>8.1f} "
+                  f"{drf_json_time * 1e3:>12.1f} {fast_json_time * 1e3:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# box_back/box_back/app/algorithm_bench.py
+"""
+算法基准：用固定的物品集合比较各个算法版本
+
+语料由几组合成的物品集合组成，随机种子固定，每次运行的输入完全相同：
+    uniform      边长均匀分布的中等物品
+    long_tail    大部分是小件，夹杂少数很大的物品
+    many_tiny    数千个小物品
+    constrained  带 face_up / fragile 限制的物品
+还可以加入最近的若干个已完成的任务（recorded），使用任务的空间和物品尺寸。
+合成物品的总体积约为空间的 1.1 倍，装填率才能拉开差距。
+
+每个版本对每组物品运行 repeats 次，取耗时的分位数；另外单独运行一次用 tracemalloc 记录内存峰值
+（tracemalloc 会拖慢运行，这一次不计入耗时）。结果再经过 layout_check 检查重叠和越界。
+上传的版本在单独的子进程里运行（见 algorithm_runtime），超时或超出内存时这组物品记为出错。
+排名：有违规的版本排在后面，其次装填率高的在前，再次总耗时短的在前。
+只有语料标识（corpus）相同的结果才放在一起比较。
+命令 benchmark_algorithms 在当前进程里运行（run）；API 把一次运行记为 BenchmarkRun，
+交给后台进程池（jobs.submit_benchmark），所有版本在同一个子进程里依次计时。
+"""
+import hashlib
+import math
+import random
+from collections import namedtuple
+
+from . import algorithms, layout_check
+from .models import AlgorithmBenchmark, Task
+
+# 合成语料的版本，修改 synthetic_cases 时需要加一，旧结果不再参与排名
+CORPUS_VERSION = 'synthetic-v1'
+
+Case = namedtuple('Case', 'name space items')
+
+
+def _fill_to(space, make_dims, rng, ratio=1.1):
+    """不断生成物品，直到总体积达到空间的 ratio 倍"""
+    limit = space[0] * space[1] * space[2] * ratio
+    dims_list = []
+    total = 0
+    while total < limit:
+        dims = make_dims(rng)
+        dims_list.append(dims)
+        total += dims[0] * dims[1] * dims[2]
+    return dims_list
+
+
+def _items(dims_list, rng, face_up_ratio=0.0, fragile_ratio=0.0):
+    return [{
+        'name': f'item{i}',
+        'dimensions': {'x': dims[0], 'y': dims[1], 'z': dims[2]},
+        'face_up': rng.random() < face_up_ratio,
+        'fragile': rng.random() < fragile_ratio,
+    } for i, dims in enumerate(dims_list)]
+
+
+def _long_tail(rng):
+    # 约 5% 的大件，其余是边长 1~3 的小件
+    if rng.random() < 0.05:
+        return (rng.randint(6, 12), rng.randint(6, 12), rng.randint(6, 12))
+    return (rng.randint(1, 3), rng.randint(1, 3), rng.randint(1, 3))
+
+
+def synthetic_cases():
+    rng = random.Random(20240601)
+    uniform_space = (24, 20, 24)
+    long_tail_space = (30, 24, 30)
+    tiny_space = (20, 16, 20)
+    constrained_space = (24, 20, 24)
+    return [
+        Case('uniform', uniform_space, _items(
+            _fill_to(uniform_space, lambda r: (r.randint(2, 6), r.randint(2, 6), r.randint(2, 6)), rng), rng)),
+        Case('long_tail', long_tail_space, _items(_fill_to(long_tail_space, _long_tail, rng), rng)),
+        Case('many_tiny', tiny_space, _items(
+            _fill_to(tiny_space, lambda r: (r.randint(1, 2), r.randint(1, 2), r.randint(1, 2)), rng), rng)),
+        Case('constrained', constrained_space, _items(
+            _fill_to(constrained_space, lambda r: (r.randint(2, 6), r.randint(2, 6), r.randint(2, 6)), rng),
+            rng, face_up_ratio=0.3, fragile_ratio=0.1)),
+    ]
+
+
+def recorded_cases(limit):
+    """最近 limit 个已完成任务的物品，按原始尺寸作为输入"""
+    cases = []
+    tasks = Task.objects.filter(status=Task.STATUS_DONE).order_by('-id')[:limit]
+    for task in tasks:
+        rows = task.items.order_by('order_id', 'id').values_list('name', 'width', 'height', 'depth', 'face_up', 'fragile')
+        items = [{
+            'name': name,
+            'dimensions': {'x': width, 'y': height, 'z': depth},
+            'face_up': face_up,
+            'fragile': fragile,
+        } for name, width, height, depth, face_up, fragile in rows]
+        if items:
+            cases.append(Case(f'task{task.id}', (task.space_x, task.space_y, task.space_z), items))
+    return cases
+
+
+def corpus(recorded=0):
+    """返回 (语料标识, 物品集合列表)"""
+    cases = synthetic_cases()
+    key = CORPUS_VERSION
+    if recorded:
+        extra = recorded_cases(recorded)
+        if extra:
+            names = ','.join(case.name for case in extra)
+            key += '+' + hashlib.sha256(names.encode()).hexdigest()[:12]
+            cases += extra
+    return key, cases
+
+
+def percentile(sorted_values, fraction):
+    # 最近秩法，样本很少时也有意义
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def measure(version, case, repeats):
+    """一个版本在一组物品上的结果；上传的版本在子进程里计时，不计入启动子进程的时间"""
+    space = {'x': case.space[0], 'y': case.space[1], 'z': case.space[2]}
+    try:
+        placed, times, peak = algorithms.measure(version, case.items, space, repeats, trace_memory=True)
+    except Exception as e:
+        return case_result(case, {'error': repr(e)})
+    return case_result(case, {'placed': placed, 'times': times, 'peak': peak})
+
+
+def case_result(case, outcome):
+    """algorithm_runtime.measure_all 的一项结果转换成一组物品的明细"""
+    if 'error' in outcome:
+        return {'case': case.name, 'items': len(case.items), 'error': outcome['error']}
+    placed = outcome['placed']
+    times = sorted(outcome['times'])
+    boxes = layout_check.boxes_of(placed)
+    volume = sum(dims[0] * dims[1] * dims[2] for _, dims in boxes)
+    return {
+        'case': case.name,
+        'items': len(case.items),
+        'placed': len(placed),
+        'fill_ratio': volume / (case.space[0] * case.space[1] * case.space[2]),
+        'p50_ms': percentile(times, 0.5) * 1000,
+        'p95_ms': percentile(times, 0.95) * 1000,
+        'max_ms': times[-1] * 1000,
+        'peak_memory_kb': outcome['peak'] / 1024,
+        'overlaps': layout_check.overlaps(boxes),
+        'out_of_bounds': layout_check.out_of_bounds(boxes, case.space),
+    }
+
+
+def summarize(version, corpus_key, repeats, details, run=None):
+    """
+    一个版本在各组物品上的明细汇总成一条（未保存的）AlgorithmBenchmark
+    出错的一组物品按一次违规计，装填率按 0 计
+    """
+    ok = [detail for detail in details if 'error' not in detail]
+    return AlgorithmBenchmark(
+        algorithm=version,
+        run=run,
+        corpus=corpus_key,
+        repeats=repeats,
+        fill_ratio=sum(detail['fill_ratio'] for detail in ok) / len(details) if details else 0,
+        p50_ms=sum(detail['p50_ms'] for detail in ok),
+        p95_ms=sum(detail['p95_ms'] for detail in ok),
+        peak_memory_kb=max((detail['peak_memory_kb'] for detail in ok), default=0),
+        violations=sum(detail['overlaps'] + detail['out_of_bounds'] for detail in ok) + len(details) - len(ok),
+        cases=details,
+    )
+
+
+def run(versions, corpus_key, cases, repeats=5, save=True):
+    """versions 中的 None 表示内置算法；在当前进程里依次运行，每个版本生成一条 AlgorithmBenchmark"""
+    results = []
+    for version in versions:
+        result = summarize(version, corpus_key, repeats, [measure(version, case, repeats) for case in cases])
+        if save:
+            result.save()
+        results.append(result)
+    return results
+
+
+def measurements(versions, cases):
+    """提交给 algorithm_runtime.measure_all 的参数，顺序为每个版本的每组物品"""
+    return [
+        (*algorithms.job_args(version), case.items, {'x': case.space[0], 'y': case.space[1], 'z': case.space[2]})
+        for version in versions for case in cases
+    ]
+
+
+def rank(results):
+    return sorted(results, key=lambda result: (result.violations > 0, -result.fill_ratio, result.p50_ms))
+
+
+def leaderboard(corpus_key=None):
+    """
+    每个版本在该语料上最近一次的结果，按排名顺序返回
+    corpus_key 为 None 时使用最近一次运行的语料
+    """
+    benchmarks = AlgorithmBenchmark.objects.select_related('algorithm').defer('algorithm__source').order_by('-id')
+    if corpus_key is None:
+        latest = benchmarks.first()
+        if latest is None:
+            return None, []
+        corpus_key = latest.corpus
+    latest_by_version = {}
+    for result in benchmarks.filter(corpus=corpus_key):
+        latest_by_version.setdefault(result.algorithm_id, result)
+    return corpus_key, rank(latest_by_version.values())
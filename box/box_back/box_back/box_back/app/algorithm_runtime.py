@@ -0,0 +1,260 @@
+# box_back/box_back/app/algorithm_runtime.py
+"""
+装箱算法的运行和校验，不依赖 Django
+
+内置算法直接在当前进程里运行。上传的算法版本不在 Web 进程和后台进程池里执行：
+每次运行都启动一个单独的 Python 子进程（run_isolated），子进程设置内存和 CPU 时间上限，
+父进程还有一个总超时，超时的子进程会被杀掉，出问题时调用方只会得到一个 AlgorithmError。
+
+这个文件同时是子进程执行的脚本：
+    python algorithm_runtime.py < {"mode": "check" | "run", "source": ..., "nonce": ..., "result_path": ..., ...}
+check 执行算法代码并用一组示例物品试运行；run 对给定的物品运行 repeats 次，返回摆放结果和每次的耗时。
+上传的代码可以随意向标准输出打印，所以结果不经过标准输出：子进程把结果写进父进程指定的临时文件，
+并带上父进程这次生成的随机 nonce；父进程只接受 nonce 相符、而且退出码为 0 的结果。
+"""
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+try:
+    import resource
+except ImportError:
+    # Windows 上没有 resource 模块，只能依靠父进程的超时
+    resource = None
+
+# 试运行用的示例：固定随机种子，保证每次校验条件相同
+SAMPLE_SPACE = {'x': 10, 'y': 10, 'z': 10}
+SAMPLE_SIZE = 20
+
+
+class AlgorithmError(Exception):
+    """上传的算法出错、超时、超出内存，或者子进程没有给出结果"""
+
+
+def run_isolated(request, timeout, memory_mb=None):
+    """在子进程里执行 request（格式见 main），返回子进程给出的 result"""
+    nonce = secrets.token_hex(16)
+    fd, result_path = tempfile.mkstemp(prefix='box-algorithm-', suffix='.json')
+    os.close(fd)
+    try:
+        payload = json.dumps(dict(request, nonce=nonce, result_path=result_path, memory_mb=memory_mb,
+                                  cpu_seconds=timeout))
+        try:
+            completed = subprocess.run([sys.executable, __file__], input=payload, capture_output=True, text=True,
+                                       timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise AlgorithmError(f"Algorithm timed out after {timeout} seconds")
+        if completed.returncode != 0:
+            raise AlgorithmError(
+                f"Algorithm process exited with code {completed.returncode} (time or memory limit exceeded?)")
+        with open(result_path, encoding='utf-8') as f:
+            content = f.read()
+    finally:
+        os.remove(result_path)
+    try:
+        outcome = json.loads(content)
+    except ValueError:
+        outcome = None
+    if not isinstance(outcome, dict) or outcome.get('nonce') != nonce:
+        raise AlgorithmError("Algorithm process exited without reporting a result")
+    if outcome.get('error') is not None:
+        raise AlgorithmError(outcome['error'])
+    return outcome.get('result')
+
+
+def _builtin():
+    from .packing_algorithm import place_items
+    return place_items
+
+
+def _copy_items(items):
+    # 算法可能修改输入，每次运行都用新的副本
+    return [dict(item, dimensions=dict(item['dimensions'])) for item in items]
+
+
+def _run(func, items_data, space_dimensions, repeats=1, trace_memory=False):
+    """运行 repeats 次，返回 (最后一次的摆放结果, 每次的耗时, 内存峰值字节数)"""
+    placed = None
+    times = []
+    for _ in range(repeats):
+        items = _copy_items(items_data)
+        start = time.perf_counter()
+        placed = func(items, dict(space_dimensions))
+        times.append(time.perf_counter() - start)
+    peak = None
+    if trace_memory:
+        # tracemalloc 会拖慢运行，单独运行一次，不计入耗时
+        items = _copy_items(items_data)
+        tracemalloc.start()
+        try:
+            func(items, dict(space_dimensions))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return placed, times, peak
+
+
+def measure(key, source, items_data, space_dimensions, repeats=1, trace_memory=False, limits=None):
+    """
+    运行一个算法版本，返回 (摆放结果, 每次的耗时, 内存峰值字节数或 None)
+    key 为 None 时在本进程运行内置算法；上传的版本在子进程里运行，limits 为 {'timeout', 'memory_mb'}
+    """
+    if key is None:
+        return _run(_builtin(), items_data, space_dimensions, repeats, trace_memory)
+    result = run_isolated({
+        'mode': 'run', 'source': source, 'items': items_data, 'space': space_dimensions,
+        'repeats': repeats, 'trace_memory': trace_memory,
+    }, **(limits or {'timeout': 60}))
+    return result['placed'], result['times'], result['peak']
+
+
+def measure_all(runs, repeats=1, trace_memory=False, limits=None):
+    """
+    依次运行 runs 中的每个 (key, source, items_data, space_dimensions)，算法基准在后台进程池里用它计时
+    返回每一项的 {'placed', 'times', 'peak'}，出错的一项为 {'error': 错误信息}
+    """
+    outcomes = []
+    for key, source, items_data, space_dimensions in runs:
+        try:
+            placed, times, peak = measure(key, source, items_data, space_dimensions, repeats, trace_memory, limits)
+        except Exception as e:
+            outcomes.append({'error': repr(e)})
+            continue
+        outcomes.append({'placed': placed, 'times': times, 'peak': peak})
+    return outcomes
+
+
+def place_items(key, source, items_data, space_dimensions, limits=None):
+    """key 为 None 时使用内置算法，source 为上传版本的代码"""
+    return measure(key, source, items_data, space_dimensions, limits=limits)[0]
+
+
+def pack(key, source, items_data, space_dimensions, time_budget=None, limits=None):
+    """
+    返回 (摆放结果, 统计)，统计的内容见 packing_algorithm.pack_anytime
+    time_budget 只对内置算法有效；上传的算法只运行一次，iterations 为 0
+    """
+    if key is None and time_budget is not None:
+        from .packing_algorithm import pack_anytime
+        return pack_anytime(items_data, space_dimensions, time_budget=time_budget)
+    placed, times, _ = measure(key, source, items_data, space_dimensions, limits=limits)
+    capacity = space_dimensions['x'] * space_dimensions['y'] * space_dimensions['z']
+    volume = sum(p['dimensions']['x'] * p['dimensions']['y'] * p['dimensions']['z'] for p in placed)
+    return placed, {
+        'fill_ratio': volume / capacity if capacity > 0 else 0.0,
+        'iterations': 0,
+        'improvements': 0,
+        'elapsed': times[0],
+    }
+
+
+def sample_items():
+    rng = random.Random(0)
+    return [{
+        'name': f'sample{i}',
+        'dimensions': {'x': rng.randint(1, 4), 'y': rng.randint(1, 4), 'z': rng.randint(1, 4)},
+        'face_up': rng.random() < 0.2,
+        'fragile': rng.random() < 0.1,
+    } for i in range(SAMPLE_SIZE)]
+
+
+def _load(source):
+    """子进程里执行算法代码，返回它的 place_items；出错时抛出 AlgorithmError"""
+    module = types.ModuleType('box_algorithm')
+    try:
+        exec(compile(source, '<uploaded algorithm>', 'exec'), module.__dict__)
+    except Exception as e:
+        raise AlgorithmError(f"The algorithm file contains errors: {e}")
+    func = getattr(module, 'place_items', None)
+    if not callable(func):
+        raise AlgorithmError("The algorithm file must contain a callable 'place_items' function")
+    return func
+
+
+def result_error(result):
+    """place_items 返回值的格式错误，没有问题时返回 None"""
+    if not isinstance(result, list):
+        return "place_items must return a list"
+    for item in result:
+        if not isinstance(item, dict):
+            return "place_items must return a list of dicts"
+        for key in ('order_id', 'name', 'position', 'dimensions'):
+            if key not in item:
+                return f"Placed item is missing '{key}'"
+        for key in ('position', 'dimensions'):
+            value = item[key]
+            if not isinstance(value, dict) or any(not isinstance(value.get(axis), (int, float)) for axis in 'xyz'):
+                return f"Placed item '{key}' must have numeric x, y and z"
+    try:
+        json.dumps(result)
+    except (TypeError, ValueError) as e:
+        return f"place_items result is not JSON serializable: {e}"
+    return None
+
+
+def check(source):
+    """执行算法代码并试运行，返回错误信息，没有问题时返回 None"""
+    try:
+        func = _load(source)
+    except AlgorithmError as e:
+        return str(e)
+    try:
+        result = func(sample_items(), dict(SAMPLE_SPACE))
+    except Exception as e:
+        return f"place_items failed on sample input: {e!r}"
+    return result_error(result)
+
+
+def _handle(request):
+    if request['mode'] == 'check':
+        error = check(request['source'])
+        if error is not None:
+            raise AlgorithmError(error)
+        return None
+    func = _load(request['source'])
+    try:
+        placed, times, peak = _run(func, request['items'], request['space'], request.get('repeats', 1),
+                                   request.get('trace_memory', False))
+    except Exception as e:
+        raise AlgorithmError(f"place_items failed: {e!r}")
+    error = result_error(placed)
+    if error is not None:
+        raise AlgorithmError(error)
+    return {'placed': placed, 'times': times, 'peak': peak}
+
+
+def _apply_limits(memory_mb, cpu_seconds):
+    if resource is None:
+        return
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+
+
+def main():
+    request = json.loads(sys.stdin.read())
+    nonce = request.pop('nonce')
+    result_path = request.pop('result_path')
+    _apply_limits(request.get('memory_mb'), request.get('cpu_seconds'))
+    try:
+        outcome = {'error': None, 'result': _handle(request)}
+    except AlgorithmError as e:
+        outcome = {'error': str(e)}
+    except MemoryError:
+        outcome = {'error': "Memory limit exceeded"}
+    outcome['nonce'] = nonce
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(outcome, f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# box_back/box_back/app/algorithms.py
+"""
+装箱算法的版本管理
+
+上传的算法以不可变版本保存在数据库（AlgorithmVersion），内容相同的文件只保存一次。
+全局使用的版本记录在 is_active 上，没有激活的版本时使用内置的 packing_algorithm；
+创建任务时可以指定版本，不指定时按当前全局版本。每次创建任务都从数据库读取当前版本，
+所以切换版本后所有 Web 进程和后台进程池立即生效，不需要重启。
+
+上传的代码不会在 Web 进程和后台进程池里执行：校验和每次运行都在一个单独的 Python 子进程里进行
+（见 algorithm_runtime.run_isolated），子进程设置了内存和 CPU 时间上限，父进程还有一个总超时，
+出问题时只会得到一个 AlgorithmError。
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+
+from . import algorithm_runtime
+from .models import AlgorithmVersion
+
+# 请求里用来指定内置算法的版本名
+BUILTIN = 'builtin'
+
+
+def validate(source):
+    """在子进程里校验算法代码，返回错误信息，通过时返回 None"""
+    try:
+        algorithm_runtime.run_isolated(
+            {'mode': 'check', 'source': source},
+            timeout=getattr(settings, 'ALGORITHM_VALIDATION_TIMEOUT', 10),
+            memory_mb=getattr(settings, 'ALGORITHM_VALIDATION_MEMORY_MB', 512),
+        )
+    except algorithm_runtime.AlgorithmError as e:
+        return str(e)
+    return None
+
+
+def run_limits():
+    """运行上传版本时子进程的限制"""
+    return {
+        'timeout': getattr(settings, 'ALGORITHM_RUN_TIMEOUT', 60),
+        'memory_mb': getattr(settings, 'ALGORITHM_RUN_MEMORY_MB', 1024),
+    }
+
+
+def register(source, name='', activate=False):
+    """保存一个已经校验过的版本，返回 (version, created)；内容已存在时返回原来的版本"""
+    sha256 = hashlib.sha256(source.encode()).hexdigest()
+    with transaction.atomic():
+        version, created = AlgorithmVersion.objects.get_or_create(
+            sha256=sha256, defaults={'source': source, 'name': name})
+        if activate:
+            set_active(version)
+    return version, created
+
+
+def set_active(version):
+    """设置全局版本，version 为 None 时恢复内置算法"""
+    with transaction.atomic():
+        others = AlgorithmVersion.objects.filter(is_active=True)
+        if version is not None:
+            others = others.exclude(id=version.id)
+            AlgorithmVersion.objects.filter(id=version.id).update(is_active=True)
+            version.is_active = True
+        others.update(is_active=False)
+
+
+def resolve(requested=None):
+    """
+    requested 为 None 时返回当前全局版本，为 BUILTIN 时返回 None（内置算法），其余按版本 id 查找
+    版本不存在时抛出 AlgorithmVersion.DoesNotExist；返回的实例没有取出 source
+    """
+    versions = AlgorithmVersion.objects.defer('source')
+    if requested is None:
+        return versions.filter(is_active=True).first()
+    if requested == BUILTIN:
+        return None
+    return versions.get(id=int(requested))
+
+
+def job_args(version):
+    """传给 algorithm_runtime 的 (key, source)，内置算法为 (None, None)"""
+    if version is None:
+        return None, None
+    return version.sha256, version.source
+
+
+def place_items(version, items_data, space_dimensions):
+    """用指定版本计算摆放位置，version 为 None 时使用内置算法；上传的版本出错时抛出 AlgorithmError"""
+    return algorithm_runtime.place_items(*job_args(version), items_data, space_dimensions, limits=run_limits())
+
+
+def measure(version, items_data, space_dimensions, repeats=1, trace_memory=False):
+    """同 place_items，另外返回每次的耗时和内存峰值，见 algorithm_runtime.measure"""
+    return algorithm_runtime.measure(*job_args(version), items_data, space_dimensions, repeats, trace_memory,
+                                     limits=run_limits())
+
+
+def pack(version, items_data, space_dimensions, time_budget=None):
+    """同 place_items，另外返回装填率和迭代次数；time_budget 只对内置算法有效"""
+    return algorithm_runtime.pack(*job_args(version), items_data, space_dimensions, time_budget,
+                                  limits=run_limits())
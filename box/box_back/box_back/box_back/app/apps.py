@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class BoxAppConfig(AppConfig):
+    name = 'box_back.app'
+    label = 'app'
+
+    def ready(self):
+        # 注册 get_task 结果缓存的失效信号
+        from . import task_cache  # noqa: F401
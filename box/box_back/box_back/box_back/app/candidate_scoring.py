@@ -0,0 +1,152 @@
+# box_back/box_back/app/candidate_scoring.py
+"""
+空闲空间表和候选打分
+
+装箱引擎把容器里还空着的部分切成互不重叠的长方体（空闲空间），每个空间的底面整块落在地面或某个箱子的顶面上。
+一个候选是 (空闲空间, 摆放方向)：物品放在空间的最小角。对一个物品的所有候选一次性判断：
+    - 越界和重叠：三个方向的尺寸都不超过空间。空间在容器内且不与任何箱子重叠，放得下就不会越界或重叠
+    - 支撑：空间底面整块有支撑，物品底面全部接触，总能满足 MIN_SUPPORT_RATIO
+    - 易碎品（column=True）：空间要一直通到容器顶部，上方整列都空着
+再在可行候选里按以下顺序选出最好的一个：
+    1. 空间底面高度 y 越低越好
+    2. 水平方向的余量 min(空间宽 - w, 空间深 - d) 越小越好，物品贴着空间的边放
+    3. 摆放方向越靠前越好，再按空间的 z、x 坐标，越靠里越好
+不同的空闲空间最小角一定不同，这个顺序没有并列。
+
+有 NumPy 时空间表同时存成 NumPy 数组，所有 (方向, 空间) 组合一次向量化比较；纯 Python 路径逐个比较。
+两条路径使用相同的浮点运算和相同的比较顺序，结果完全一致。
+空间很少时 NumPy 的调用开销比计算本身还大，所以表里达到 NUMPY_MIN_SPACES 个空间才走 NumPy，
+两条路径的耗时对比见 benchmarks/candidate_scoring.py。
+"""
+from .spatial_index import EPS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 空间表（含已删除的空位）达到这个大小才使用 NumPy 路径
+NUMPY_MIN_SPACES = 32
+
+# NumPy 数组的行：最小角、最大角和三个方向的尺寸
+X0, Y0, Z0, X1, Y1, Z1, SX, SY, SZ = range(9)
+
+
+class FreeSpaces:
+    """
+    空闲空间表
+    rows[i] 为 (x0, y0, z0, x1, y1, z1)，删除后为 None，空出的下标留给之后新增的空间
+    space:     容器尺寸 (x, y, z)，易碎品要求空间通到 space[1]
+    use_numpy: None 表示按表的大小自动选择，True / False 强制使用某一条路径
+    """
+
+    def __init__(self, space, use_numpy=None):
+        self.space = space
+        self.use_numpy = use_numpy
+        self.rows = []
+        self.holes = []
+        self.count = 0
+        # 只有可能走 NumPy 路径时才维护数组副本
+        self.array = np.empty((9, 64)) if np is not None and use_numpy is not False else None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, spaces):
+        for row in spaces:
+            if self.holes:
+                index = self.holes.pop()
+                self.rows[index] = row
+            else:
+                index = len(self.rows)
+                self.rows.append(row)
+            if self.array is not None:
+                if index >= self.array.shape[1]:
+                    grown = np.empty((9, 2 * self.array.shape[1]))
+                    grown[:, :index] = self.array[:, :index]
+                    self.array = grown
+                x0, y0, z0, x1, y1, z1 = row
+                self.array[:, index] = (x0, y0, z0, x1, y1, z1, x1 - x0, y1 - y0, z1 - z0)
+        self.count += len(spaces)
+
+    def remove(self, indices):
+        for index in indices:
+            self.rows[index] = None
+            self.holes.append(index)
+            if self.array is not None:
+                # 尺寸为 -inf 的列任何物品都放不下
+                self.array[SX, index] = -np.inf
+        self.count -= len(indices)
+
+    def vectorized(self):
+        if self.use_numpy is None:
+            return self.array is not None and len(self.rows) >= NUMPY_MIN_SPACES
+        return self.use_numpy
+
+    def prune(self, min_dims):
+        """删除连 min_dims 都放不下的空间"""
+        mx, my, mz = min_dims
+        if self.vectorized():
+            a = self.array[:, :len(self.rows)]
+            small = (a[SX] < mx - EPS) | (a[SY] < my - EPS) | (a[SZ] < mz - EPS)
+            # 已删除的列 SX 为 -inf，用 rows 排除
+            indices = [index for index in np.flatnonzero(small).tolist() if self.rows[index] is not None]
+        else:
+            indices = [index for index, row in enumerate(self.rows) if row is not None and (
+                row[3] - row[0] < mx - EPS or row[4] - row[1] < my - EPS or row[5] - row[2] < mz - EPS)]
+        self.remove(indices)
+
+    def overlapping(self, box):
+        """与 box 有体积重叠的空间下标"""
+        if self.vectorized():
+            a = self.array[:, :len(self.rows)]
+            hit = ((a[SX] > 0) & (a[X0] < box[3] - EPS) & (box[0] < a[X1] - EPS) & (a[Y0] < box[4] - EPS) &
+                   (box[1] < a[Y1] - EPS) & (a[Z0] < box[5] - EPS) & (box[2] < a[Z1] - EPS))
+            return np.flatnonzero(hit).tolist()
+        return [index for index, row in enumerate(self.rows) if row is not None and (
+            row[0] < box[3] - EPS and box[0] < row[3] - EPS and row[1] < box[4] - EPS and
+            box[1] < row[4] - EPS and row[2] < box[5] - EPS and box[2] < row[5] - EPS)]
+
+    def best(self, orientations, column=False):
+        """
+        给 (空间, 方向) 候选打分，返回最好的 (空间下标, 方向在 orientations 中的位置)，没有可行候选时返回 None
+        column=True 时按易碎品处理
+        """
+        if self.vectorized():
+            return self._best_numpy(orientations, column)
+        return self._best_python(orientations, column)
+
+    def _best_python(self, orientations, column):
+        ceiling = self.space[1]
+        best = None
+        best_key = None
+        for position, (w, h, d) in enumerate(orientations):
+            for index, row in enumerate(self.rows):
+                if row is None:
+                    continue
+                x0, y0, z0, x1, y1, z1 = row
+                sx, sz = x1 - x0, z1 - z0
+                if sx < w - EPS or y1 - y0 < h - EPS or sz < d - EPS or (column and y1 < ceiling - EPS):
+                    continue
+                key = (y0, min(sx - w, sz - d), position, z0, x0)
+                if best_key is None or key < best_key:
+                    best, best_key = (index, position), key
+        return best
+
+    def _best_numpy(self, orientations, column):
+        a = self.array[:, :len(self.rows)]
+        dims = np.array(orientations, dtype=float)
+        # (方向, 空间) 的二维表，一次比较所有候选
+        fit = (a[SX] >= dims[:, 0:1] - EPS) & (a[SY] >= dims[:, 1:2] - EPS) & (a[SZ] >= dims[:, 2:3] - EPS)
+        if column:
+            fit &= a[Y1] >= self.space[1] - EPS
+        positions, found = np.nonzero(fit)
+        if not found.size:
+            return None
+        # 先取底面最低的一层，余量、方向和坐标只在这一层里比较
+        y = a[Y0, found]
+        low = y == y.min()
+        positions, found = positions[low], found[low]
+        slack = np.minimum(a[SX, found] - dims[positions, 0], a[SZ, found] - dims[positions, 2])
+        first = np.lexsort((a[X0, found], a[Z0, found], positions, slack))[0]
+        return int(found[first]), int(positions[first])
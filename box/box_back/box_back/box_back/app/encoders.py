@@ -0,0 +1,91 @@
+# box_back/box_back/app/encoders.py
+"""
+任务的快速编码
+
+输出与 TaskSerializer 完全相同的结构（字段、顺序和取值），但物品不经过模型实例和
+SerializerMethodField：直接用 values_list 按列取出元组，再拼成字典。
+物品很多的任务主要耗时在每个物品、每个字段一次的 Python 调用上，这里省掉了这部分开销。
+与 DRF 序列化器的对比见 benchmarks/task_encoding.py。
+
+stream_task 把同样的结构分段写出：物品用数据库游标分批读取，每批编码后立即发送，
+内存占用与物品总数无关。每一段都交给 DRF 的 JSONRenderer 渲染，拼起来与整体渲染逐字节相同。
+"""
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from .models import Item
+
+# 与 ItemSerializer 输出顺序对应的数据库列
+ITEM_COLUMNS = (
+    'order_id', 'name',
+    'position_x', 'position_y', 'position_z',
+    'width', 'height', 'depth',
+    'face_up', 'fragile',
+)
+
+# 流式输出时每批读取和发送的物品数量
+STREAM_CHUNK = 1000
+
+# created_at 的格式化交给 DRF，保证与 TaskSerializer 一致
+_datetime_field = serializers.DateTimeField()
+
+
+def encode_item(row):
+    order_id, name, px, py, pz, width, height, depth, face_up, fragile = row
+    return {
+        'order_id': order_id,
+        'name': name,
+        'position': {'x': px, 'y': py, 'z': pz},
+        'dimensions': {'x': width, 'y': height, 'z': depth},
+        'face_up': face_up,
+        'fragile': fragile,
+    }
+
+
+def encode_task(task, items=None):
+    """
+    task 需要已经取出 creator 和 worker（select_related），
+    items 为该任务的物品列元组，不传时查询一次数据库
+    """
+    if items is None:
+        items = task.items.order_by().values_list(*ITEM_COLUMNS)
+    worker = task.worker
+    return {
+        'id': task.id,
+        'creator': {'id': task.creator.id, 'name': task.creator.name},
+        'worker': {'id': worker.id, 'name': worker.name} if worker else None,
+        'space_info': {'x': task.space_x, 'y': task.space_y, 'z': task.space_z},
+        'items': [encode_item(row) for row in items],
+        'created_at': _datetime_field.to_representation(task.created_at),
+    }
+
+
+def encode_tasks(tasks):
+    """编码多个任务，所有物品用一次查询取出"""
+    tasks = list(tasks)
+    grouped = {task.id: [] for task in tasks}
+    if grouped:
+        rows = Item.objects.filter(task_id__in=list(grouped)).order_by().values_list('task_id', *ITEM_COLUMNS)
+        for row in rows:
+            grouped[row[0]].append(row[1:])
+    return [encode_task(task, grouped[task.id]) for task in tasks]
+
+
+def stream_task(task):
+    """按段生成 encode_task(task) 渲染后的 JSON 字节"""
+    renderer = JSONRenderer()
+    # 字符串里的引号都会被转义，所以 "items":[] 只会出现在键的位置
+    head, tail = renderer.render(encode_task(task, items=())).split(b'"items":[]', 1)
+    yield head + b'"items":['
+    rows = task.items.order_by().values_list(*ITEM_COLUMNS).iterator(chunk_size=STREAM_CHUNK)
+    separator = b''
+    chunk = []
+    for row in rows:
+        chunk.append(renderer.render(encode_item(row)))
+        if len(chunk) == STREAM_CHUNK:
+            yield separator + b','.join(chunk)
+            separator = b','
+            chunk = []
+    if chunk:
+        yield separator + b','.join(chunk)
+    yield b']' + tail
@@ -0,0 +1,240 @@
+# box_back/box_back/app/jobs.py
+"""
+装箱任务的后台队列
+
+create_task 的异步模式把 place_items 交给本地进程池计算，不需要额外的消息中间件。
+任务行先以 pending 状态写入数据库，任务 id 同时作为 job id；
+子进程只做纯计算，结果回到 Web 进程后由回调线程写入物品并更新状态。
+任务使用的算法版本（task.algorithm）连同代码一起交给子进程，上传的版本再由 algorithm_runtime 放到单独的子进程里运行，有超时和内存上限。
+内置算法的多起点模式把每个随机种子作为单独的任务提交，全部完成后取最好的结果；
+同步请求也用这个进程池并行计算（pack_parallel）。
+多容器任务（pack_containers）每一轮的各个容器在进程池里并行装箱，异步模式下由一个后台线程负责分组和汇总。
+算法基准（submit_benchmark）也在这个进程池里运行，完成后由回调线程保存结果。
+Web 进程重启时还在排队或计算中的任务不会自动恢复，会一直停留在原来的状态。
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import algorithm_bench, algorithm_runtime, algorithms, layout_cache, layout_metrics, packing_algorithm
+from .models import BenchmarkRun, Container, Item, Task
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """进程池在第一次提交任务时创建，每个 Web 进程一个"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn 启动的子进程不继承 Web 进程的数据库连接和线程
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'PACKING_WORKERS', None),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def _discard_executor():
+    # 子进程异常退出后进程池不能再用，下次提交时重新创建
+    global _executor
+    with _lock:
+        _executor = None
+
+
+def save_items(task, placed_items, batch_size=None, containers=None):
+    """
+    把 place_items 的结果写成 Item 行：在一个事务里按批 bulk_create，批大小默认取 ITEM_BATCH_SIZE
+    containers 为容器下标到 Container 的映射，多容器任务的物品按 container 字段关联到对应的容器
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'ITEM_BATCH_SIZE', 500)
+    items = [
+        Item(
+            task=task,
+            order_id=item_data['order_id'],
+            name=item_data['name'],
+            position_x=item_data['position']['x'],
+            position_y=item_data['position']['y'],
+            position_z=item_data['position']['z'],
+            width=item_data['dimensions']['x'],
+            height=item_data['dimensions']['y'],
+            depth=item_data['dimensions']['z'],
+            face_up=item_data.get('face_up', False),
+            fragile=item_data.get('fragile', False),
+            container=containers[item_data['container']] if containers else None
+        )
+        for item_data in placed_items
+    ]
+    with transaction.atomic():
+        Item.objects.bulk_create(items, batch_size=batch_size)
+
+
+def start_iterations():
+    """多起点模式下没有时间预算时每个起点的迭代次数"""
+    return getattr(settings, 'PACKING_START_ITERATIONS', 4)
+
+
+def pack_parallel(items_data, space_data, seeds, time_budget=None):
+    """在进程池里并行运行内置算法的多起点装箱，返回 (摆放结果, 统计)"""
+    iterations = None if time_budget is not None else start_iterations()
+    try:
+        return packing_algorithm.pack_multistart(
+            items_data, space_data, seeds, iterations=iterations, time_budget=time_budget, executor=get_executor())
+    except BrokenProcessPool:
+        _discard_executor()
+        raise
+
+
+def save_containers(task, placed_items, stats):
+    """写入多容器任务的 Container 行和物品，与 save_items 在同一个事务里"""
+    containers = [
+        Container(task=task, index=index, fill_ratio=fill_ratio)
+        for index, fill_ratio in enumerate(stats['container_fill'])
+    ]
+    with transaction.atomic():
+        Container.objects.bulk_create(containers)
+        save_items(task, placed_items, containers=containers)
+
+
+def pack_containers(items_data, space_data):
+    """多容器装箱，每一轮的各个容器在进程池里并行计算，返回 (摆放结果, 统计)"""
+    try:
+        return packing_algorithm.pack_containers(items_data, space_data, executor=get_executor())
+    except BrokenProcessPool:
+        _discard_executor()
+        raise
+
+
+def submit_containers(task, items_data, space_data):
+    """
+    提交一个 pending 状态的多容器任务，立即返回
+    分组和汇总在后台线程里进行，各个容器的装箱仍然交给进程池
+    """
+    items_data = [dict(item) for item in items_data]
+    space_data = dict(space_data)
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(pack_containers(items_data, space_data))
+        except Exception as e:
+            future.set_exception(e)
+
+    future.add_done_callback(lambda done: _finish(task.id, done, containers=True))
+    threading.Thread(target=run, name=f'pack-containers-{task.id}', daemon=True).start()
+    return future
+
+
+def _gather(futures):
+    """多个起点的结果合并成一个 Future，全部完成后取 best_of"""
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            combined.set_result(packing_algorithm.best_of([future.result() for future in futures]))
+        except Exception as e:
+            combined.set_exception(e)
+
+    for future in futures:
+        future.add_done_callback(done)
+    return combined
+
+
+def submit(task, items_data, space_data, time_budget=None, seeds=None, cache_key=None):
+    """
+    提交一个 pending 状态的任务，立即返回；排队和计算中的任务都是 pending
+    seeds 有多个时（只对内置算法有效）每个种子单独提交，结果合并后再写入
+    给了 cache_key 时完成后把布局写入 layout_cache
+    """
+    items_data = [dict(item) for item in items_data]
+    space_data = dict(space_data)
+    executor = get_executor()
+    if task.algorithm is None and seeds and len(seeds) > 1:
+        iterations = None if time_budget is not None else start_iterations()
+        # 所有种子共享一个截止时间，排队的种子只用剩下的时间
+        ends_at = time.time() + time_budget if time_budget is not None else None
+        future = _gather([
+            executor.submit(packing_algorithm.pack_anytime, items_data, space_data,
+                            iterations=iterations, seed=seed, ends_at=ends_at)
+            for seed in seeds
+        ])
+    else:
+        key, source = algorithms.job_args(task.algorithm)
+        future = executor.submit(algorithm_runtime.pack, key, source, items_data, space_data, time_budget,
+                                 algorithms.run_limits())
+    future.add_done_callback(lambda done: _finish(task.id, done, items_data, cache_key))
+    return future
+
+
+def _finish(task_id, future, items_data=None, cache_key=None, containers=False):
+    # 回调在进程池的结果线程里执行，需要自己管理数据库连接
+    close_old_connections()
+    try:
+        placed_items, stats = future.result()
+        task = Task.objects.filter(id=task_id).first()
+        if task is None:
+            return
+        summary = layout_metrics.of_placed(placed_items, (task.space_x, task.space_y, task.space_z))
+        with transaction.atomic():
+            if containers:
+                save_containers(task, placed_items, stats)
+            else:
+                save_items(task, placed_items)
+            Task.objects.filter(id=task_id).update(
+                status=Task.STATUS_DONE, fill_ratio=stats['fill_ratio'], iterations=stats['iterations'],
+                violations=layout_metrics.violations(summary))
+        if cache_key is not None:
+            layout_cache.put(cache_key, items_data, placed_items, stats)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            _discard_executor()
+        logger.exception("Packing job %s failed", task_id)
+        Task.objects.filter(id=task_id).update(status=Task.STATUS_FAILED, error=str(e))
+    finally:
+        close_old_connections()
+
+
+def submit_benchmark(run, versions, cases):
+    """
+    提交一次 pending 状态的算法基准（BenchmarkRun），立即返回
+    versions 中的 None 表示内置算法；全部版本在同一个子进程里依次计时，耗时才可以互相比较
+    """
+    future = get_executor().submit(algorithm_runtime.measure_all, algorithm_bench.measurements(versions, cases),
+                                   run.repeats, True, algorithms.run_limits())
+    future.add_done_callback(lambda done: _finish_benchmark(run.id, done, versions, cases))
+    return future
+
+
+def _finish_benchmark(run_id, future, versions, cases):
+    close_old_connections()
+    try:
+        outcomes = iter(future.result())
+        run = BenchmarkRun.objects.get(id=run_id)
+        with transaction.atomic():
+            for version in versions:
+                details = [algorithm_bench.case_result(case, next(outcomes)) for case in cases]
+                algorithm_bench.summarize(version, run.corpus, run.repeats, details, run=run).save()
+            BenchmarkRun.objects.filter(id=run_id).update(status=BenchmarkRun.STATUS_DONE)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            _discard_executor()
+        logger.exception("Benchmark run %s failed", run_id)
+        BenchmarkRun.objects.filter(id=run_id).update(status=BenchmarkRun.STATUS_FAILED, error=str(e))
+    finally:
+        close_old_connections()
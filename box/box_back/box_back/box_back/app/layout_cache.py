@@ -0,0 +1,138 @@
+# box_back/box_back/app/layout_cache.py
+"""
+create_task 的布局缓存（LayoutCacheEntry）
+
+很多任务是重复的发货单：空间和物品完全相同，只是物品名称或顺序不同。
+缓存键是以下内容的 sha256：空间尺寸、物品 (尺寸, face_up, fragile) 的多重集合（排序后，不含名称）、
+算法指纹（上传版本的 sha256，内置算法为引擎源文件的 sha256）以及 time_budget、随机种子等选项。
+命中时不再运行装箱算法。
+
+布局里的物品用它在规范顺序（按上面的物品键稳定排序）中的下标表示，命中时按同样的规则排序当前请求的物品，
+下标对应的物品尺寸和属性都相同，可以互换，名称取当前请求的。
+缓存保存在数据库里，重启后仍然有效；条目数超过 LAYOUT_CACHE_MAX_ENTRIES 时删除最久没用过的，设为 0 时关闭缓存。
+"""
+import hashlib
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from . import candidate_scoring, packing_algorithm, spatial_index
+from .models import LayoutCacheEntry
+
+_builtin_fingerprint = None
+
+
+def max_entries():
+    return getattr(settings, 'LAYOUT_CACHE_MAX_ENTRIES', 10000)
+
+
+def builtin_fingerprint():
+    """内置引擎源文件的 sha256，引擎代码更新后旧的缓存自然不再命中"""
+    global _builtin_fingerprint
+    if _builtin_fingerprint is None:
+        digest = hashlib.sha256()
+        for module in (packing_algorithm, candidate_scoring, spatial_index):
+            with open(module.__file__, 'rb') as f:
+                digest.update(f.read())
+        _builtin_fingerprint = 'builtin:' + digest.hexdigest()
+    return _builtin_fingerprint
+
+
+def _item_key(item):
+    dimensions = item['dimensions']
+    return (float(dimensions['x']), float(dimensions['y']), float(dimensions['z']),
+            bool(item.get('face_up', False)), bool(item.get('fragile', False)))
+
+
+def _canonical_order(items_data):
+    """请求中物品的下标，按物品键稳定排序"""
+    keys = [_item_key(item) for item in items_data]
+    return sorted(range(len(items_data)), key=keys.__getitem__), keys
+
+
+def make_key(items_data, space_data, version, options):
+    order, keys = _canonical_order(items_data)
+    content = json.dumps({
+        'space': [float(space_data['x']), float(space_data['y']), float(space_data['z'])],
+        'items': [keys[index] for index in order],
+        'algorithm': version.sha256 if version is not None else builtin_fingerprint(),
+        'options': options,
+    }, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def get(key, items_data):
+    """命中时返回 (摆放结果, 统计)，并更新最近使用时间；没有时返回 None"""
+    if not max_entries():
+        return None
+    entry = LayoutCacheEntry.objects.filter(key=key).values('id', 'layout', 'fill_ratio').first()
+    if entry is None:
+        return None
+    LayoutCacheEntry.objects.filter(id=entry['id']).update(last_used=timezone.now(), hits=F('hits') + 1)
+
+    order, _ = _canonical_order(items_data)
+    placed_items = []
+    for rank, x, y, z, dx, dy, dz in entry['layout']:
+        item = items_data[order[rank]]
+        placed_items.append({
+            'order_id': len(placed_items) + 1,
+            'name': item['name'],
+            'position': {'x': x, 'y': y, 'z': z},
+            'dimensions': {'x': dx, 'y': dy, 'z': dz},
+            'face_up': item.get('face_up', False),
+            'fragile': item.get('fragile', False)
+        })
+    return placed_items, {'fill_ratio': entry['fill_ratio'], 'iterations': 0, 'improvements': 0, 'cached': True}
+
+
+def _ranks(items_data, placed_items):
+    """
+    每个摆放结果对应的规范下标；名称、尺寸（不计方向）和属性都相同的输入物品可以互换
+    有对应不上的物品时（上传的算法改了名称或尺寸）返回 None
+    """
+    order, keys = _canonical_order(items_data)
+    available = defaultdict(list)
+    for rank in range(len(order) - 1, -1, -1):
+        index = order[rank]
+        key = keys[index]
+        available[(items_data[index]['name'], tuple(sorted(key[:3])), key[3], key[4])].append(rank)
+    ranks = []
+    for placed in placed_items:
+        dimensions = placed['dimensions']
+        dims = tuple(sorted((float(dimensions['x']), float(dimensions['y']), float(dimensions['z']))))
+        candidates = available.get((placed['name'], dims, bool(placed.get('face_up', False)),
+                                    bool(placed.get('fragile', False))))
+        if not candidates:
+            return None
+        ranks.append(candidates.pop())
+    return ranks
+
+
+def put(key, items_data, placed_items, stats):
+    limit = max_entries()
+    # 时间预算用完时只摆放了部分物品的布局不缓存
+    if not limit or not stats.get('complete', True):
+        return
+    ranks = _ranks(items_data, placed_items)
+    if ranks is None:
+        return
+    layout = [
+        [rank, p['position']['x'], p['position']['y'], p['position']['z'],
+         p['dimensions']['x'], p['dimensions']['y'], p['dimensions']['z']]
+        for rank, p in zip(ranks, placed_items)
+    ]
+    # 并发请求可能同时写入同一个键，先写入的保留
+    LayoutCacheEntry.objects.bulk_create([
+        LayoutCacheEntry(key=key, layout=layout, fill_ratio=stats['fill_ratio'], last_used=timezone.now())
+    ], ignore_conflicts=True)
+    evict(limit)
+
+
+def evict(limit):
+    """只保留最近使用的 limit 条"""
+    stale = list(LayoutCacheEntry.objects.order_by('-last_used', '-id').values_list('id', flat=True)[limit:])
+    if stale:
+        LayoutCacheEntry.objects.filter(id__in=stale).delete()
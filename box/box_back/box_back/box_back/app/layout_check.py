@@ -0,0 +1,272 @@
+# box_back/box_back/app/layout_check.py
+"""
+布局检查：物品之间的重叠、超出空间、支撑不足、易碎品受压，以及空间利用率和重心
+
+boxes 为 ((x, y, z), (dx, dy, dz)) 的序列，坐标为物品的最小角（y 为竖直方向）。
+只有接触面的两个物品不算重叠，EPS 以内的误差也不算越界。
+支撑和易碎品的规则与内置算法相同：
+    不在地面上的物品，底面与正下方物品顶面（高度差在 EPS 以内）的接触面积至少为底面积的 MIN_SUPPORT_RATIO；
+    易碎品上方整列都不能有物品。
+
+validate 一次算出全部指标。有 NumPy 时用网格分桶向量化计算：每个物品登记到它覆盖的网格格子，
+只比较同一格子里的物品，5 万个物品的布局约 0.3 秒；没有 NumPy 时逐个物品两两比较，结果相同但慢得多。
+overlaps / out_of_bounds 是纯 Python 的单项检查，算法基准用它们检查小规模的布局。
+"""
+from .packing_algorithm import MIN_SUPPORT_RATIO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EPS = 1e-6
+
+# validate 返回的每类违规物品最多列出这么多个
+DETAIL_LIMIT = 100
+
+# 网格分桶时每次展开的 (物品, 物品) 对的上限，限制内存占用
+PAIR_BATCH = 1 << 21
+
+
+def boxes_of(placed_items):
+    """place_items 的结果转换为 boxes"""
+    return [
+        ((p['position']['x'], p['position']['y'], p['position']['z']),
+         (p['dimensions']['x'], p['dimensions']['y'], p['dimensions']['z']))
+        for p in placed_items
+    ]
+
+
+def _outside(corner, dims, space):
+    return any(dims[axis] <= 0 or corner[axis] < -EPS or corner[axis] + dims[axis] > space[axis] + EPS
+               for axis in range(3))
+
+
+def out_of_bounds(boxes, space):
+    """超出空间或尺寸不为正的物品数量"""
+    return sum(1 for corner, dims in boxes if _outside(corner, dims, space))
+
+
+def _overlap_pairs(boxes):
+    """
+    相互重叠的物品下标对 (i, j)，i < j
+    按 x 排序后扫描，只和 x 方向上仍有交叠的物品比较 y 和 z
+    """
+    ordered = sorted(range(len(boxes)), key=lambda index: boxes[index][0][0])
+    # active 中每项为 (x1, y0, y1, z0, z1, 下标)
+    active = []
+    for index in ordered:
+        (x0, y0, z0), (dx, dy, dz) = boxes[index]
+        active = [box for box in active if box[0] > x0 + EPS]
+        y1, z1 = y0 + dy, z0 + dz
+        for _, other_y0, other_y1, other_z0, other_z1, other in active:
+            if other_y0 < y1 - EPS and y0 < other_y1 - EPS and other_z0 < z1 - EPS and z0 < other_z1 - EPS:
+                yield (min(index, other), max(index, other))
+        active.append((x0 + dx, y0, y1, z0, z1, index))
+
+
+def overlaps(boxes):
+    """相互重叠的物品对数"""
+    return sum(1 for _ in _overlap_pairs(boxes))
+
+
+def _footprint_overlap(a, b):
+    """两个物品水平投影的相交面积，不超过 EPS 的交叠不算"""
+    (ax, _, az), (adx, _, adz) = a
+    (bx, _, bz), (bdx, _, bdz) = b
+    dx = min(ax + adx, bx + bdx) - max(ax, bx)
+    dz = min(az + adz, bz + bdz) - max(az, bz)
+    return dx * dz if dx > EPS and dz > EPS else 0.0
+
+
+def _validate_python(boxes, space, fragile, min_support):
+    outside = [index for index, (corner, dims) in enumerate(boxes) if _outside(corner, dims, space)]
+    valid = [index for index in range(len(boxes)) if min(boxes[index][1]) > 0]
+    pairs = sorted((valid[i], valid[j]) for i, j in _overlap_pairs([boxes[index] for index in valid]))
+
+    unsupported = []
+    for index in valid:
+        (_, y, _), (dx, _, dz) = boxes[index]
+        if y <= EPS:
+            continue
+        area = sum(_footprint_overlap(boxes[index], boxes[other]) for other in valid
+                   if other != index and abs(boxes[other][0][1] + boxes[other][1][1] - y) <= EPS)
+        if area < dx * dz * min_support - EPS:
+            unsupported.append(index)
+
+    loaded = []
+    for index in valid:
+        if not fragile[index]:
+            continue
+        top = boxes[index][0][1] + boxes[index][1][1]
+        if any(other != index and boxes[other][0][1] >= top - EPS and _footprint_overlap(boxes[index], boxes[other])
+               for other in valid):
+            loaded.append(index)
+
+    volume = 0.0
+    moment = [0.0, 0.0, 0.0]
+    for index in valid:
+        corner, dims = boxes[index]
+        box_volume = dims[0] * dims[1] * dims[2]
+        volume += box_volume
+        for axis in range(3):
+            moment[axis] += box_volume * (corner[axis] + dims[axis] / 2)
+    center = [value / volume for value in moment] if volume > 0 else None
+    return pairs, outside, unsupported, loaded, volume, center
+
+
+def _cells(lo, hi, cell):
+    """每个物品覆盖的网格格子范围（含两端）"""
+    first = np.floor(lo / cell).astype(np.int64)
+    last = np.maximum(np.floor((hi - EPS) / cell).astype(np.int64), first)
+    return first, last
+
+
+def _entries(lo, hi, cell, origin, shape, groups):
+    """把每个物品登记到它覆盖的每个格子，返回按格子编号排序的 (格子编号, 物品下标)"""
+    first, last = _cells(lo, hi, cell)
+    counts = last - first + 1
+    per_box = counts.prod(axis=1)
+    owners = np.repeat(np.arange(len(lo)), per_box)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(per_box) - per_box, per_box)
+    keys = np.repeat(groups, per_box)
+    for axis in range(lo.shape[1]):
+        step = counts[owners, axis]
+        keys = keys * shape[axis] + first[owners, axis] - origin[axis] + offsets % step
+        offsets = offsets // step
+    order = np.argsort(keys, kind='stable')
+    return keys[order], owners[order]
+
+
+def _pairs(lo_a, hi_a, lo_b, hi_b, cell, groups_a=None, groups_b=None, same=False):
+    """
+    a 中的物品与 b 中的物品在每个轴上都严格相交（超过 EPS）、并且分组编号相同的全部 (i, j)
+    两个物品只在相交区域最小角所在的格子里计数一次；same 为 True 时 a、b 是同一组物品，只返回 i < j
+    """
+    empty = np.empty(0, dtype=np.int64)
+    if not len(lo_a) or not len(lo_b):
+        return empty, empty
+    if groups_a is None:
+        groups_a = np.zeros(len(lo_a), dtype=np.int64)
+        groups_b = np.zeros(len(lo_b), dtype=np.int64)
+    first_a, last_a = _cells(lo_a, hi_a, cell)
+    first_b, last_b = _cells(lo_b, hi_b, cell)
+    origin = np.minimum(first_a.min(axis=0), first_b.min(axis=0))
+    shape = np.maximum(last_a.max(axis=0), last_b.max(axis=0)) - origin + 1
+    keys_a, owners_a = _entries(lo_a, hi_a, cell, origin, shape, groups_a)
+    keys_b, owners_b = _entries(lo_b, hi_b, cell, origin, shape, groups_b)
+
+    starts = np.searchsorted(keys_b, keys_a, side='left')
+    counts = np.searchsorted(keys_b, keys_a, side='right') - starts
+    cumulative = np.cumsum(counts)
+    found_a = [empty]
+    found_b = [empty]
+    # 同一格子里的物品两两展开，每批不超过 PAIR_BATCH 对
+    begin = 0
+    while begin < len(counts):
+        done = cumulative[begin - 1] if begin else 0
+        end = max(begin + 1, int(np.searchsorted(cumulative, done + PAIR_BATCH, side='right')))
+        batch = counts[begin:end]
+        positions = np.arange(batch.sum()) - np.repeat(np.cumsum(batch) - batch, batch) + np.repeat(starts[begin:end], batch)
+        i = np.repeat(owners_a[begin:end], batch)
+        j = owners_b[positions]
+        key = np.repeat(keys_a[begin:end], batch)
+        begin = end
+        keep = (lo_a[i] < hi_b[j] - EPS).all(axis=1) & (lo_b[j] < hi_a[i] - EPS).all(axis=1)
+        if same:
+            keep &= i < j
+        i, j, key = i[keep], j[keep], key[keep]
+        # 相交区域最小角所在的格子
+        corner = np.floor(np.maximum(lo_a[i], lo_b[j]) / cell).astype(np.int64)
+        home = groups_a[i]
+        for axis in range(lo_a.shape[1]):
+            home = home * shape[axis] + corner[:, axis] - origin[axis]
+        keep = home == key
+        found_a.append(i[keep])
+        found_b.append(j[keep])
+    return np.concatenate(found_a), np.concatenate(found_b)
+
+
+def _validate_numpy(boxes, space, fragile, min_support):
+    data = np.asarray(boxes, dtype=float).reshape(-1, 6)
+    lo, size = data[:, :3], data[:, 3:]
+    hi = lo + size
+    limit = np.asarray(space, dtype=float)
+    outside = ~((size > 0).all(axis=1) & (lo >= -EPS).all(axis=1) & (hi <= limit + EPS).all(axis=1))
+
+    valid = np.flatnonzero((size > 0).all(axis=1))
+    lo, hi, size = lo[valid], hi[valid], size[valid]
+    fragile = np.asarray(fragile, dtype=bool)[valid]
+    # 格子边长取各轴尺寸的中位数，每个格子里只有少数几个物品
+    cell = np.maximum(np.median(size, axis=0), EPS) if len(valid) else np.ones(3)
+
+    first, second = _pairs(lo, hi, lo, hi, cell, same=True)
+    swap = valid[first] > valid[second]
+    pairs = np.stack([np.where(swap, valid[second], valid[first]), np.where(swap, valid[first], valid[second])], axis=1)
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))] if len(pairs) else pairs
+
+    # 支撑：底面高度与顶面高度按 EPS 取整后分组匹配，相邻的组也参与匹配，再按实际高度差筛选
+    flat = [0, 2]
+    raised = np.flatnonzero(lo[:, 1] > EPS)
+    bottom_levels = np.round(lo[raised, 1] / EPS).astype(np.int64)
+    bottoms = np.tile(raised, 3)
+    levels = np.concatenate([np.round(hi[:, 1] / EPS).astype(np.int64),
+                             bottom_levels - 1, bottom_levels, bottom_levels + 1])
+    _, levels = np.unique(levels, return_inverse=True)
+    below, above = _pairs(lo[:, flat], hi[:, flat], lo[bottoms][:, flat], hi[bottoms][:, flat], cell[flat],
+                          levels[:len(lo)], levels[len(lo):])
+    above = bottoms[above]
+    touching = np.abs(hi[below, 1] - lo[above, 1]) <= EPS
+    below, above = below[touching], above[touching]
+    contact = ((np.minimum(hi[below][:, flat], hi[above][:, flat]) - np.maximum(lo[below][:, flat], lo[above][:, flat]))
+               .prod(axis=1))
+    area = np.bincount(above, weights=contact, minlength=len(lo))
+    base = size[:, 0] * size[:, 2]
+    unsupported = np.flatnonzero((lo[:, 1] > EPS) & (area < base * min_support - EPS))
+
+    # 易碎品：水平投影相交、底面不低于易碎品顶面的物品都算压在上面
+    breakable = np.flatnonzero(fragile)
+    under, over = _pairs(lo[breakable][:, flat], hi[breakable][:, flat], lo[:, flat], hi[:, flat], cell[flat])
+    on_top = lo[over, 1] >= hi[breakable[under], 1] - EPS
+    loaded = np.unique(breakable[under[on_top]])
+
+    volumes = size.prod(axis=1)
+    volume = float(volumes.sum())
+    center = ((lo + size / 2) * volumes[:, None]).sum(axis=0) / volume if volume > 0 else None
+    return (pairs.tolist(), np.flatnonzero(outside).tolist(), valid[unsupported].tolist(), valid[loaded].tolist(),
+            volume, center.tolist() if center is not None else None)
+
+
+def validate(boxes, space, fragile=None, min_support=MIN_SUPPORT_RATIO, use_numpy=None):
+    """
+    检查一个容器里的布局并计算指标
+    fragile 为与 boxes 对应的是否易碎，不传时都不是易碎品；use_numpy 为 None 时有 NumPy 就使用
+    返回 {'items', 'overlaps', 'out_of_bounds', 'unsupported', 'fragile_loaded', 'valid',
+          'utilization', 'center_of_gravity', 'details'}，
+    details 列出每类违规的物品下标（重叠为下标对），每类最多 DETAIL_LIMIT 个
+    """
+    boxes = list(boxes)
+    fragile = list(fragile) if fragile is not None else [False] * len(boxes)
+    if use_numpy is None:
+        use_numpy = np is not None
+    check = _validate_numpy if use_numpy and boxes else _validate_python
+    pairs, outside, unsupported, loaded, volume, center = check(boxes, space, fragile, min_support)
+
+    capacity = space[0] * space[1] * space[2]
+    result = {
+        'items': len(boxes),
+        'overlaps': len(pairs),
+        'out_of_bounds': len(outside),
+        'unsupported': len(unsupported),
+        'fragile_loaded': len(loaded),
+        'utilization': volume / capacity if capacity > 0 else 0.0,
+        'center_of_gravity': dict(zip('xyz', center)) if center is not None else None,
+        'details': {
+            'overlaps': [list(pair) for pair in pairs[:DETAIL_LIMIT]],
+            'out_of_bounds': outside[:DETAIL_LIMIT],
+            'unsupported': unsupported[:DETAIL_LIMIT],
+            'fragile_loaded': loaded[:DETAIL_LIMIT],
+        },
+    }
+    result['valid'] = not (pairs or outside or unsupported or loaded)
+    return result
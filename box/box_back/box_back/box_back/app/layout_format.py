@@ -0,0 +1,151 @@
+# box_back/box_back/app/layout_format.py
+"""
+任务布局的紧凑二进制格式（列式）
+
+给只需要渲染三维布局的客户端用，内容是任务 id、空间尺寸和全部物品，与 TaskSerializer 的
+items 一一对应（顺序相同），但不再为每个物品重复字段名和嵌套字典。
+请求头 Accept: application/vnd.box.layout 或查询参数 ?format=layout 时由 get_task 返回。
+
+所有数值为小端序，依次为：
+    头部        magic 'BOXL'、版本 u16、保留 u16、任务 id u64、物品数 n u32、名称数 m u32、空间 x/y/z f32
+    order_id    n 个 i32
+    名称下标    n 个 u32，指向名称表
+    位置        x 列、y 列、z 列，各 n 个 f32
+    尺寸        x 列、y 列、z 列，各 n 个 f32
+    标志位      face_up 位图、fragile 位图，各 ceil(n / 8) 字节，第 i 个物品在第 i // 8 字节的第 i % 8 位
+    名称表      m + 1 个 u32 偏移，之后是所有名称的 UTF-8 字节
+坐标和尺寸按 float32 存放，解码后与数据库中的值可能有 float32 精度的误差。
+"""
+import struct
+import sys
+from array import array
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .encoders import ITEM_COLUMNS
+
+MAGIC = b'BOXL'
+VERSION = 1
+MEDIA_TYPE = 'application/vnd.box.layout'
+
+_HEADER = struct.Struct('<4sHHQII3f')
+
+
+def _column(typecode, values):
+    column = array(typecode, values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+
+def _read_column(typecode, data, offset, count):
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    if end > len(data):
+        raise ValueError("Layout data is truncated")
+    column.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column, end
+
+
+def _bits(flags):
+    packed = bytearray((len(flags) + 7) // 8)
+    for index, flag in enumerate(flags):
+        if flag:
+            packed[index >> 3] |= 1 << (index & 7)
+    return bytes(packed)
+
+
+def encode_layout(task_id, space, rows):
+    """rows 为按 ITEM_COLUMNS 顺序的列元组，space 为 (x, y, z)"""
+    rows = list(rows)
+    columns = list(zip(*rows)) if rows else [()] * len(ITEM_COLUMNS)
+    order_id, names, px, py, pz, width, height, depth, face_up, fragile = columns
+
+    # 重复的名称只存一次
+    table = {}
+    name_index = [table.setdefault(name, len(table)) for name in names]
+    blobs = [name.encode() for name in table]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    return b''.join([
+        _HEADER.pack(MAGIC, VERSION, 0, task_id, len(rows), len(table), *space),
+        _column('i', order_id),
+        _column('I', name_index),
+        _column('f', px), _column('f', py), _column('f', pz),
+        _column('f', width), _column('f', height), _column('f', depth),
+        _bits(face_up),
+        _bits(fragile),
+        _column('I', offsets),
+        b''.join(blobs),
+    ])
+
+
+def encode_task_layout(task):
+    rows = task.items.order_by().values_list(*ITEM_COLUMNS)
+    return encode_layout(task.id, (task.space_x, task.space_y, task.space_z), rows)
+
+
+def decode_layout(data):
+    """
+    解码为 {'id', 'space_info', 'items'}，items 的结构与 ItemSerializer 相同
+    数据不完整或格式不对时抛出 ValueError
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Layout data is truncated")
+    magic, version, _, task_id, count, name_count, sx, sy, sz = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a task layout")
+
+    offset = _HEADER.size
+    order_id, offset = _read_column('i', data, offset, count)
+    name_index, offset = _read_column('I', data, offset, count)
+    floats = []
+    for _ in range(6):
+        column, offset = _read_column('f', data, offset, count)
+        floats.append(column)
+    px, py, pz, width, height, depth = floats
+    flag_size = (count + 7) // 8
+    if offset + 2 * flag_size > len(data):
+        raise ValueError("Layout data is truncated")
+    face_up = data[offset:offset + flag_size]
+    fragile = data[offset + flag_size:offset + 2 * flag_size]
+    offset += 2 * flag_size
+    offsets, offset = _read_column('I', data, offset, name_count + 1)
+    if offset + offsets[-1] > len(data):
+        raise ValueError("Layout data is truncated")
+    names = [bytes(data[offset + offsets[i]:offset + offsets[i + 1]]).decode() for i in range(name_count)]
+    if name_index and max(name_index) >= name_count:
+        raise ValueError("Layout name index out of range")
+
+    items = []
+    for i in range(count):
+        bit = 1 << (i & 7)
+        items.append({
+            'order_id': order_id[i],
+            'name': names[name_index[i]],
+            'position': {'x': px[i], 'y': py[i], 'z': pz[i]},
+            'dimensions': {'x': width[i], 'y': height[i], 'z': depth[i]},
+            'face_up': bool(face_up[i >> 3] & bit),
+            'fragile': bool(fragile[i >> 3] & bit),
+        })
+    return {'id': task_id, 'space_info': {'x': sx, 'y': sy, 'z': sz}, 'items': items}
+
+
+class LayoutRenderer(BaseRenderer):
+    """
+    让 DRF 的内容协商识别布局格式；视图直接返回编码好的字节。
+    错误信息等字典数据仍按 JSON 输出，客户端应先检查状态码。
+    """
+    media_type = MEDIA_TYPE
+    format = 'layout'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return JSONRenderer().render(data)
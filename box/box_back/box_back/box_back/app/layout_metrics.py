@@ -0,0 +1,86 @@
+# box_back/box_back/app/layout_metrics.py
+"""
+任务布局的检查结果和质量指标（layout_check.validate）
+
+装箱完成后（create_task、多容器任务、后台任务和增量修改）用内存里的摆放结果检查一次，
+违规总数记录在 Task.violations；/api/tasks/<id>/metrics/ 从数据库读出布局重新计算完整的指标。
+多容器任务按容器分别检查，物品坐标相对于各自容器的原点；details 中的物品用 order_id 表示。
+"""
+from . import layout_check
+from .models import Item
+
+# 计入 Task.violations 的检查项
+VIOLATIONS = ('overlaps', 'out_of_bounds', 'unsupported', 'fragile_loaded')
+
+
+def _space(task):
+    return (task.space_x, task.space_y, task.space_z)
+
+
+def _summarize(groups, space):
+    """
+    groups 为 {容器下标（单容器为 None）: [(order_id, 最小角坐标, 尺寸, 是否易碎), ...]}
+    返回整体的指标，多容器时另外列出每个容器的指标
+    """
+    containers = []
+    groups = groups or {None: []}
+    for index in sorted(groups, key=lambda key: -1 if key is None else key):
+        rows = groups[index]
+        result = layout_check.validate([(corner, dims) for _, corner, dims, _ in rows], space,
+                                       [fragile for _, _, _, fragile in rows])
+        order_ids = [order_id for order_id, _, _, _ in rows]
+        details = result['details']
+        details['overlaps'] = [[order_ids[i], order_ids[j]] for i, j in details['overlaps']]
+        for name in VIOLATIONS[1:]:
+            details[name] = [order_ids[i] for i in details[name]]
+        if index is not None:
+            result = dict(index=index, **result)
+        containers.append(result)
+
+    summary = {name: sum(result[name] for result in containers) for name in ('items',) + VIOLATIONS}
+    summary['valid'] = all(result['valid'] for result in containers)
+    if len(containers) == 1 and 'index' not in containers[0]:
+        summary.update(utilization=containers[0]['utilization'], center_of_gravity=containers[0]['center_of_gravity'],
+                       details=containers[0]['details'])
+    else:
+        summary['utilization'] = (sum(result['utilization'] for result in containers) / len(containers)
+                                  if containers else 0.0)
+        summary['containers'] = containers
+    return summary
+
+
+def violations(summary):
+    return sum(summary[name] for name in VIOLATIONS)
+
+
+def of_boxes(boxes, space):
+    """单容器的 [(order_id, 最小角坐标, 尺寸, 是否易碎), ...]"""
+    return _summarize({None: list(boxes)}, space)
+
+
+def of_placed(placed_items, space):
+    """检查 place_items / pack_containers 的摆放结果"""
+    groups = {}
+    for p in placed_items:
+        groups.setdefault(p.get('container'), []).append((
+            p['order_id'],
+            (p['position']['x'], p['position']['y'], p['position']['z']),
+            (p['dimensions']['x'], p['dimensions']['y'], p['dimensions']['z']),
+            bool(p.get('fragile', False)),
+        ))
+    return _summarize(groups, space)
+
+
+def of_rows(rows, space):
+    """rows 为 (容器下标, order_id, x, y, z, dx, dy, dz, 是否易碎) 的序列"""
+    groups = {}
+    for index, order_id, x, y, z, dx, dy, dz, fragile in rows:
+        groups.setdefault(index, []).append((order_id, (x, y, z), (dx, dy, dz), fragile))
+    return _summarize(groups, space)
+
+
+def of_task(task):
+    """从数据库读出任务的布局并检查，物品按列元组读取"""
+    rows = Item.objects.filter(task=task).order_by('order_id', 'id').values_list(
+        'container__index', 'order_id', 'position_x', 'position_y', 'position_z', 'width', 'height', 'depth', 'fragile')
+    return of_rows(rows, _space(task))
@@ -0,0 +1,48 @@
+# box_back/box_back/app/management/commands/benchmark_algorithms.py
+"""
+对算法版本运行基准并输出排名
+
+    python manage.py benchmark_algorithms                      # 内置算法和所有上传的版本
+    python manage.py benchmark_algorithms --algorithm builtin --algorithm 3 --repeats 10
+    python manage.py benchmark_algorithms --recorded 20        # 加入最近 20 个已完成任务
+结果保存为 AlgorithmBenchmark，/api/algorithm/leaderboard/ 返回同样的排名。
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import algorithm_bench, algorithms
+from ...models import AlgorithmVersion
+
+
+class Command(BaseCommand):
+    help = "Benchmark packing algorithm versions on a fixed corpus and print a leaderboard"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--algorithm', action='append', dest='versions',
+                            help="Algorithm version id or 'builtin'; may be repeated. Defaults to all versions.")
+        parser.add_argument('--repeats', type=int, default=5, help="Timed runs per item set")
+        parser.add_argument('--recorded', type=int, default=0, help="Also use the N most recent finished tasks")
+        parser.add_argument('--no-save', action='store_true', help="Do not store the results")
+
+    def handle(self, *args, **options):
+        if options['repeats'] < 1:
+            raise CommandError("--repeats must be at least 1")
+        if options['versions']:
+            try:
+                versions = [algorithms.resolve(value) for value in options['versions']]
+            except (AlgorithmVersion.DoesNotExist, ValueError):
+                raise CommandError("Unknown algorithm version")
+        else:
+            versions = [None] + list(AlgorithmVersion.objects.order_by('id'))
+
+        corpus_key, cases = algorithm_bench.corpus(options['recorded'])
+        self.stdout.write(f"Corpus {corpus_key}: " + ', '.join(f"{case.name} ({len(case.items)})" for case in cases))
+        results = algorithm_bench.run(versions, corpus_key, cases, options['repeats'], save=not options['no_save'])
+
+        self.stdout.write(f"{'rank':>4} {'version':>8} {'fill':>6} {'p50 ms':>9} {'p95 ms':>9} {'peak KB':>9} {'violations':>10}")
+        for position, result in enumerate(algorithm_bench.rank(results), 1):
+            version = result.algorithm_id or algorithms.BUILTIN
+            self.stdout.write(f"{position:>4} {version:>8} {result.fill_ratio:>6.3f} {result.p50_ms:>9.1f} "
+                              f"{result.p95_ms:>9.1f} {result.peak_memory_kb:>9.0f} {result.violations:>10}")
+            for detail in result.cases:
+                if 'error' in detail:
+                    self.stdout.write(self.style.ERROR(f"     {detail['case']}: {detail['error']}"))
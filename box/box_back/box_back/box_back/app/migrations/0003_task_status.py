@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_rename_item_id_item_order_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='done', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='order_id',
+            field=models.IntegerField(),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_task_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['task', 'order_id', 'id'], name='app_item_task_id_62ad9c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['creator', 'created_at', 'id'], name='app_task_creator_7aa907_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['worker', 'created_at', 'id'], name='app_task_worker__678df1_idx'),
+        ),
+    ]
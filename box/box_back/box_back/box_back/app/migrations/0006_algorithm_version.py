@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_task_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlgorithmVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, default='', max_length=100)),
+                ('source', models.TextField()),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('is_active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='algorithm',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='tasks', to='app.algorithmversion'),
+        ),
+    ]
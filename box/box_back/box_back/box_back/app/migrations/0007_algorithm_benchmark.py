@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_algorithm_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlgorithmBenchmark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corpus', models.CharField(max_length=100)),
+                ('repeats', models.PositiveIntegerField()),
+                ('fill_ratio', models.FloatField()),
+                ('p50_ms', models.FloatField()),
+                ('p95_ms', models.FloatField()),
+                ('peak_memory_kb', models.FloatField()),
+                ('violations', models.PositiveIntegerField()),
+                ('cases', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('algorithm', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='benchmarks', to='app.algorithmversion')),
+            ],
+        ),
+    ]
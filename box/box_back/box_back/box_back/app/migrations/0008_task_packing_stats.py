@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_algorithm_benchmark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='fill_ratio',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='iterations',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_task_packing_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayoutCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('layout', models.JSONField()),
+                ('fill_ratio', models.FloatField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('last_used', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
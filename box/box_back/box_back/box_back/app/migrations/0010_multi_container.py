@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_layout_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Container',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('fill_ratio', models.FloatField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='containers', to='app.task')),
+            ],
+            options={
+                'ordering': ['index'],
+            },
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='container',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='app.container'),
+        ),
+        migrations.AddConstraint(
+            model_name='container',
+            constraint=models.UniqueConstraint(fields=('task', 'index'), name='unique_task_container_index'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_multi_container'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='violations',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
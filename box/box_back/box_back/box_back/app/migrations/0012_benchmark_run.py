@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_task_violations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BenchmarkRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('corpus', models.CharField(max_length=100)),
+                ('repeats', models.PositiveIntegerField()),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='algorithmbenchmark',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='results', to='app.benchmarkrun'),
+        ),
+    ]
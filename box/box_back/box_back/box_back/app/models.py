@@ -16,8 +16,29 @@ class User(models.Model):
     def check_password(self, password):
         return check_password(password, self.password_hash)
 
+class AlgorithmVersion(models.Model):
+    """上传的装箱算法，每次上传保存为一个不可变的版本"""
+    name = models.CharField(max_length=100, blank=True, default='')
+    source = models.TextField()  # 算法文件内容，保存后不再修改
+    sha256 = models.CharField(max_length=64, unique=True)  # 内容相同的文件只保存一次
+    is_active = models.BooleanField(default=False)  # 全局使用的版本，最多一个；没有时使用内置算法
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Algorithm v{self.id} {self.name}".rstrip()
+
 class Task(models.Model):
     """任务表，直接包含空间信息和物品"""
+    # 装箱状态：异步创建的任务在后台计算完成前为 pending
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     # 创建者与工人
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_tasks')
     worker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assigned_tasks', null=True, blank=True)
@@ -29,10 +50,37 @@ class Task(models.Model):
     
     # 创建时间
     created_at = models.DateTimeField(auto_now_add=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_DONE)
+    error = models.TextField(blank=True, default='')  # 后台装箱失败时的错误信息
+    revision = models.PositiveIntegerField(default=0)  # 任务或物品每次变化加一，用于结果缓存和 ETag
+    # 装箱结果：装填率和按时间预算改进的迭代次数（之前的任务为空）
+    fill_ratio = models.FloatField(null=True, blank=True)
+    iterations = models.PositiveIntegerField(null=True, blank=True)
+    # 装箱后布局检查发现的重叠、越界、支撑不足和易碎品受压的总数（之前的任务为空）
+    violations = models.PositiveIntegerField(null=True, blank=True)
+    # 计算布局所用的算法版本，为空表示内置算法
+    algorithm = models.ForeignKey(AlgorithmVersion, on_delete=models.PROTECT, related_name='tasks', null=True, blank=True)
+    
+    class Meta:
+        # 任务列表按 (created_at, id) 做游标分页
+        indexes = [
+            models.Index(fields=['creator', 'created_at', 'id']),
+            models.Index(fields=['worker', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Task {self.id} by {self.creator.name}"
     
+    def save(self, *args, **kwargs):
+        # revision 只由 task_cache.touch 在数据库里加一；更新已有任务时不写回实例上可能已经过期的 revision
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'revision'
+            ]
+        super().save(*args, **kwargs)
+    
     @property
     def space_info(self):
         """返回空间信息的字典形式"""
@@ -42,6 +90,21 @@ class Task(models.Model):
             'z': self.space_z
         }
 
+class Container(models.Model):
+    """多容器任务中的一个容器，尺寸都与任务的空间相同；单容器任务没有这张表的记录"""
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='containers')
+    index = models.PositiveIntegerField()  # 从 0 开始，按装填率从高到低
+    fill_ratio = models.FloatField()
+    
+    class Meta:
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'index'], name='unique_task_container_index'),
+        ]
+    
+    def __str__(self):
+        return f"Container {self.index} of task {self.task_id}"
+
 class Item(models.Model):
     """物品表，关联到任务"""
     # 基本信息
@@ -64,6 +127,14 @@ class Item(models.Model):
     
     # 关联任务
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='items')
+    # 多容器任务中所在的容器，位置相对于该容器的原点；单容器任务为空
+    container = models.ForeignKey(Container, on_delete=models.CASCADE, related_name='items', null=True, blank=True)
+    
+    class Meta:
+        # 物品按 (order_id, id) 分页读取
+        indexes = [
+            models.Index(fields=['task', 'order_id', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.order_id}: {self.name}"
@@ -75,3 +146,55 @@ class Item(models.Model):
     @property
     def dimensions(self):
         return {'x': self.width, 'y': self.height, 'z': self.depth}
+
+class BenchmarkRun(models.Model):
+    """POST /api/algorithm/leaderboard/ 提交的一次算法基准，在后台进程池里运行"""
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    corpus = models.CharField(max_length=100)
+    repeats = models.PositiveIntegerField()
+    error = models.TextField(blank=True, default='')  # 后台运行失败时的错误信息
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Benchmark run {self.id} ({self.status})"
+
+class AlgorithmBenchmark(models.Model):
+    """算法基准的一次运行结果，由 algorithm_bench 生成"""
+    algorithm = models.ForeignKey(AlgorithmVersion, on_delete=models.CASCADE, related_name='benchmarks', null=True, blank=True)  # 为空表示内置算法
+    run = models.ForeignKey(BenchmarkRun, on_delete=models.CASCADE, related_name='results', null=True, blank=True)  # 为空表示由命令行运行
+    corpus = models.CharField(max_length=100)  # 语料标识，只有相同语料的结果可以比较
+    repeats = models.PositiveIntegerField()
+    
+    # 汇总指标：装填率为各组平均值，耗时为各组之和，内存为各组最大值
+    fill_ratio = models.FloatField()
+    p50_ms = models.FloatField()
+    p95_ms = models.FloatField()
+    peak_memory_kb = models.FloatField()
+    violations = models.PositiveIntegerField()  # 重叠、越界和运行出错的总数
+    
+    cases = models.JSONField()  # 每组物品的明细
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Benchmark {self.id} of {self.algorithm or 'builtin'}"
+
+class LayoutCacheEntry(models.Model):
+    """create_task 的布局缓存，由 layout_cache 读写"""
+    key = models.CharField(max_length=64, unique=True)  # 空间、物品多重集合、算法和选项的 sha256
+    layout = models.JSONField()  # [[规范顺序中的下标, x, y, z, dx, dy, dz], ...]，按装载顺序
+    fill_ratio = models.FloatField()
+    hits = models.PositiveIntegerField(default=0)
+    last_used = models.DateTimeField(db_index=True)  # 超过条目上限时删除最久没用过的
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Layout {self.key[:12]}"
@@ -1,31 +1,566 @@
-# box_back/box_back/app/packing_algorithm.py
-
-def place_items(items_data, space_dimensions):
-    placed_items = []
-    current_x = 0
-    
-    for index, item in enumerate(items_data):
-        order_id = index + 1
-        
-        dimensions = item['dimensions']
-        
-        position = {
-            'x': current_x,
-            'y': 2,
-            'z': 2
-        }
-        
-        current_x += dimensions['x']
-        
-        placed_item = {
-            'order_id': order_id,
-            'name': item['name'],
-            'position': position,
-            'dimensions': dimensions,
-            'face_up': item.get('face_up', False),
-            'fragile': item.get('fragile', False)
-        }
-        
-        placed_items.append(placed_item)
-    
-    return placed_items
\ No newline at end of file
+# box_back/box_back/app/packing_algorithm.py
+"""
+三维装箱算法：空闲空间切分（guillotine）启发式
+
+输入输出格式与 create_task / TaskSerializer 约定保持一致：
+    items_data:       [{'name': str, 'dimensions': {'x', 'y', 'z'}, 'face_up': bool, 'fragile': bool}, ...]
+    space_dimensions: {'x', 'y', 'z'}
+返回按装载顺序排列的物品列表，每个物品带有 order_id、position（物品最小角坐标）和 dimensions。
+
+容器里还空着的部分是一组互不重叠的长方体（空闲空间），每个空间的底面整块落在地面或箱子顶面上。
+每个物品由 candidate_scoring 对所有 (空闲空间, 摆放方向) 统一打分，放进最好的空间的最小角，
+再把这个空间剩下的部分切成物品上方和两侧的新空间。空间之间不重叠，新物品不需要再和已摆放的箱子比较。
+普通物品可以有 6 种摆放方向，face_up 物品只能绕竖直轴旋转（2 种）。
+所有允许的方向一起打分，同样好时输入方向优先。
+易碎品排在最后装，并且上方整列都不允许再放物品。
+
+坐标约定与前端一致：y 轴竖直向上，物品从地面 (y=0) 开始堆放。
+空间放不下的物品不会出现在返回结果里。
+
+pack_anytime 在给定的时间预算内反复改变装载顺序重新装箱，保留装入体积最大的结果。
+pack_multistart 用多个随机种子各运行一次 pack_anytime（可以分给进程池并行），取其中最好的结果。
+pack_containers 把物品装进尽量少的同尺寸容器，每个容器内的坐标都从该容器的原点算起。
+"""
+import heapq
+import math
+import random
+import time
+
+from .candidate_scoring import FreeSpaces
+from .spatial_index import EPS
+
+# 物品底面至少要有这个比例压在地面或其他物品顶面上
+MIN_SUPPORT_RATIO = 0.75
+
+# pack_anytime 的搜索参数：随机重启时体积排序键的扰动幅度和换起始方向的物品比例，
+# 局部搜索每次交换的次数和两个位置的最大距离
+RESTART_NOISE = 0.3
+RESTART_ROTATE = 0.1
+LOCAL_SWAPS = 3
+SWAP_DISTANCE = 10
+
+# pack_containers 每组物品的总体积为容器容积的这个倍数：物品多于容器装得下的，
+# 装箱时才有小件填补大件之间的空隙，每个容器都能装得和单独装箱时一样满
+CONTAINER_OVERSUPPLY = 1.6
+
+
+class _Packer:
+    """保存空闲空间，逐个为物品寻找位置"""
+
+    def __init__(self, space):
+        self.space = space
+        self.spaces = FreeSpaces(space)
+        self.spaces.add([(0.0, 0.0, 0.0) + space])
+        # 上一次清理空闲空间时剩余物品的最小尺寸
+        self.min_dims = None
+
+    def place(self, orientations, min_dims, fragile):
+        """在所有空闲空间和允许的方向中选最好的一个摆放，返回 (最小角坐标, 摆放尺寸)"""
+        spaces = self.spaces
+        if min_dims != self.min_dims:
+            # 剩余物品都放不进去的空间可以直接丢弃
+            spaces.prune(min_dims)
+            self.min_dims = min_dims
+        chosen = spaces.best(orientations, column=fragile)
+        if chosen is None:
+            return None
+        index, position = chosen
+        dims = orientations[position]
+        x0, y0, z0, x1, y1, z1 = spaces.rows[index]
+        w, h, d = dims
+        spaces.remove([index])
+
+        pieces = []
+        # 易碎品上方整列都不再放物品，不留顶部空间
+        if not fragile and y1 - (y0 + h) > EPS:
+            pieces.append((x0, y0 + h, z0, x0 + w, y1, z0 + d))
+        # 剩下的 L 形底面切成两块，较大的一侧保留完整的宽度
+        if (x1 - x0 - w) * (z1 - z0) >= (z1 - z0 - d) * (x1 - x0):
+            pieces.append((x0 + w, y0, z0, x1, y1, z1))
+            pieces.append((x0, y0, z0 + d, x0 + w, y1, z1))
+        else:
+            pieces.append((x0, y0, z0 + d, x1, y1, z1))
+            pieces.append((x0 + w, y0, z0, x1, y1, z0 + d))
+        self.add(pieces)
+        return (x0, y0, z0), dims
+
+    def add(self, pieces):
+        """登记新的空闲空间，没有体积或剩余物品放不进的不登记"""
+        low = self.min_dims or (0.0, 0.0, 0.0)
+        self.spaces.add([piece for piece in pieces if all(
+            piece[axis + 3] - piece[axis] > EPS and piece[axis + 3] - piece[axis] >= low[axis] - EPS
+            for axis in range(3))])
+
+    def seed(self, boxes):
+        """登记已经摆放好的 (最小角坐标, 尺寸, 是否易碎)，与箱子重叠的空闲空间切掉箱子占用的部分"""
+        spaces = self.spaces
+        for (x, y, z), (w, h, d), fragile in boxes:
+            # 易碎品上方整列都算占用
+            box = (x, y, z, x + w, self.space[1] if fragile else y + h, z + d)
+            for index in spaces.overlapping(box):
+                row = spaces.rows[index]
+                spaces.remove([index])
+                self.add(_carve(row, box))
+
+
+def _carve(row, box):
+    """
+    空间 row 去掉 box 后剩下的部分，切成互不重叠的长方体：
+    先沿 x 切出 box 两侧，再在 box 的 x 范围内沿 z 切，最后在 box 的水平投影内切出下方和上方
+    """
+    x0, y0, z0, x1, y1, z1 = row
+    bx0, by0, bz0 = max(x0, box[0]), max(y0, box[1]), max(z0, box[2])
+    bx1, by1, bz1 = min(x1, box[3]), min(y1, box[4]), min(z1, box[5])
+    return [
+        (x0, y0, z0, bx0, y1, z1),
+        (bx1, y0, z0, x1, y1, z1),
+        (bx0, y0, z0, bx1, y1, bz0),
+        (bx0, y0, bz1, bx1, y1, z1),
+        (bx0, y0, bz0, bx1, by0, bz1),
+        (bx0, by1, bz0, bx1, y1, bz1),
+    ]
+
+
+def orientations(dims, face_up):
+    """允许的摆放尺寸，输入方向排在最前：普通物品 6 种，face_up 物品只能绕竖直轴旋转；重复的尺寸只保留一个"""
+    x, y, z = dims
+    if face_up:
+        candidates = ((x, y, z), (z, y, x))
+    else:
+        candidates = ((x, y, z), (z, y, x), (x, z, y), (y, z, x), (y, x, z), (z, x, y))
+    allowed = []
+    for candidate in candidates:
+        if candidate not in allowed:
+            allowed.append(candidate)
+    return tuple(allowed)
+
+
+def _sort_key(entry):
+    dims = entry[1]
+    # 易碎品最后装，放在其他物品上面
+    return (entry[3], -(dims[0] * dims[1] * dims[2]), -max(dims), sorted(dims), entry[2])
+
+
+def _entries(items_data, rotate):
+    entries = []
+    for index, item in enumerate(items_data):
+        dimensions = item['dimensions']
+        dims = (float(dimensions['x']), float(dimensions['y']), float(dimensions['z']))
+        allowed = orientations(dims, item.get('face_up', False)) if rotate else (dims,)
+        entries.append((index, dims, allowed, bool(item.get('fragile', False))))
+    return entries
+
+
+def _dominated(dims, failed):
+    return any(dims[0] >= f[0] - EPS and dims[1] >= f[1] - EPS and dims[2] >= f[2] - EPS for f in failed)
+
+
+def _add_failed(failed, dims):
+    """failed 只保留互不包含的最小尺寸，检查的代价与失败物品的数量无关"""
+    if _dominated(dims, failed):
+        return
+    failed[:] = [f for f in failed if not (f[0] >= dims[0] - EPS and f[1] >= dims[1] - EPS and f[2] >= dims[2] - EPS)]
+    failed.append(dims)
+
+
+class _Expired(Exception):
+    """_pack 超过 deadline，args 为到这时已经摆放的 (摆放结果, 装入的总体积)"""
+
+
+def _pack(entries, items_data, space, deadline=None, existing=(), first_order_id=1):
+    """
+    按 entries 的顺序逐个摆放，返回 (摆放结果, 装入的总体积)
+    超过 deadline（time.perf_counter() 的时刻）时抛出 _Expired；每 32 个物品检查一次，前 32 个总会尝试
+    existing 为已经占用的 (最小角坐标, 尺寸, 是否易碎)，新物品的 order_id 从 first_order_id 开始
+    """
+    # 剩余物品在每个轴上的最小尺寸（考虑所有允许的方向），用来清理已经没用的空闲空间
+    suffix_min = [None] * len(entries)
+    current = (math.inf, math.inf, math.inf)
+    for position in range(len(entries) - 1, -1, -1):
+        for dims in entries[position][2]:
+            current = (min(current[0], dims[0]), min(current[1], dims[1]), min(current[2], dims[2]))
+        suffix_min[position] = current
+
+    packer = _Packer(space)
+    packer.seed(existing)
+    # 放不下的方向，易碎品和普通物品分开记录
+    failed = {False: [], True: []}
+    placed_items = []
+    volume = 0.0
+
+    for position, (index, dims, allowed, fragile) in enumerate(entries):
+        if deadline is not None and position and position % 32 == 0 and time.perf_counter() > deadline:
+            raise _Expired(placed_items, volume)
+        if min(dims) <= 0:
+            continue
+        # 每个方向都不小于某个已失败的方向，同样放不下；易碎品的限制更严，普通物品的失败同样适用
+        if all(_dominated(o, failed[False]) or (fragile and _dominated(o, failed[True])) for o in allowed):
+            continue
+
+        result = packer.place(allowed, suffix_min[position], fragile)
+        if result is None:
+            for o in allowed:
+                _add_failed(failed[fragile], o)
+            continue
+        corner, placed_dims = result
+        volume += placed_dims[0] * placed_dims[1] * placed_dims[2]
+
+        item = items_data[index]
+        placed_item = {
+            'order_id': first_order_id + len(placed_items),
+            'name': item['name'],
+            'position': {'x': corner[0], 'y': corner[1], 'z': corner[2]},
+            'dimensions': {'x': placed_dims[0], 'y': placed_dims[1], 'z': placed_dims[2]},
+            'face_up': item.get('face_up', False),
+            'fragile': item.get('fragile', False)
+        }
+        placed_items.append(placed_item)
+
+    return placed_items, volume
+
+
+def place_items(items_data, space_dimensions, rotate=True):
+    """rotate=False 时所有物品都按输入方向摆放"""
+    space = (float(space_dimensions['x']), float(space_dimensions['y']), float(space_dimensions['z']))
+    entries = _entries(items_data, rotate)
+    # 大件优先，体积相同时同尺寸的物品排在一起，同尺寸保持输入顺序
+    entries.sort(key=_sort_key)
+    return _pack(entries, items_data, space)[0]
+
+
+def _restart(entries, rng):
+    """在大件优先的顺序上加随机扰动，部分物品换一个起始方向；易碎品仍然排在最后"""
+    noisy = sorted(entries, key=lambda entry: (
+        entry[3], -(entry[1][0] * entry[1][1] * entry[1][2]) * rng.uniform(1 - RESTART_NOISE, 1 + RESTART_NOISE)))
+    result = []
+    for index, dims, allowed, fragile in noisy:
+        if len(allowed) > 1 and rng.random() < RESTART_ROTATE:
+            start = rng.randrange(len(allowed))
+            allowed = allowed[start:] + allowed[:start]
+        result.append((index, dims, allowed, fragile))
+    return result
+
+
+def _neighbour(entries, rng):
+    """交换几对相距不远的物品，不跨过普通物品和易碎品的分界"""
+    result = list(entries)
+    boundary = sum(1 for entry in result if not entry[3])
+    for _ in range(LOCAL_SWAPS):
+        i = rng.randrange(len(result))
+        low, high = (0, boundary - 1) if i < boundary else (boundary, len(result) - 1)
+        j = min(high, max(low, i + rng.randint(-SWAP_DISTANCE, SWAP_DISTANCE)))
+        result[i], result[j] = result[j], result[i]
+    return result
+
+
+def pack_anytime(items_data, space_dimensions, time_budget=None, iterations=None, rotate=True, seed=0, ends_at=None):
+    """
+    在 time_budget 秒内或 iterations 次迭代内尽量提高装填率，返回 (摆放结果, 统计)
+    ends_at 为 time.time() 的截止时刻，多个起点在不同进程里共享同一个截止时间；与 time_budget 同时给出时取先到的
+
+    先按确定性的大件优先顺序装一次，得到第一个合法的结果；
+    之后交替做随机重启和在当前最好顺序上的局部搜索，装入体积不低于当前最好结果时接受。
+    时间用完时进行中的那次迭代直接放弃。所有物品都已装入或空间已满时提前结束。
+    第一次装箱也受预算限制：物品很多、预算很短时，到时间后返回已经摆放的部分物品（其余物品视为没有装入），
+    这时统计里 complete 为 False；超出预算的时间不超过摆放 32 个物品的时间。
+    统计为 {'fill_ratio', 'iterations', 'improvements', 'elapsed', 'complete'}，iterations 不含第一次装箱。
+    同一个 seed 的迭代序列相同；只给 iterations 时结果完全确定。
+    """
+    start = time.perf_counter()
+    if ends_at is not None:
+        remaining = max(0.0, ends_at - time.time())
+        time_budget = remaining if time_budget is None else min(time_budget, remaining)
+    deadline = start + time_budget if time_budget is not None else None
+    space = (float(space_dimensions['x']), float(space_dimensions['y']), float(space_dimensions['z']))
+    entries = _entries(items_data, rotate)
+    entries.sort(key=_sort_key)
+    complete = True
+    try:
+        best_items, best_volume = _pack(entries, items_data, space, deadline)
+    except _Expired as expired:
+        best_items, best_volume = expired.args
+        complete = False
+    best_order = entries
+    packable = sum(1 for entry in entries if min(entry[1]) > 0)
+    capacity = space[0] * space[1] * space[2]
+
+    rng = random.Random(seed)
+    done = improvements = 0
+    while complete and len(best_items) < packable and best_volume < capacity - EPS and (
+            iterations is None or done < iterations):
+        if deadline is None and iterations is None:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        order = _neighbour(best_order, rng) if done % 2 else _restart(entries, rng)
+        try:
+            result = _pack(order, items_data, space, deadline)
+        except _Expired:
+            break
+        done += 1
+        if result[1] >= best_volume:
+            if result[1] > best_volume + EPS:
+                improvements += 1
+            best_items, best_volume = result
+            best_order = order
+
+    return best_items, {
+        'fill_ratio': best_volume / capacity if capacity > 0 else 0.0,
+        'iterations': done,
+        'improvements': improvements,
+        'elapsed': time.perf_counter() - start,
+        'complete': complete,
+    }
+
+
+def best_of(results):
+    """
+    从多次独立装箱的 [(摆放结果, 统计), ...] 中取装填率最高的一个，相同时取靠前的
+    返回的统计里 iterations / improvements 为所有起点之和，另外记录 starts（起点数）和 start（选中的第几个）
+    """
+    best = max(range(len(results)), key=lambda i: (results[i][1]['fill_ratio'], -i))
+    placed, stats = results[best]
+    return placed, dict(
+        stats,
+        iterations=sum(result[1]['iterations'] for result in results),
+        improvements=sum(result[1]['improvements'] for result in results),
+        elapsed=max(result[1]['elapsed'] for result in results),
+        starts=len(results),
+        start=best,
+    )
+
+
+def pack_multistart(items_data, space_dimensions, seeds, iterations=None, time_budget=None, executor=None):
+    """
+    每个种子独立运行一次 pack_anytime，返回 best_of 的结果
+    executor 为 concurrent.futures 的执行器时并行运行，否则依次运行。
+    只给 iterations 时结果只由 seeds 决定，与并行的进程数无关。
+    给了 time_budget 时所有起点共享一个截止时间：起点多于进程数时，排队的起点只用剩下的时间，
+    总耗时仍约为 time_budget，而不是 起点数 / 进程数 倍。
+    """
+    kwargs = {'iterations': iterations, 'ends_at': time.time() + time_budget if time_budget is not None else None}
+    if executor is None:
+        results = [pack_anytime(items_data, space_dimensions, seed=seed, **kwargs) for seed in seeds]
+    else:
+        futures = [executor.submit(pack_anytime, items_data, space_dimensions, seed=seed, **kwargs) for seed in seeds]
+        results = [future.result() for future in futures]
+    return best_of(results)
+
+
+def add_items(existing, items_data, space_dimensions, first_order_id, rotate=True):
+    """
+    把新物品放进已有布局剩余的空间，已有物品不动
+    existing 为 [((x, y, z), (dx, dy, dz), fragile), ...]；返回新物品的摆放结果，order_id 从 first_order_id 开始
+    """
+    space = (float(space_dimensions['x']), float(space_dimensions['y']), float(space_dimensions['z']))
+    entries = _entries(items_data, rotate)
+    entries.sort(key=_sort_key)
+    return _pack(entries, items_data, space, existing=existing, first_order_id=first_order_id)[0]
+
+
+def _footprints_overlap(a, b):
+    (ax, _, az), (adx, _, adz) = a
+    (bx, _, bz), (bdx, _, bdz) = b
+    return ax < bx + bdx - EPS and bx < ax + adx - EPS and az < bz + bdz - EPS and bz < az + adz - EPS
+
+
+def _can_rest(key, corner, dims, fragile, boxes):
+    """
+    物品放在 corner 是否满足 _pack 的规则：底面与下方顶面的接触面积至少为底面积的 MIN_SUPPORT_RATIO，
+    不在易碎品的上方；物品本身易碎时上方整列没有其他物品
+    """
+    x, y, z = corner
+    w, _, d = dims
+    area = 0.0
+    for other_key, (other_corner, other_dims, other_fragile) in boxes.items():
+        if other_key == key or not _footprints_overlap((corner, dims), (other_corner, other_dims)):
+            continue
+        if other_corner[1] < y - EPS:
+            if other_fragile:
+                return False
+            if abs(other_corner[1] + other_dims[1] - y) <= EPS:
+                area += ((min(x + w, other_corner[0] + other_dims[0]) - max(x, other_corner[0])) *
+                         (min(z + d, other_corner[2] + other_dims[2]) - max(z, other_corner[2])))
+        elif fragile:
+            return False
+    return y <= EPS or area >= w * d * MIN_SUPPORT_RATIO - EPS
+
+
+def compact(boxes, removed):
+    """
+    删除物品后让失去支撑的物品竖直落下，只处理被删除物品（以及已经落下的物品）正上方的物品
+    boxes 为剩余物品 {key: ((x, y, z), (dx, dy, dz), fragile)}，removed 为被删除物品的 ((x, y, z), (dx, dy, dz))
+    从低到高处理，每个物品落到水平投影内最高的顶面上；落点不满足支撑或易碎品规则（_can_rest）时物品保持原位。
+    返回 {key: 新的 y}
+    """
+    changed = list(removed)
+    current = dict(boxes)
+    moved = {}
+    for key in sorted(boxes, key=lambda k: boxes[k][0][1]):
+        corner, dims, fragile = current[key]
+        box = (corner, dims)
+        x, y, z = corner
+        if not any(_footprints_overlap(box, other) and y >= other[0][1] - EPS for other in changed):
+            continue
+        floor = 0.0
+        for other_key, (other_corner, other_dims, _) in current.items():
+            if other_key == key or not _footprints_overlap(box, (other_corner, other_dims)):
+                continue
+            top = other_corner[1] + other_dims[1]
+            if top <= y + EPS and top > floor:
+                floor = top
+        if floor < y - EPS and _can_rest(key, (x, floor, z), dims, fragile, current):
+            current[key] = ((x, floor, z), dims, fragile)
+            moved[key] = floor
+            changed.append(box)
+    return moved
+
+
+def _volume(dims):
+    return dims[0] * dims[1] * dims[2]
+
+
+def _pack_group(group, space, existing=()):
+    """
+    进程池里执行：把 group（[(原下标, 物品), ...]）装进一个容器，existing 为容器里已有的物品
+    返回放下的 [(原下标, 最小角坐标, 尺寸)]，按装载顺序
+    """
+    # 名称换成组内下标，结果按它对应回原物品
+    items = [dict(item, name=position) for position, (_, item) in enumerate(group)]
+    entries = _entries(items, True)
+    entries.sort(key=_sort_key)
+    placed_items, _ = _pack(entries, items, space, existing=existing)
+    return [(group[p['name']][0],
+             (p['position']['x'], p['position']['y'], p['position']['z']),
+             (p['dimensions']['x'], p['dimensions']['y'], p['dimensions']['z']))
+            for p in placed_items]
+
+
+def _split(indices, entries, count):
+    """按 _sort_key 的顺序把每个物品分给当前体积最小的组，各组体积和物品构成都接近"""
+    heap = [(0.0, group) for group in range(count)]
+    groups = [[] for _ in range(count)]
+    for index in sorted(indices, key=lambda i: _sort_key(entries[i])):
+        volume, group = heapq.heappop(heap)
+        groups[group].append(index)
+        heapq.heappush(heap, (volume + _volume(entries[index][1]), group))
+    return [group for group in groups if group]
+
+
+class _Container:
+    def __init__(self, placed):
+        self.placed = placed  # [(原下标, 最小角坐标, 尺寸)]
+        self.volume = sum(_volume(dims) for _, _, dims in placed)
+
+    def boxes(self, entries):
+        return [(corner, dims, entries[index][3]) for index, corner, dims in self.placed]
+
+    def extend(self, placed):
+        self.placed.extend(placed)
+        self.volume += sum(_volume(dims) for _, _, dims in placed)
+
+
+def _top_up(containers, indices, items_data, entries, space, capacity):
+    """把 indices 中的物品依次尝试放进已有容器的剩余空间，从最空的容器开始；返回仍然没放下的物品"""
+    remaining = list(indices)
+    for container in sorted(containers, key=lambda c: c.volume):
+        if not remaining:
+            break
+        smallest = min(_volume(entries[index][1]) for index in remaining)
+        if capacity - container.volume < smallest - EPS:
+            continue
+        placed = _pack_group([(index, items_data[index]) for index in remaining], space, container.boxes(entries))
+        if placed:
+            container.extend(placed)
+            done = {index for index, _, _ in placed}
+            remaining = [index for index in remaining if index not in done]
+    return remaining
+
+
+def _eliminate(containers, items_data, entries, space, capacity):
+    """反复尝试把最空的容器里的物品全部挪进其他容器的剩余空间，成功就去掉这个容器"""
+    while len(containers) > 1:
+        containers.sort(key=lambda c: c.volume)
+        emptiest, others = containers[0], containers[1:]
+        if emptiest.volume > sum(capacity - c.volume for c in others) + EPS:
+            return
+        indices = [index for index, _, _ in emptiest.placed]
+        # 在副本上尝试，失败时不影响原来的布局
+        trial = [_Container(list(c.placed)) for c in others]
+        if _top_up(trial, indices, items_data, entries, space, capacity):
+            return
+        containers[:] = trial
+
+
+def pack_containers(items_data, space_dimensions, executor=None, rotate=True):
+    """
+    把物品装进尽量少的、尺寸为 space_dimensions 的容器，返回 (摆放结果, 统计)
+
+    每一轮把剩余物品按体积均衡地分组，每组的总体积约为容器容积的 CONTAINER_OVERSUPPLY 倍，每组装一个新容器；
+    executor 不为空时各组在进程池里并行装箱。每组放不下的物品进入下一轮。
+    剩下的物品不够装满一个容器时，先尝试放进已有容器的剩余空间，还剩下的再用新容器。
+    最后反复尝试清空最空的容器，把它的物品挪进其他容器。
+    摆放结果比单容器多一个 container 字段（从 0 开始的容器下标），order_id 在所有容器之间连续编号，
+    先装完第 0 个容器再装下一个；空容器也放不下的物品不出现在结果里。
+    统计为 {'fill_ratio', 'containers', 'lower_bound', 'container_fill', 'unplaced', 'iterations', 'improvements',
+    'elapsed'}，lower_bound 为物品总体积除以容器容积向上取整，是容器数的下界。
+    """
+    start = time.perf_counter()
+    space = (float(space_dimensions['x']), float(space_dimensions['y']), float(space_dimensions['z']))
+    capacity = space[0] * space[1] * space[2]
+    entries = _entries(items_data, rotate)
+    # 只处理能单独放进空容器的物品
+    indices = [
+        index for index, dims, allowed, _ in entries
+        if min(dims) > 0 and any(all(o[axis] <= space[axis] + EPS for axis in range(3)) for o in allowed)
+    ]
+    total = sum(_volume(entries[index][1]) for index in indices)
+
+    containers = []
+    remaining = indices
+    while remaining:
+        volume = sum(_volume(entries[index][1]) for index in remaining)
+        if containers and volume < capacity:
+            # 剩下的不够装满一个容器，先放进已有容器的空隙
+            remaining = _top_up(containers, remaining, items_data, entries, space, capacity)
+            if not remaining:
+                break
+            volume = sum(_volume(entries[index][1]) for index in remaining)
+        groups = _split(remaining, entries, max(1, math.ceil(volume / (capacity * CONTAINER_OVERSUPPLY))))
+        jobs = [[(index, items_data[index]) for index in group] for group in groups]
+        if executor is None:
+            results = [_pack_group(job, space) for job in jobs]
+        else:
+            results = list(executor.map(_pack_group, jobs, [space] * len(jobs)))
+        remaining = []
+        for group, placed in zip(groups, results):
+            done = {index for index, _, _ in placed}
+            remaining.extend(index for index in group if index not in done)
+            containers.append(_Container(placed))
+    _eliminate(containers, items_data, entries, space, capacity)
+
+    containers.sort(key=lambda c: -c.volume)
+    placed_items = []
+    for container_index, container in enumerate(containers):
+        for index, corner, dims in container.placed:
+            item = items_data[index]
+            placed_items.append({
+                'order_id': len(placed_items) + 1,
+                'name': item['name'],
+                'position': {'x': corner[0], 'y': corner[1], 'z': corner[2]},
+                'dimensions': {'x': dims[0], 'y': dims[1], 'z': dims[2]},
+                'face_up': item.get('face_up', False),
+                'fragile': item.get('fragile', False),
+                'container': container_index,
+            })
+    placed_volume = sum(container.volume for container in containers)
+    return placed_items, {
+        'fill_ratio': placed_volume / (capacity * len(containers)) if containers and capacity > 0 else 0.0,
+        'containers': len(containers),
+        'lower_bound': math.ceil(total / capacity - EPS) if capacity > 0 else 0,
+        'container_fill': [container.volume / capacity for container in containers],
+        'unplaced': len(items_data) - len(placed_items),
+        'iterations': 0,
+        'improvements': 0,
+        'elapsed': time.perf_counter() - start,
+    }
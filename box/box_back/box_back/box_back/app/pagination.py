@@ -0,0 +1,82 @@
+# box_back/box_back/app/pagination.py
+"""
+游标（keyset）分页
+
+任务按 (created_at, id) 从新到旧排列，物品按 (order_id, id) 从小到大排列。
+游标是上一页最后一行排序键的 base64 编码，下一页用 WHERE 条件直接从游标之后开始取，
+不使用 OFFSET，翻到第几页的查询代价都一样。
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidPage(ValueError):
+    """游标或 limit 参数不合法"""
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidPage(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPage(cursor)
+    return values
+
+
+def parse_limit(value):
+    """limit 参数，缺省为 DEFAULT_LIMIT，最大 MAX_LIMIT"""
+    if value in (None, ''):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidPage(value)
+    if limit < 1:
+        raise InvalidPage(value)
+    return min(limit, MAX_LIMIT)
+
+
+def paginate_tasks(queryset, cursor, limit):
+    """返回 (本页任务列表, 下一页游标)，没有下一页时游标为 None"""
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, task_id = decode_cursor(cursor, 2)
+        created_at = parse_datetime(created_at) if isinstance(created_at, str) else None
+        if created_at is None or not isinstance(task_id, int):
+            raise InvalidPage(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=task_id))
+    # 多取一行判断是否还有下一页
+    page = list(queryset[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    last = page[-1]
+    return page, encode_cursor([last.created_at.isoformat(), last.id])
+
+
+def paginate_items(queryset, cursor, limit):
+    """返回 (本页物品列表, 下一页游标)，没有下一页时游标为 None"""
+    queryset = queryset.order_by('order_id', 'id')
+    if cursor:
+        order_id, item_id = decode_cursor(cursor, 2)
+        if not isinstance(order_id, int) or not isinstance(item_id, int):
+            raise InvalidPage(cursor)
+        queryset = queryset.filter(Q(order_id__gt=order_id) | Q(order_id=order_id, id__gt=item_id))
+    page = list(queryset[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    last = page[-1]
+    return page, encode_cursor([last.order_id, last.id])
@@ -0,0 +1,111 @@
+# box_back/box_back/app/repacking.py
+"""
+已有任务的增量修改：添加和删除物品
+
+添加：已有物品保持不动，新物品由内置引擎放进剩余空间（packing_algorithm.add_items），
+order_id 接在当前最大值之后，只插入新物品的行。
+删除：删除指定 order_id 的物品，只有位于被删除物品正上方、失去支撑的物品竖直落下
+（packing_algorithm.compact），落点的支撑和易碎品规则与装箱时相同，不满足时物品留在原位；
+之后把后面的 order_id 前移，保持从 1 开始连续。
+只写入被删除、落下和 order_id 变化的行。
+
+两者都在调用方的事务里执行，最后用内存里的新布局更新任务的装填率和违规数（layout_metrics），
+并 touch，使 get_task 的缓存和 ETag 失效。
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, F, When
+
+from . import encoders, jobs, layout_metrics, packing_algorithm, task_cache
+from .models import Item, Task
+
+
+class ItemsNotFound(Exception):
+    """要删除的 order_id 不存在"""
+
+    def __init__(self, order_ids):
+        super().__init__(f"Items not found: {order_ids}")
+        self.order_ids = order_ids
+
+
+def _volume(dims):
+    return dims[0] * dims[1] * dims[2]
+
+
+def _update_stats(task, boxes):
+    """boxes 为修改后的全部物品 (order_id, 最小角坐标, 尺寸, 是否易碎)，返回装填率"""
+    capacity = task.space_x * task.space_y * task.space_z
+    fill_ratio = sum(_volume(dims) for _, _, dims, _ in boxes) / capacity if capacity > 0 else 0.0
+    summary = layout_metrics.of_boxes(boxes, (task.space_x, task.space_y, task.space_z))
+    Task.objects.filter(id=task.id).update(fill_ratio=fill_ratio, violations=layout_metrics.violations(summary))
+    return fill_ratio
+
+
+def add_items(task, items_data):
+    """返回 (新物品的摆放结果, 放不下的物品名称, 装填率)"""
+    rows = Item.objects.filter(task=task).values_list(
+        'order_id', 'position_x', 'position_y', 'position_z', 'width', 'height', 'depth', 'fragile')
+    existing = []
+    order_ids = []
+    for order_id, x, y, z, width, height, depth, fragile in rows:
+        existing.append(((x, y, z), (width, height, depth), fragile))
+        order_ids.append(order_id)
+    last_order_id = max(order_ids, default=0)
+
+    placed_items = packing_algorithm.add_items(existing, items_data, task.space_info, last_order_id + 1)
+    jobs.save_items(task, placed_items)
+
+    unplaced = Counter(item['name'] for item in items_data) - Counter(item['name'] for item in placed_items)
+    boxes = [(order_id, corner, dims, fragile) for order_id, (corner, dims, fragile) in zip(order_ids, existing)]
+    boxes += [(p['order_id'], (p['position']['x'], p['position']['y'], p['position']['z']),
+               (p['dimensions']['x'], p['dimensions']['y'], p['dimensions']['z']), p['fragile'])
+              for p in placed_items]
+    fill_ratio = _update_stats(task, boxes)
+    task_cache.touch(task.id)
+    return placed_items, list(unplaced.elements()), fill_ratio
+
+
+def _renumber(task, removed):
+    """删除 removed（已排序）之后，把后面的 order_id 依次前移；只更新 order_id 会变化的行"""
+    bounds = removed + [None]
+    whens = []
+    for shift, (low, high) in enumerate(zip(bounds, bounds[1:]), 1):
+        condition = {'order_id__gt': low}
+        if high is not None:
+            condition['order_id__lt'] = high
+        whens.append(When(then=F('order_id') - shift, **condition))
+    Item.objects.filter(task=task, order_id__gt=removed[0]).update(order_id=Case(*whens, default=F('order_id')))
+
+
+def remove_items(task, order_ids):
+    """返回 (删除的数量, 落下的物品（新的位置和 order_id）, 装填率)；有不存在的 order_id 时抛出 ItemsNotFound"""
+    wanted = set(order_ids)
+    rows = list(Item.objects.filter(task=task).values_list(
+        'id', 'order_id', 'position_x', 'position_y', 'position_z', 'width', 'height', 'depth', 'fragile'))
+    removed = [row for row in rows if row[1] in wanted]
+    missing = sorted(wanted - {row[1] for row in removed})
+    if missing:
+        raise ItemsNotFound(missing)
+
+    remaining = {
+        row[0]: ((row[2], row[3], row[4]), (row[5], row[6], row[7]), row[8])
+        for row in rows if row[1] not in wanted
+    }
+    moved = packing_algorithm.compact(remaining, [((row[2], row[3], row[4]), (row[5], row[6], row[7])) for row in removed])
+
+    with task_cache.deferred(task.id):
+        Item.objects.filter(id__in=[row[0] for row in removed]).delete()
+        if moved:
+            Item.objects.bulk_update(
+                [Item(id=item_id, position_y=y) for item_id, y in moved.items()], ['position_y'],
+                batch_size=getattr(settings, 'ITEM_BATCH_SIZE', 500))
+        _renumber(task, sorted(wanted))
+        order_ids = {row[0]: row[1] for row in rows}
+        fill_ratio = _update_stats(task, [
+            (order_ids[item_id], (corner[0], moved.get(item_id, corner[1]), corner[2]), dims, fragile)
+            for item_id, (corner, dims, fragile) in remaining.items()
+        ])
+
+    rows = Item.objects.filter(id__in=list(moved)).order_by('order_id').values_list(*encoders.ITEM_COLUMNS)
+    return len(removed), [encoders.encode_item(row) for row in rows], fill_ratio
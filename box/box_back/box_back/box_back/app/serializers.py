@@ -1,5 +1,7 @@
+from django.conf import settings
+from django.db.models import Count
 from rest_framework import serializers
-from .models import User, Task, Item
+from .models import User, Task, Item, Container, AlgorithmVersion, AlgorithmBenchmark
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -75,12 +77,59 @@ class ItemInputSerializer(serializers.Serializer):
     face_up = serializers.BooleanField(default=False)
     fragile = serializers.BooleanField(default=False)
 
+# 向已有任务添加物品
+class AddItemsSerializer(serializers.Serializer):
+    items = ItemInputSerializer(many=True, allow_empty=False)
+
+# 从已有任务删除物品
+class RemoveItemsSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
 # 输入处理序列化器
 class TaskInputSerializer(serializers.Serializer):
     creator_id = serializers.IntegerField()
     worker_id = serializers.IntegerField(required=False, allow_null=True)
     space_info = serializers.DictField()
     items = ItemInputSerializer(many=True)
+    # 算法版本 id 或 'builtin'，不传时使用当前全局版本
+    algorithm_version = serializers.CharField(required=False, allow_null=True)
+    # 装箱的时间预算（秒），在预算内继续改进装填率，上限为 PACKING_MAX_TIME_BUDGET
+    time_budget = serializers.FloatField(required=False, allow_null=True, min_value=0)
+    # 多起点并行装箱：起点数量和第一个随机种子，起点为 seed, seed + 1, ...（仅内置算法）
+    starts = serializers.IntegerField(required=False, default=1, min_value=1)
+    seed = serializers.IntegerField(required=False, default=0, min_value=0)
+
+    def validate_algorithm_version(self, value):
+        if value is None or value == 'builtin' or value.isdigit():
+            return value
+        raise serializers.ValidationError("Must be an algorithm version id or 'builtin'")
+
+    def validate_time_budget(self, value):
+        limit = getattr(settings, 'PACKING_MAX_TIME_BUDGET', 30)
+        if value is not None and value > limit:
+            raise serializers.ValidationError(f"Must not exceed {limit} seconds")
+        return value
+
+    def validate_starts(self, value):
+        limit = getattr(settings, 'PACKING_MAX_STARTS', 64)
+        if value > limit:
+            raise serializers.ValidationError(f"Must not exceed {limit}")
+        return value
+
+# 多容器任务的输入：物品装进尽量少的、尺寸为 space_info 的容器（仅内置算法）
+class ContainerTaskInputSerializer(serializers.Serializer):
+    creator_id = serializers.IntegerField()
+    worker_id = serializers.IntegerField(required=False, allow_null=True)
+    space_info = serializers.DictField()
+    items = ItemInputSerializer(many=True)
+
+# 多容器任务的容器，item_count 需要在查询里用 Count 聚合
+class ContainerSerializer(serializers.ModelSerializer):
+    item_count = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = Container
+        fields = ['index', 'fill_ratio', 'item_count']
 
 # 输出完整任务序列化器
 class TaskSerializer(serializers.ModelSerializer):
@@ -93,6 +142,11 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = ['id', 'creator', 'worker', 'space_info', 'items', 'created_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """一次 JOIN 取出创建者和工人，物品用一次额外查询批量取出，查询数不随任务数量增长"""
+        return queryset.select_related('creator', 'worker').prefetch_related('items')
+    
     def get_creator(self, obj):
         return {
             "id": obj.creator.id,
@@ -112,4 +166,46 @@ class TaskSerializer(serializers.ModelSerializer):
             'x': obj.space_x,
             'y': obj.space_y,
             'z': obj.space_z
-        }
\ No newline at end of file
+        }
+
+# 任务摘要序列化器 - 只返回物品数量，不展开物品
+class TaskSummarySerializer(TaskSerializer):
+    item_count = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Task
+        fields = ['id', 'creator', 'worker', 'space_info', 'item_count', 'created_at']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """物品数量用 COUNT 聚合在同一条查询里算出"""
+        return queryset.select_related('creator', 'worker').annotate(item_count=Count('items'))
+    
+    def get_item_count(self, obj):
+        return obj.item_count
+
+# 上传算法时的表单字段
+class AlgorithmUploadSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+
+# 算法版本序列化器（不含代码内容）
+class AlgorithmVersionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AlgorithmVersion
+        fields = ['id', 'name', 'sha256', 'is_active', 'created_at']
+
+# 算法基准结果序列化器，version 为版本 id 或 'builtin'
+class AlgorithmBenchmarkSerializer(serializers.ModelSerializer):
+    version = serializers.SerializerMethodField()
+    name = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AlgorithmBenchmark
+        fields = ['version', 'name', 'fill_ratio', 'p50_ms', 'p95_ms', 'peak_memory_kb', 'violations',
+                  'repeats', 'cases', 'created_at']
+    
+    def get_version(self, obj):
+        return obj.algorithm_id or 'builtin'
+    
+    def get_name(self, obj):
+        return obj.algorithm.name if obj.algorithm else 'builtin'
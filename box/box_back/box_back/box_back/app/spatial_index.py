@@ -0,0 +1,188 @@
+# box_back/box_back/app/spatial_index.py
+"""
+轴对齐箱子的空间索引（均匀网格）
+
+箱子用 (x0, y0, z0, x1, y1, z1) 元组表示，y 轴竖直向上，与 packing_algorithm 的约定一致。
+每个箱子登记在它覆盖的所有格子里，查询只检查相关格子中的箱子，
+格子数按箱子数量取 n^(1/3) 级别时，单次查询的代价与已插入箱子总数基本无关。
+
+性能对比见 benchmarks/spatial_index.py。
+"""
+
+EPS = 1e-9
+
+# 与每个轴垂直的另外两个轴
+OTHER_AXES = ((1, 2), (0, 2), (0, 1))
+
+
+def overlaps(a, b):
+    """两个箱子是否有体积重叠（只贴面不算）"""
+    return (a[0] < b[3] - EPS and b[0] < a[3] - EPS and
+            a[1] < b[4] - EPS and b[1] < a[4] - EPS and
+            a[2] < b[5] - EPS and b[2] < a[5] - EPS)
+
+
+class GridIndex:
+    """均匀网格索引，支持插入、重叠查询、顶面查询和沿坐标轴的射线查询"""
+
+    def __init__(self, space, divisions):
+        self.space = space
+        self.divisions = divisions
+        self.size = tuple(max(s / divisions, EPS) for s in space)
+        self.cells = {}
+        self.boxes = []
+
+    @classmethod
+    def for_count(cls, space, count):
+        """按预计的箱子数量选择网格密度，平均每个格子里只有少量箱子"""
+        return cls(space, max(1, round(count ** (1 / 3))))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def cell(self, value, axis):
+        index = int(value / self.size[axis])
+        if index < 0:
+            return 0
+        return index if index < self.divisions else self.divisions - 1
+
+    def span(self, lo, hi, axis):
+        # 半开区间 [lo, hi) 覆盖的格子下标
+        size = self.size[axis]
+        top = self.divisions - 1
+        first = int(lo / size)
+        last = int((hi - EPS) / size)
+        first = 0 if first < 0 else (first if first < top else top)
+        last = first if last < first else (last if last < top else top)
+        return range(first, last + 1)
+
+    def insert(self, box):
+        """登记一个箱子，返回它在 boxes 中的下标"""
+        index = len(self.boxes)
+        self.boxes.append(box)
+        cells = self.cells
+        for i in self.span(box[0], box[3], 0):
+            for j in self.span(box[1], box[4], 1):
+                for k in self.span(box[2], box[5], 2):
+                    bucket = cells.get((i, j, k))
+                    if bucket is None:
+                        cells[(i, j, k)] = [index]
+                    else:
+                        bucket.append(index)
+        return index
+
+    def candidates(self, box):
+        """与 box 共享格子的箱子下标，结果需要再做精确判断"""
+        found = set()
+        cells = self.cells
+        for i in self.span(box[0], box[3], 0):
+            for j in self.span(box[1], box[4], 1):
+                for k in self.span(box[2], box[5], 2):
+                    bucket = cells.get((i, j, k))
+                    if bucket:
+                        found.update(bucket)
+        return found
+
+    def overlapping(self, box):
+        """与 box 有体积重叠的所有箱子下标"""
+        boxes = self.boxes
+        return [index for index in self.candidates(box) if overlaps(boxes[index], box)]
+
+    def collides(self, box):
+        boxes = self.boxes
+        for index in self.candidates(box):
+            if overlaps(boxes[index], box):
+                return True
+        return False
+
+    def top_surface(self, x0, z0, x1, z1, height):
+        """footprint [x0, x1) x [z0, z1) 内、不高于 height 的最高顶面，下方没有箱子时为地面 0"""
+        boxes = self.boxes
+        cells = self.cells
+        size = self.size[1]
+        best = 0.0
+        xs = self.span(x0, x1, 0)
+        zs = self.span(z0, z1, 2)
+        for j in range(self.cell(height - EPS, 1), -1, -1):
+            # 更低的格子层里不可能有更高的顶面
+            if (j + 1) * size <= best:
+                break
+            for i in xs:
+                for k in zs:
+                    for index in cells.get((i, j, k), ()):
+                        other = boxes[index]
+                        top = other[4]
+                        if (best < top <= height + EPS and
+                                other[0] < x1 - EPS and x0 < other[3] - EPS and
+                                other[2] < z1 - EPS and z0 < other[5] - EPS):
+                            best = top
+        return best
+
+    def contact_area(self, box):
+        """box 底面与下方紧贴箱子顶面的接触面积"""
+        y = box[1]
+        if y <= EPS:
+            return (box[3] - box[0]) * (box[5] - box[2])
+        boxes = self.boxes
+        area = 0.0
+        # 只取紧贴底面下方那一薄层里的箱子
+        for index in self.candidates((box[0], y - EPS, box[2], box[3], y, box[5])):
+            other = boxes[index]
+            if abs(other[4] - y) > EPS:
+                continue
+            dx = min(box[3], other[3]) - max(box[0], other[0])
+            dz = min(box[5], other[5]) - max(box[2], other[2])
+            if dx > EPS and dz > EPS:
+                area += dx * dz
+        return area
+
+    def ray(self, point, axis):
+        """从 point 沿 axis 正方向到最近箱子或边界的距离，point 落在箱子内部时为 0"""
+        boxes = self.boxes
+        cells = self.cells
+        a, b = OTHER_AXES[axis]
+        pa, pb = point[a], point[b]
+        coord = point[axis]
+        limit = self.space[axis]
+        key = [self.cell(point[0], 0), self.cell(point[1], 1), self.cell(point[2], 2)]
+        size = self.size[axis]
+        for step in range(key[axis], self.divisions):
+            if step * size > limit:
+                break
+            key[axis] = step
+            for index in cells.get(tuple(key), ()):
+                other = boxes[index]
+                if (other[axis + 3] <= coord + EPS or
+                        not other[a] - EPS <= pa < other[a + 3] - EPS or
+                        not other[b] - EPS <= pb < other[b + 3] - EPS):
+                    continue
+                if other[axis] <= coord + EPS:
+                    return 0.0
+                if other[axis] < limit:
+                    limit = other[axis]
+        return limit - coord
+
+    def project(self, point, axis):
+        """把点沿 axis 负方向推到最近的箱子表面或边界"""
+        boxes = self.boxes
+        cells = self.cells
+        a, b = OTHER_AXES[axis]
+        pa, pb = point[a], point[b]
+        coord = point[axis]
+        limit = 0.0
+        key = [self.cell(point[0], 0), self.cell(point[1], 1), self.cell(point[2], 2)]
+        size = self.size[axis]
+        for step in range(self.cell(coord - EPS, axis), -1, -1):
+            if (step + 1) * size < limit:
+                break
+            key[axis] = step
+            for index in cells.get(tuple(key), ()):
+                other = boxes[index]
+                face = other[axis + 3]
+                if (limit < face <= coord + EPS and
+                        other[a] - EPS <= pa < other[a + 3] - EPS and
+                        other[b] - EPS <= pb < other[b + 3] - EPS):
+                    limit = face
+        moved = list(point)
+        moved[axis] = limit
+        return tuple(moved)
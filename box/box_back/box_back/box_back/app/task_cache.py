@@ -0,0 +1,166 @@
+# box_back/box_back/app/task_cache.py
+"""
+get_task 的结果缓存
+
+缓存内容是渲染好的 JSON 字节，按任务 id 存放，并记录生成时任务的 revision。
+Task / Item 通过模型信号发生变化时，信号处理函数把数据库里的 revision 加一并删除缓存项；
+读取时先查一次 (status, revision)，revision 对不上的缓存项不会被使用，
+所以多个 Web 进程各自的本地缓存也不会返回过期内容。
+revision 只在数据库里用 F() 加一，Task.save 更新已有任务时不写这一列，过期的实例保存时不会把它改回旧值。
+ETag 同样由 (任务 id, revision) 构成，If-None-Match 命中时只需要这一次查询就能返回 304。
+
+默认使用进程内的 LRU 缓存，总大小不超过 TASK_CACHE_MAX_BYTES；
+TASK_CACHE_BACKEND 设为 CACHES 里的别名时改用 Django 缓存框架，在多个进程之间共享。
+bulk_create、QuerySet.update / delete 不会发送信号，批量修改物品后需要调用 touch(task_id)。
+QuerySet.delete 会对每个物品发送信号，在 deferred(task_id) 块里删除时只在结束时 touch 一次。
+"""
+import contextlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.http import parse_etags
+
+from .models import Item, Task
+
+
+class LocalCache:
+    """按字节数限制大小的 LRU 缓存，值为 (revision, body)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, task_id):
+        with self.lock:
+            entry = self.entries.get(task_id)
+            if entry is not None:
+                self.entries.move_to_end(task_id)
+            return entry
+
+    def set(self, task_id, revision, body):
+        # 单个结果超过总容量的四分之一就不缓存，避免把其他任务全部挤掉
+        if len(body) > self.max_bytes // 4:
+            return
+        with self.lock:
+            self._pop(task_id)
+            self.entries[task_id] = (revision, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def delete(self, task_id):
+        with self.lock:
+            self._pop(task_id)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _pop(self, task_id):
+        entry = self.entries.pop(task_id, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+local = LocalCache(getattr(settings, 'TASK_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+# 当前线程里正在批量修改的任务 id
+_deferred = threading.local()
+
+
+def _shared():
+    alias = getattr(settings, 'TASK_CACHE_BACKEND', None)
+    return caches[alias] if alias else None
+
+
+def _key(task_id):
+    return f'box:task:{task_id}'
+
+
+def etag(task_id, revision, variant=None):
+    """variant 区分同一任务的不同表示（例如二进制布局）"""
+    if variant:
+        return f'"task-{task_id}-{revision}-{variant}"'
+    return f'"task-{task_id}-{revision}"'
+
+
+def etag_matches(request, value):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or value in etags
+
+
+def get(task_id, revision):
+    """返回与 revision 对应的缓存内容，没有时返回 None"""
+    shared = _shared()
+    entry = shared.get(_key(task_id)) if shared is not None else local.get(task_id)
+    if entry is None or entry[0] != revision:
+        return None
+    return entry[1]
+
+
+def put(task_id, revision, body):
+    shared = _shared()
+    if shared is not None:
+        shared.set(_key(task_id), (revision, body), getattr(settings, 'TASK_CACHE_TIMEOUT', 3600))
+    else:
+        local.set(task_id, revision, body)
+
+
+def invalidate(task_id):
+    local.delete(task_id)
+    shared = _shared()
+    if shared is not None:
+        shared.delete(_key(task_id))
+
+
+def touch(task_id):
+    """任务内容变化后调用：revision 加一，使所有进程的缓存和客户端的 ETag 失效"""
+    Task.objects.filter(id=task_id).update(revision=F('revision') + 1)
+    invalidate(task_id)
+
+
+@contextlib.contextmanager
+def deferred(task_id):
+    """块内该任务的物品信号不逐个 touch，块结束时 touch 一次"""
+    tasks = _deferred.__dict__.setdefault('tasks', set())
+    tasks.add(task_id)
+    try:
+        yield
+    finally:
+        tasks.discard(task_id)
+        touch(task_id)
+
+
+@receiver(post_save, sender=Task)
+def _task_saved(sender, instance, created, **kwargs):
+    # 新建的任务还不可能被缓存；update() 不会再次触发信号
+    if not created:
+        touch(instance.id)
+
+
+@receiver(post_delete, sender=Task)
+def _task_deleted(sender, instance, **kwargs):
+    invalidate(instance.id)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def _item_changed(sender, instance, **kwargs):
+    # 删除任务时级联删除的物品不需要逐个处理
+    if isinstance(kwargs.get('origin'), Task):
+        return
+    if instance.task_id in getattr(_deferred, 'tasks', ()):
+        return
+    touch(instance.task_id)
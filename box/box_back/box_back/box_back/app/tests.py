@@ -0,0 +1,1142 @@
+# box_back/box_back/app/tests.py
+"""
+运行方式（app 目录没有 __init__.py，需要写出模块路径）：
+    python manage.py test box_back.app.tests
+"""
+import io
+import random
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import (algorithm_bench, algorithm_runtime, algorithms, candidate_scoring, encoders, jobs, layout_cache,
+               layout_check, layout_format, layout_metrics, packing_algorithm, spatial_index, task_cache)
+from .encoders import encode_task, encode_tasks
+from .models import AlgorithmBenchmark, AlgorithmVersion, Container, Item, LayoutCacheEntry, Task, User
+from .serializers import TaskSerializer
+
+
+class PlaceItemsTests(TestCase):
+    """极点装箱引擎：不越界、不重叠、order_id 连续"""
+
+    def random_items(self, count, sides, seed):
+        rng = random.Random(seed)
+        return [{'name': f'item{i}', 'dimensions': {axis: rng.randint(*sides) for axis in 'xyz'},
+                 'face_up': rng.random() < 0.2, 'fragile': rng.random() < 0.05} for i in range(count)]
+
+    def assert_layout(self, placed, items, space):
+        self.assertEqual([p['order_id'] for p in placed], list(range(1, len(placed) + 1)))
+        by_name = {item['name']: item for item in items}
+        self.assertEqual(len({p['name'] for p in placed}), len(placed))
+        boxes = []
+        for p in placed:
+            item = by_name[p['name']]
+            dims = tuple(p['dimensions'][axis] for axis in 'xyz')
+            corner = tuple(p['position'][axis] for axis in 'xyz')
+            self.assertEqual(sorted(dims), sorted(item['dimensions'][axis] for axis in 'xyz'))
+            if item['face_up']:
+                self.assertEqual(dims[1], item['dimensions']['y'])
+            self.assertEqual((p['face_up'], p['fragile']), (item['face_up'], item['fragile']))
+            for axis in range(3):
+                self.assertGreaterEqual(corner[axis], 0)
+                self.assertLessEqual(corner[axis] + dims[axis], space[axis])
+            boxes.append((corner, dims))
+        for i, (a, a_dims) in enumerate(boxes):
+            for b, b_dims in boxes[i + 1:]:
+                self.assertFalse(all(a[axis] < b[axis] + b_dims[axis] and b[axis] < a[axis] + a_dims[axis]
+                                     for axis in range(3)), (a, a_dims, b, b_dims))
+
+    def test_random_manifests_stay_in_bounds_without_overlaps(self):
+        for seed, space in enumerate([(20, 15, 20), (40, 10, 25), (12, 30, 12)]):
+            items = self.random_items(400, (1, 8), seed)
+            placed = packing_algorithm.place_items(items, dict(zip('xyz', space)))
+            self.assertGreater(len(placed), 0)
+            self.assert_layout(placed, items, space)
+
+    def test_exact_fit_and_oversized_items(self):
+        items = [{'name': f'cube{i}', 'dimensions': {'x': 1, 'y': 1, 'z': 1}} for i in range(8)]
+        items.append({'name': 'big', 'dimensions': {'x': 3, 'y': 1, 'z': 1}})
+        placed = packing_algorithm.place_items(items, {'x': 2, 'y': 2, 'z': 2})
+        self.assertEqual(sorted(p['name'] for p in placed), sorted(f'cube{i}' for i in range(8)))
+        self.assert_layout(placed, [dict(item, face_up=False, fragile=False) for item in items], (2, 2, 2))
+
+
+class CandidateScoringTests(TestCase):
+    """空闲空间不越界、不与箱子重叠、底面整块有支撑，打分与逐个候选比较的结果一致"""
+
+    def reference(self, rows, space, orientations, column):
+        eps = candidate_scoring.EPS
+        keys = {}
+        for position, (w, h, d) in enumerate(orientations):
+            for index, row in enumerate(rows):
+                if row is None:
+                    continue
+                x0, y0, z0, x1, y1, z1 = row
+                if x1 - x0 >= w - eps and y1 - y0 >= h - eps and z1 - z0 >= d - eps and (
+                        not column or y1 >= space[1] - eps):
+                    keys[(index, position)] = (y0, min(x1 - x0 - w, z1 - z0 - d), position, z0, x0)
+        return min(keys, key=keys.get) if keys else None
+
+    def build(self, seed):
+        rng = random.Random(seed)
+        space = (12.0, 10.0, 12.0)
+        packer = packing_algorithm._Packer(space)
+        boxes = []
+        for _ in range(200):
+            dims = (float(rng.randint(1, 4)), float(rng.randint(1, 4)), float(rng.randint(1, 4)))
+            fragile = rng.random() < 0.05
+            result = packer.place(packing_algorithm.orientations(dims, False), (1.0, 1.0, 1.0), fragile)
+            if result is not None:
+                (x, y, z), (w, h, d) = result
+                boxes.append((x, y, z, x + w, space[1] if fragile else y + h, z + d))
+        return space, packer, boxes
+
+    def test_free_spaces(self):
+        space, packer, boxes = self.build(5)
+        self.assertGreater(len(boxes), 20)
+        rows = [row for row in packer.spaces.rows if row is not None]
+        self.assertEqual(len(rows), len(packer.spaces))
+        for row in rows:
+            self.assertTrue(all(0 <= row[axis] < row[axis + 3] <= space[axis] for axis in range(3)))
+            self.assertFalse(any(spatial_index.overlaps(row, box) for box in boxes))
+            self.assertFalse(any(spatial_index.overlaps(row, other) for other in rows if other is not row))
+            if row[1] > 0:
+                support = sum(max(0.0, min(row[3], box[3]) - max(row[0], box[0])) *
+                              max(0.0, min(row[5], box[5]) - max(row[2], box[2]))
+                              for box in boxes if box[4] == row[1])
+                self.assertEqual(support, (row[3] - row[0]) * (row[5] - row[2]))
+
+    def test_matches_brute_force(self):
+        space, packer, _ = self.build(6)
+        rng = random.Random(7)
+        outcomes = set()
+        for column in (False, True):
+            for _ in range(50):
+                dims = tuple(float(rng.randint(1, 6)) for _ in range(3))
+                orientations = packing_algorithm.orientations(dims, rng.random() < 0.5)
+                best = packer.spaces.best(orientations, column=column)
+                self.assertEqual(best, self.reference(packer.spaces.rows, space, orientations, column))
+                outcomes.add(best is None)
+        # 找得到和找不到位置的情况都出现过
+        self.assertEqual(outcomes, {False, True})
+
+    def test_numpy_and_python_paths_match(self):
+        _, packer, _ = self.build(8)
+        rows = [row for row in packer.spaces.rows if row is not None]
+        tables = [candidate_scoring.FreeSpaces(packer.space, use_numpy=flag) for flag in (False, True)]
+        for table in tables:
+            table.add(rows)
+        self.assertGreater(len(rows), 10)
+        rng = random.Random(9)
+        for _ in range(100):
+            orientations = packing_algorithm.orientations(tuple(float(rng.randint(1, 6)) for _ in range(3)), False)
+            column = rng.random() < 0.3
+            box = tuple(float(rng.randint(0, 6)) for _ in range(3)) + tuple(float(rng.randint(6, 12)) for _ in range(3))
+            self.assertEqual(*[(table.best(orientations, column), table.overlapping(box)) for table in tables])
+        for table in tables:
+            table.prune((2.0, 2.0, 2.0))
+        self.assertEqual(tables[0].rows, tables[1].rows)
+
+    def test_numpy_and_python_layouts_match(self):
+        rng = random.Random(10)
+        items = [{'name': f'item{i}', 'dimensions': {axis: rng.randint(1, 5) for axis in 'xyz'},
+                  'face_up': rng.random() < 0.3, 'fragile': rng.random() < 0.05} for i in range(200)]
+        space = {'x': 24, 'y': 15, 'z': 24}
+        layouts = []
+        # 阈值为 0 时总走 NumPy，为无穷大时总走纯 Python
+        for threshold in (0, float('inf')):
+            with mock.patch.object(candidate_scoring, 'NUMPY_MIN_SPACES', threshold):
+                placed = packing_algorithm.place_items(items, space)
+                existing = [(tuple(p['position'][axis] for axis in 'xyz'),
+                             tuple(p['dimensions'][axis] for axis in 'xyz'), p['fragile'])
+                            for p in placed[:len(placed) // 2]]
+                added = packing_algorithm.add_items(existing, items, space, len(existing) + 1)
+                layouts.append((placed, added))
+        self.assertEqual(layouts[0], layouts[1])
+        self.assertTrue(any(p['fragile'] for p in layouts[0][0]))
+        self.assertGreater(len(layouts[0][1]), 0)
+
+
+class AsyncPackingTests(TransactionTestCase):
+    """异步模式：202、轮询到完成，子进程出错时任务为 failed；结果由回调线程写入，需要真正提交的事务"""
+
+    def setUp(self):
+        # 数据库每个测试后清空，任务 id 会重复使用
+        task_cache.local.clear()
+        self.creator = User.objects.create(name='manager')
+        self.items = [{'name': f'box{i}', 'dimensions': {'x': 1, 'y': 2, 'z': 1}} for i in range(6)]
+        self.body = {'creator_id': self.creator.id, 'space_info': {'x': 4, 'y': 4, 'z': 4}, 'items': self.items}
+
+    def post(self):
+        return self.client.post('/api/tasks/create/?async=true', self.body, content_type='application/json')
+
+    def test_pending_then_done(self):
+        release = threading.Event()
+        pack = algorithm_runtime.pack
+
+        def slow_pack(*args):
+            release.wait(10)
+            return pack(*args)
+
+        with ThreadPoolExecutor(1) as executor, mock.patch.object(jobs, 'get_executor', return_value=executor), \
+                mock.patch.object(algorithm_runtime, 'pack', side_effect=slow_pack):
+            response = self.post()
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()['job_id']
+            self.assertEqual(response.json(), {'job_id': job_id, 'task_id': job_id, 'status': 'pending'})
+            self.assertEqual(self.client.get(f'/api/jobs/{job_id}/').json()['status'], 'pending')
+            self.assertEqual(self.client.get(f'/api/tasks/{job_id}/').status_code, 202)
+            self.assertFalse(Item.objects.filter(task_id=job_id).exists())
+            release.set()
+        # 退出 with 时进程池等待任务和回调完成
+        job = self.client.get(f'/api/jobs/{job_id}/').json()
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['packing']['violations'], 0)
+        response = self.client.get(f'/api/tasks/{job_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(item['name'] for item in response.json()['items']), sorted(i['name'] for i in self.items))
+        self.assertEqual(self.client.get('/api/jobs/0/').status_code, 404)
+
+    def test_worker_exception_marks_failed(self):
+        with ThreadPoolExecutor(1) as executor, mock.patch.object(jobs, 'get_executor', return_value=executor), \
+                mock.patch.object(algorithm_runtime, 'pack', side_effect=RuntimeError('engine crashed')), \
+                self.assertLogs(jobs.logger, 'ERROR'):
+            job_id = self.post().json()['job_id']
+        job = self.client.get(f'/api/jobs/{job_id}/').json()
+        self.assertEqual((job['status'], job['error']), ('failed', 'engine crashed'))
+        response = self.client.get(f'/api/tasks/{job_id}/')
+        self.assertEqual((response.status_code, response.json()['status']), (500, 'failed'))
+        self.assertFalse(Item.objects.filter(task_id=job_id).exists())
+
+
+class SaveItemsTests(TestCase):
+    """save_items 按批 bulk_create，所有批次在一个事务里"""
+
+    def setUp(self):
+        self.task = Task.objects.create(creator=User.objects.create(name='manager'), space_x=10, space_y=10, space_z=10)
+
+    def placed(self, count):
+        return [{'order_id': i + 1, 'name': f'box{i}', 'position': {'x': i % 10, 'y': 0, 'z': i // 10},
+                 'dimensions': {'x': 1, 'y': 1, 'z': 1}, 'fragile': i % 7 == 0} for i in range(count)]
+
+    def test_large_save_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            jobs.save_items(self.task, self.placed(1050), batch_size=50)
+        # 批大小低于 SQLite 参数个数的限制，每批一条 INSERT
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 21)
+        rows = list(Item.objects.filter(task=self.task).order_by('order_id').values_list('order_id', 'name', 'fragile'))
+        self.assertEqual(rows, [(i + 1, f'box{i}', i % 7 == 0) for i in range(1050)])
+
+    def test_failed_batch_rolls_back_everything(self):
+        placed = self.placed(250)
+        # 第三批里的一行违反 NOT NULL
+        placed[230]['name'] = None
+        with self.assertRaises(IntegrityError):
+            jobs.save_items(self.task, placed, batch_size=100)
+        self.assertFalse(Item.objects.filter(task=self.task).exists())
+
+
+class TaskListingQueryTests(TestCase):
+    """任务列表接口的查询数量不随任务数量增长"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create(name='manager')
+        cls.worker = User.objects.create(name='worker')
+
+    def create_tasks(self, count, items_per_task=3):
+        for _ in range(count):
+            task = Task.objects.create(creator=self.creator, worker=self.worker, space_x=10, space_y=10, space_z=10)
+            Item.objects.bulk_create([
+                Item(task=task, order_id=i + 1, name=f'item{i}', position_x=i, position_y=0, position_z=0,
+                     width=1, height=1, depth=1)
+                for i in range(items_per_task)
+            ])
+
+    def assert_constant_queries(self, url):
+        # 任务、创建者和工人一次 JOIN，物品一次 prefetch
+        self.create_tasks(2)
+        with self.assertNumQueries(2):
+            small = self.client.get(url)
+        self.create_tasks(50)
+        with self.assertNumQueries(2):
+            large = self.client.get(url)
+        self.assertEqual(len(small.json()), 2)
+        self.assertEqual(len(large.json()), 52)
+        self.assertEqual(len(large.json()[0]['items']), 3)
+        self.assertEqual(large.json()[0]['worker'], {'id': self.worker.id, 'name': 'worker'})
+
+    def test_user_tasks(self):
+        self.assert_constant_queries(f'/api/users/{self.creator.id}/tasks/')
+
+    def test_worker_tasks(self):
+        self.assert_constant_queries(f'/api/workers/{self.worker.id}/tasks/')
+
+
+class TaskPaginationTests(TestCase):
+    """任务列表和物品列表的游标分页"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create(name='manager')
+        cls.tasks = []
+        for t in range(7):
+            task = Task.objects.create(creator=cls.creator, space_x=10, space_y=20, space_z=30)
+            Item.objects.bulk_create([
+                Item(task=task, order_id=i + 1, name=f'item{i}', position_x=i, position_y=0, position_z=0,
+                     width=1, height=1, depth=1)
+                for i in range(t)
+            ])
+            cls.tasks.append(task)
+
+    def collect(self, url, limit):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            self.assertLessEqual(len(data['results']), limit)
+            seen.extend(data['results'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                return seen
+
+    def test_task_pages_cover_all_tasks_newest_first(self):
+        seen = self.collect(f'/api/users/{self.creator.id}/tasks/', 3)
+        self.assertEqual([task['id'] for task in seen], [task.id for task in reversed(self.tasks)])
+
+    def test_summary_has_item_count_without_items(self):
+        data = self.client.get(f'/api/users/{self.creator.id}/tasks/', {'limit': 2, 'summary': 'true'}).json()
+        first = data['results'][0]
+        self.assertNotIn('items', first)
+        self.assertEqual(first['item_count'], 6)
+        self.assertEqual(first['space_info'], {'x': 10, 'y': 20, 'z': 30})
+
+    def test_without_parameters_returns_plain_list(self):
+        data = self.client.get(f'/api/users/{self.creator.id}/tasks/').json()
+        self.assertEqual(len(data), 7)
+
+    def test_item_pages(self):
+        task = self.tasks[-1]
+        seen = self.collect(f'/api/tasks/{task.id}/items/', 4)
+        self.assertEqual([item['order_id'] for item in seen], [1, 2, 3, 4, 5, 6])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'/api/users/{self.creator.id}/tasks/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/api/tasks/{self.tasks[0].id}/items/', {'limit': 0})
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskEncoderTests(TestCase):
+    """encoders 的输出与 TaskSerializer 完全相同"""
+
+    def test_same_output_as_serializer(self):
+        creator = User.objects.create(name='manager')
+        worker = User.objects.create(name='worker')
+        tasks = [
+            Task.objects.create(creator=creator, worker=worker, space_x=1.5, space_y=2, space_z=3),
+            Task.objects.create(creator=creator, space_x=4, space_y=5, space_z=6),
+        ]
+        Item.objects.bulk_create([
+            Item(task=tasks[0], order_id=i + 1, name=f'item{i}', position_x=i * 0.5, position_y=0, position_z=1,
+                 width=0.5, height=2, depth=1, face_up=i % 2 == 0, fragile=i % 3 == 0)
+            for i in range(5)
+        ])
+        expected = TaskSerializer(Task.objects.order_by('id'), many=True).data
+        self.assertEqual(encode_tasks(Task.objects.order_by('id')), expected)
+        self.assertEqual(encode_task(tasks[0]), expected[0])
+
+
+class TaskStreamingTests(TestCase):
+    """流式返回与普通返回逐字节相同"""
+
+    def setUp(self):
+        # 测试之间回滚后任务 id 会被复用，清掉进程内缓存
+        task_cache.local.clear()
+
+    def test_stream_matches_regular_response(self):
+        creator = User.objects.create(name='管理员 \u2028')
+        for count in (0, 1, 5):
+            task = Task.objects.create(creator=creator, space_x=10, space_y=10, space_z=10)
+            Item.objects.bulk_create([
+                Item(task=task, order_id=i + 1, name=f'物品"{i}"', position_x=i * 0.1, position_y=0, position_z=0,
+                     width=1, height=1, depth=1, fragile=i % 2 == 0)
+                for i in range(count)
+            ])
+            regular = self.client.get(f'/api/tasks/{task.id}/')
+            # 每批 2 个物品，覆盖分批的边界
+            with mock.patch.object(encoders, 'STREAM_CHUNK', 2):
+                streamed = self.client.get(f'/api/tasks/{task.id}/', {'stream': 'true'})
+                body = b''.join(streamed.streaming_content)
+            self.assertEqual(streamed['Content-Type'], 'application/json')
+            self.assertEqual(body, regular.content)
+
+
+class TaskCacheTests(TestCase):
+    """get_task 的结果缓存、信号失效和 ETag"""
+
+    def setUp(self):
+        task_cache.local.clear()
+        self.task = Task.objects.create(creator=User.objects.create(name='manager'), space_x=10, space_y=10, space_z=10)
+        self.item = Item.objects.create(task=self.task, order_id=1, name='box', position_x=0, position_y=0,
+                                        position_z=0, width=1, height=1, depth=1)
+        self.url = f'/api/tasks/{self.task.id}/'
+
+    def test_cache_hit_skips_task_and_item_queries(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_stale_task_save_does_not_roll_back_revision(self):
+        stale = Task.objects.get(id=self.task.id)
+        self.task.space_x = 20
+        self.task.save()
+        first = self.client.get(self.url)
+        # 旧实例上的 revision 还是 1，保存时不能把数据库里的值写回去
+        stale.space_y = 30
+        stale.save()
+        second = self.client.get(self.url)
+        self.assertEqual(Task.objects.get(id=self.task.id).revision, 3)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual((second.json()['space_info']['y'], second.json()['space_info']['x']), (30, 10))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_item_save_invalidates(self):
+        first = self.client.get(self.url)
+        self.item.name = 'renamed'
+        self.item.save()
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json()['items'][0]['name'], 'renamed')
+
+    def test_touch_after_bulk_write(self):
+        first = self.client.get(self.url)
+        Item.objects.filter(task=self.task).update(name='bulk')
+        task_cache.touch(self.task.id)
+        second = self.client.get(self.url)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json()['items'][0]['name'], 'bulk')
+
+    @override_settings(TASK_CACHE_BACKEND='default')
+    def test_shared_backend(self):
+        first = self.client.get(self.url)
+        self.assertEqual(task_cache.local.size, 0)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.item.delete()
+        self.assertEqual(self.client.get(self.url).json()['items'], [])
+
+
+def float32(value):
+    return struct.unpack('<f', struct.pack('<f', value))[0]
+
+
+class LayoutFormatTests(TestCase):
+    """二进制布局格式的编码、解码和内容协商"""
+
+    def rows(self, count):
+        return [
+            (i + 1, ['箱子', 'box', f'item{i}'][i % 3], i * 0.1, i * 0.25, 3.0,
+             1.5, 0.3, 2.0 + i, i % 2 == 0, i % 5 == 0)
+            for i in range(count)
+        ]
+
+    def assert_round_trip(self, rows):
+        decoded = layout_format.decode_layout(layout_format.encode_layout(42, (10.0, 20.5, 30.0), rows))
+        self.assertEqual(decoded['id'], 42)
+        self.assertEqual(decoded['space_info'], {'x': 10.0, 'y': 20.5, 'z': 30.0})
+        expected = [encoders.encode_item(row) for row in rows]
+        for item in expected:
+            for key in ('position', 'dimensions'):
+                item[key] = {axis: float32(value) for axis, value in item[key].items()}
+        self.assertEqual(decoded['items'], expected)
+
+    def test_round_trip(self):
+        # 0 个、不满一个字节和跨越字节边界的位图
+        for count in (0, 1, 7, 8, 9, 17, 300):
+            self.assert_round_trip(self.rows(count))
+
+    def test_names_are_stored_once(self):
+        rows = [(i + 1, 'same name', 0, 0, 0, 1, 1, 1, False, False) for i in range(100)]
+        data = layout_format.encode_layout(1, (1, 1, 1), rows)
+        self.assertEqual(data.count('same name'.encode()), 1)
+
+    def test_truncated_data(self):
+        data = layout_format.encode_layout(1, (1, 1, 1), self.rows(10))
+        for size in (0, 10, len(data) // 2, len(data) - 1):
+            with self.assertRaises(ValueError):
+                layout_format.decode_layout(data[:size])
+        with self.assertRaises(ValueError):
+            layout_format.decode_layout(b'JSON' + data[4:])
+
+    def test_get_task_negotiates_layout(self):
+        task_cache.local.clear()
+        task = Task.objects.create(creator=User.objects.create(name='manager'), space_x=10, space_y=10, space_z=10)
+        Item.objects.bulk_create([
+            Item(task=task, order_id=i + 1, name=f'item{i}', position_x=i, position_y=0.5, position_z=0,
+                 width=1, height=0.5, depth=1, face_up=i == 1)
+            for i in range(3)
+        ])
+        url = f'/api/tasks/{task.id}/'
+        regular = self.client.get(url)
+        by_query = self.client.get(url, {'format': 'layout'})
+        by_accept = self.client.get(url, HTTP_ACCEPT=layout_format.MEDIA_TYPE)
+        self.assertEqual(by_query['Content-Type'], layout_format.MEDIA_TYPE)
+        self.assertEqual(by_query.content, by_accept.content)
+        self.assertEqual(layout_format.decode_layout(by_query.content)['items'], regular.json()['items'])
+        self.assertNotEqual(by_query['ETag'], regular['ETag'])
+        self.assertEqual(self.client.get(url, {'format': 'layout'}, HTTP_IF_NONE_MATCH=by_query['ETag']).status_code, 304)
+
+
+# 沿 z 轴依次排开的简单算法，用来和内置算法的结果区分
+LINE_ALGORITHM = """
+def place_items(items_data, space_dimensions):
+    placed = []
+    z = 0
+    for index, item in enumerate(items_data):
+        placed.append({
+            'order_id': index + 1,
+            'name': item['name'],
+            'position': {'x': 0, 'y': 0, 'z': z},
+            'dimensions': dict(item['dimensions']),
+            'face_up': item.get('face_up', False),
+            'fragile': item.get('fragile', False),
+        })
+        z += item['dimensions']['z']
+    return placed
+"""
+
+
+class AlgorithmVersionTests(TestCase):
+    """算法版本的上传、子进程校验和按请求 / 全局选择"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create(name='manager')
+
+    def upload(self, source, **data):
+        upload = SimpleUploadedFile('algorithm.py', source.encode())
+        return self.client.post('/api/algorithm/upload/', {'file': upload, **data})
+
+    def create_task(self, **extra):
+        # 长度不同的物品：内置引擎大件先装，与按输入顺序排成一行的结果不同
+        items = [{'name': f'item{i}', 'dimensions': {'x': i + 1, 'y': 1, 'z': 1}} for i in range(3)]
+        response = self.client.post('/api/tasks/create/', {
+            'creator_id': self.creator.id, 'space_info': {'x': 10, 'y': 10, 'z': 10}, 'items': items, **extra,
+        }, content_type='application/json')
+        return response
+
+    def test_validation_rejects_bad_uploads(self):
+        self.assertIsNone(algorithms.validate(LINE_ALGORITHM))
+        self.assertIn('errors', algorithms.validate('def place_items(:\n'))
+        self.assertIn('must return a list', algorithms.validate('def place_items(items, space):\n    return None\n'))
+        # 导入时申请超出上限的内存
+        self.assertIsNotNone(algorithms.validate('data = bytearray(4 * 1024 ** 3)\ndef place_items(i, s):\n    return []\n'))
+
+    @override_settings(ALGORITHM_VALIDATION_TIMEOUT=1)
+    def test_validation_timeout(self):
+        error = algorithms.validate('def place_items(items, space):\n    while True:\n        pass\n')
+        self.assertIsNotNone(error)
+        self.assertEqual(AlgorithmVersion.objects.count(), 0)
+
+    def test_validation_ignores_forged_stdout(self):
+        # 上传的代码伪造通过的结果后提前退出
+        forged = 'import os, sys\nprint(\'{"ok": true, "error": null}\')\nsys.stdout.flush()\nos._exit(0)\n'
+        self.assertIsNotNone(algorithms.validate(forged))
+        self.assertIsNotNone(algorithms.validate(forged.replace('os._exit(0)', 'sys.exit(0)')))
+        self.assertIsNotNone(algorithms.validate(LINE_ALGORITHM + 'import sys\nsys.exit(3)\n'))
+
+    @override_settings(ALGORITHM_RUN_TIMEOUT=1)
+    def test_stuck_algorithm_does_not_block_create_task(self):
+        # 校验只用示例物品，物品名以 item 开头时才卡住
+        source = LINE_ALGORITHM.replace('    placed = []\n', "    while items_data[0]['name'].startswith('item'):\n"
+                                        '        pass\n    placed = []\n')
+        self.assertIsNone(algorithms.validate(source))
+        version, _ = algorithms.register(source, activate=True)
+        response = self.create_task()
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('timed out', response.json()['error'])
+        self.assertEqual(Task.objects.count(), 0)
+        with self.assertRaises(algorithm_runtime.AlgorithmError):
+            algorithms.place_items(version, [{'name': 'item0', 'dimensions': {'x': 1, 'y': 1, 'z': 1}}],
+                                   {'x': 2, 'y': 2, 'z': 2})
+
+    def test_upload_activates_new_version(self):
+        response = self.upload(LINE_ALGORITHM, name='line')
+        self.assertEqual(response.status_code, 200)
+        version = response.json()['version']
+        self.assertTrue(version['is_active'])
+        self.assertTrue(response.json()['created'])
+
+        positions = [item['position']['z'] for item in self.create_task().json()['items']]
+        self.assertEqual(positions, [0, 1, 2])
+        self.assertEqual(Task.objects.get().algorithm_id, version['id'])
+
+        # 同样的内容不会生成新版本
+        again = self.upload(LINE_ALGORITHM, activate='false').json()
+        self.assertEqual(again['version']['id'], version['id'])
+        self.assertFalse(again['created'])
+
+    def test_upload_rejects_bad_name(self):
+        response = self.upload(LINE_ALGORITHM, name='x' * 101)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.json())
+        self.assertEqual(AlgorithmVersion.objects.count(), 0)
+
+    def test_select_version_per_request_and_globally(self):
+        version, _ = algorithms.register(LINE_ALGORITHM)
+        self.assertIsNone(Task.objects.filter(algorithm__isnull=False).first())
+        builtin = self.create_task().json()
+        selected = self.create_task(algorithm_version=version.id).json()
+        self.assertEqual([item['position']['z'] for item in selected['items']], [0, 1, 2])
+        self.assertNotEqual(builtin['items'], selected['items'])
+
+        self.client.post('/api/algorithm/activate/', {'version': version.id}, content_type='application/json')
+        self.assertEqual(self.client.get('/api/algorithm/versions/').json()['active'], version.id)
+        self.assertEqual(self.create_task(algorithm_version='builtin').json()['items'], builtin['items'])
+        self.client.post('/api/algorithm/activate/', {'version': 'builtin'}, content_type='application/json')
+        self.assertEqual(self.create_task().json()['items'], builtin['items'])
+
+        self.assertEqual(self.create_task(algorithm_version=version.id + 1).status_code, 404)
+        self.assertEqual(self.create_task(algorithm_version='latest').status_code, 400)
+
+
+class AlgorithmBenchmarkTests(TestCase):
+    """布局检查、算法基准和排名"""
+
+    # 体积超过空间，沿 z 轴排开的算法会越界
+    CASES = [algorithm_bench.Case('small', (4, 4, 4), [
+        {'name': f'item{i}', 'dimensions': {'x': 2, 'y': 2, 'z': 2}, 'face_up': False, 'fragile': False}
+        for i in range(9)
+    ])]
+
+    def test_layout_check(self):
+        boxes = [
+            ((0, 0, 0), (2, 2, 2)),
+            ((2, 0, 0), (2, 2, 2)),  # 只有接触面
+            ((1, 1, 1), (2, 2, 2)),  # 与前两个都重叠
+            ((3, 0, 3), (2, 1, 1)),  # 超出 x
+        ]
+        self.assertEqual(layout_check.overlaps(boxes), 2)
+        self.assertEqual(layout_check.out_of_bounds(boxes, (4, 4, 4)), 1)
+
+    def test_violations_rank_last(self):
+        version, _ = algorithms.register(LINE_ALGORITHM, name='line')
+        algorithm_bench.run([version, None], 'test', self.CASES, repeats=2)
+        data = self.client.get('/api/algorithm/leaderboard/').json()
+        self.assertEqual(data['corpus'], 'test')
+        self.assertEqual([row['version'] for row in data['results']], ['builtin', version.id])
+        builtin, line = data['results']
+        self.assertEqual(builtin['violations'], 0)
+        self.assertEqual(builtin['fill_ratio'], 1.0)
+        self.assertEqual(line['cases'][0]['out_of_bounds'], 7)
+        self.assertEqual(line['rank'], 2)
+
+    def test_command_run(self):
+        with mock.patch.object(algorithm_bench, 'synthetic_cases', return_value=self.CASES):
+            out = io.StringIO()
+            call_command('benchmark_algorithms', '--repeats', '1', stdout=out)
+        self.assertIn('builtin', out.getvalue())
+        self.assertEqual(AlgorithmBenchmark.objects.count(), 1)
+
+
+class BenchmarkRunTests(TransactionTestCase):
+    """POST /api/algorithm/leaderboard/ 在后台运行基准；结果由回调线程写入，需要真正提交的事务"""
+
+    def test_endpoint_submits_run(self):
+        version, _ = algorithms.register(LINE_ALGORITHM, name='line')
+        release = threading.Event()
+        measure_all = algorithm_runtime.measure_all
+
+        def slow_measure_all(*args):
+            release.wait(10)
+            return measure_all(*args)
+
+        with ThreadPoolExecutor(1) as executor, mock.patch.object(jobs, 'get_executor', return_value=executor), \
+                mock.patch.object(algorithm_runtime, 'measure_all', side_effect=slow_measure_all), \
+                mock.patch.object(algorithm_bench, 'synthetic_cases', return_value=AlgorithmBenchmarkTests.CASES):
+            response = self.client.post('/api/algorithm/leaderboard/', {'repeats': 1},
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 202)
+            run_id = response.json()['run_id']
+            self.assertEqual(response.json()['status'], 'pending')
+            self.assertEqual(self.client.get(f'/api/algorithm/leaderboard/runs/{run_id}/').json()['status'], 'pending')
+            # GET 只读取已保存的结果
+            self.assertEqual(self.client.get('/api/algorithm/leaderboard/').json()['results'], [])
+            release.set()
+        # 退出 with 时进程池等待任务和回调完成
+        run = self.client.get(f'/api/algorithm/leaderboard/runs/{run_id}/').json()
+        self.assertEqual(run['status'], 'done')
+        self.assertEqual([row['version'] for row in run['results']], ['builtin', version.id])
+        self.assertEqual(run['results'][1]['cases'][0]['out_of_bounds'], 7)
+        leaderboard = self.client.get('/api/algorithm/leaderboard/').json()
+        self.assertEqual(leaderboard['results'], run['results'])
+        self.assertEqual(self.client.get('/api/algorithm/leaderboard/runs/0/').status_code, 404)
+
+    def test_worker_exception_marks_failed(self):
+        with ThreadPoolExecutor(1) as executor, mock.patch.object(jobs, 'get_executor', return_value=executor), \
+                mock.patch.object(algorithm_runtime, 'measure_all', side_effect=RuntimeError('pool crashed')), \
+                self.assertLogs(jobs.logger, 'ERROR'):
+            run_id = self.client.post('/api/algorithm/leaderboard/', {'versions': ['builtin'], 'repeats': 1},
+                                      content_type='application/json').json()['run_id']
+        run = self.client.get(f'/api/algorithm/leaderboard/runs/{run_id}/').json()
+        self.assertEqual(run['status'], 'failed')
+        self.assertEqual(run['error'], 'pool crashed')
+        self.assertEqual(AlgorithmBenchmark.objects.count(), 0)
+
+
+class AnytimePackingTests(TestCase):
+    """按时间预算或迭代次数改进装填率"""
+
+    def setUp(self):
+        # 总体积超过空间，装填率才有改进的余地
+        self.case = algorithm_bench.synthetic_cases()[0]
+        self.space = dict(zip('xyz', self.case.space))
+
+    def assert_valid(self, placed):
+        boxes = layout_check.boxes_of(placed)
+        self.assertEqual(layout_check.overlaps(boxes), 0)
+        self.assertEqual(layout_check.out_of_bounds(boxes, self.case.space), 0)
+
+    def test_iterations_are_deterministic_and_never_worse(self):
+        greedy, greedy_stats = packing_algorithm.pack_anytime(self.case.items, self.space)
+        self.assertEqual(greedy, packing_algorithm.place_items(self.case.items, self.space))
+        self.assertEqual(greedy_stats['iterations'], 0)
+        placed, stats = packing_algorithm.pack_anytime(self.case.items, self.space, iterations=6, seed=1)
+        again, _ = packing_algorithm.pack_anytime(self.case.items, self.space, iterations=6, seed=1)
+        self.assertEqual(placed, again)
+        self.assertEqual(stats['iterations'], 6)
+        self.assertGreaterEqual(stats['fill_ratio'], greedy_stats['fill_ratio'])
+        self.assert_valid(placed)
+
+    def test_time_budget(self):
+        placed, stats = packing_algorithm.pack_anytime(self.case.items, self.space, time_budget=0.3)
+        self.assertLess(stats['elapsed'], 1.0)
+        self.assert_valid(placed)
+        self.assertTrue(stats['complete'])
+        # 预算为 0 时第一次装箱只尝试前 32 个物品
+        placed, stats = packing_algorithm.pack_anytime(self.case.items, self.space, time_budget=0)
+        self.assertTrue(0 < len(placed) <= 32)
+        self.assertEqual(stats['iterations'], 0)
+        self.assertFalse(stats['complete'])
+        self.assert_valid(placed)
+
+    def test_time_budget_bounds_first_pass(self):
+        # 完整的第一次装箱需要几秒
+        rng = random.Random(0)
+        items = [{'name': f'item{i}', 'dimensions': {axis: rng.randint(1, 10) for axis in 'xyz'}} for i in range(5000)]
+        space = {'x': 120, 'y': 40, 'z': 120}
+        placed, stats = packing_algorithm.pack_anytime(items, space, time_budget=0.2)
+        self.assertLess(stats['elapsed'], 0.5)
+        self.assertFalse(stats['complete'])
+        self.assertTrue(placed)
+        boxes = layout_check.boxes_of(placed)
+        self.assertEqual(layout_check.overlaps(boxes), 0)
+        self.assertEqual(layout_check.out_of_bounds(boxes, (120, 40, 120)), 0)
+
+    def test_create_task_reports_packing_stats(self):
+        creator = User.objects.create(name='manager')
+        body = {'creator_id': creator.id, 'space_info': self.space, 'items': self.case.items, 'time_budget': 0.2}
+        data = self.client.post('/api/tasks/create/', body, content_type='application/json').json()
+        self.assertGreater(data['packing']['fill_ratio'], 0.5)
+        task = Task.objects.get(id=data['id'])
+        self.assertEqual(task.iterations, data['packing']['iterations'])
+        with override_settings(PACKING_MAX_TIME_BUDGET=0.1):
+            response = self.client.post('/api/tasks/create/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class MultiStartPackingTests(TestCase):
+    """多起点装箱：结果只由种子决定，并行与否相同"""
+
+    def setUp(self):
+        self.case = algorithm_bench.synthetic_cases()[3]
+        self.space = dict(zip('xyz', self.case.space))
+
+    def test_same_result_sequential_and_parallel(self):
+        seeds = [0, 1, 2, 3]
+        sequential = packing_algorithm.pack_multistart(self.case.items, self.space, seeds, iterations=2)
+        with ThreadPoolExecutor(3) as executor:
+            parallel = packing_algorithm.pack_multistart(self.case.items, self.space, seeds, iterations=2,
+                                                         executor=executor)
+        self.assertEqual(parallel[0], sequential[0])
+        self.assertEqual(parallel[1]['start'], sequential[1]['start'])
+        self.assertEqual(sequential[1]['starts'], 4)
+        self.assertEqual(sequential[1]['iterations'], 8)
+        for seed in seeds:
+            _, single = packing_algorithm.pack_anytime(self.case.items, self.space, iterations=2, seed=seed)
+            self.assertGreaterEqual(sequential[1]['fill_ratio'], single['fill_ratio'])
+
+    def test_starts_share_one_deadline(self):
+        # 起点多于进程数时，排队的起点只用剩下的时间
+        with ThreadPoolExecutor(1) as executor:
+            start = time.perf_counter()
+            placed, stats = packing_algorithm.pack_multistart(self.case.items, self.space, [0, 1, 2, 3],
+                                                              time_budget=0.3, executor=executor)
+            elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(stats['starts'], 4)
+        self.assertTrue(placed)
+
+    def test_ties_keep_first_start(self):
+        results = [([1], {'fill_ratio': 0.5, 'iterations': 1, 'improvements': 0, 'elapsed': 0.1}),
+                   ([2], {'fill_ratio': 0.7, 'iterations': 1, 'improvements': 1, 'elapsed': 0.2}),
+                   ([3], {'fill_ratio': 0.7, 'iterations': 1, 'improvements': 1, 'elapsed': 0.1})]
+        placed, stats = packing_algorithm.best_of(results)
+        self.assertEqual((placed, stats['start'], stats['iterations']), ([2], 1, 3))
+
+    def test_create_task_with_starts(self):
+        creator = User.objects.create(name='manager')
+        body = {'creator_id': creator.id, 'space_info': self.space, 'items': self.case.items, 'starts': 3, 'seed': 5}
+        with ThreadPoolExecutor(3) as executor, mock.patch.object(jobs, 'get_executor', return_value=executor):
+            first = self.client.post('/api/tasks/create/', body, content_type='application/json').json()
+            second = self.client.post('/api/tasks/create/', body, content_type='application/json').json()
+        self.assertEqual(first['items'], second['items'])
+        self.assertEqual(first['packing']['iterations'], 3 * jobs.start_iterations())
+
+
+class LayoutCacheTests(TestCase):
+    """重复的发货单直接使用缓存的布局"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create(name='manager')
+
+    def items(self, prefix='item'):
+        return [
+            {'name': f'{prefix}{i}', 'dimensions': {'x': 1 + i % 3, 'y': 1, 'z': 2}, 'face_up': i % 4 == 0,
+             'fragile': i == 5}
+            for i in range(12)
+        ]
+
+    def create(self, items, space=None, **extra):
+        body = {'creator_id': self.creator.id, 'space_info': space or {'x': 4, 'y': 3, 'z': 4}, 'items': items, **extra}
+        return self.client.post('/api/tasks/create/', body, content_type='application/json').json()
+
+    def test_hit_skips_engine_and_keeps_request_names(self):
+        first = self.create(self.items())
+        self.assertFalse(first['packing']['cached'])
+        # 顺序和名称不同，尺寸的多重集合相同
+        renamed = list(reversed(self.items('box')))
+        with mock.patch.object(algorithms, 'pack', side_effect=AssertionError('engine called')):
+            second = self.create(renamed)
+        self.assertTrue(second['packing']['cached'])
+        self.assertEqual(second['packing']['fill_ratio'], first['packing']['fill_ratio'])
+        strip = lambda item: (item['position'], item['dimensions'], item['face_up'], item['fragile'])
+        self.assertEqual([strip(item) for item in second['items']], [strip(item) for item in first['items']])
+        self.assertEqual({item['name'] for item in second['items']} - {item['name'] for item in renamed}, set())
+        self.assertEqual(LayoutCacheEntry.objects.get().hits, 1)
+
+    def test_truncated_layout_not_cached(self):
+        items = self.items()
+        placed = packing_algorithm.place_items(items, {'x': 4, 'y': 3, 'z': 4})
+        stats = {'fill_ratio': 0.5, 'iterations': 0, 'improvements': 0, 'elapsed': 0.1, 'complete': False}
+        layout_cache.put('partial', items, placed[:3], stats)
+        self.assertFalse(LayoutCacheEntry.objects.exists())
+
+    def test_key_includes_space_algorithm_and_options(self):
+        items = self.items()
+        space = {'x': 4, 'y': 3, 'z': 4}
+        version, _ = algorithms.register(LINE_ALGORITHM)
+        keys = {
+            layout_cache.make_key(items, space, None, {}),
+            layout_cache.make_key(items, dict(space, x=5), None, {}),
+            layout_cache.make_key(items, space, version, {}),
+            layout_cache.make_key(items, space, None, {'time_budget': 1.0}),
+            layout_cache.make_key(items[:-1], space, None, {}),
+        }
+        self.assertEqual(len(keys), 5)
+        self.assertEqual(layout_cache.make_key(list(reversed(items)), space, None, {}),
+                         layout_cache.make_key(items, space, None, {}))
+
+    @override_settings(LAYOUT_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_entry_is_evicted(self):
+        spaces = [{'x': 4, 'y': 3, 'z': size} for size in (4, 5, 6)]
+        self.create(self.items(), spaces[0])
+        self.create(self.items(), spaces[1])
+        self.create(self.items(), spaces[0])  # 命中，spaces[0] 成为最近使用
+        self.create(self.items(), spaces[2])
+        self.assertEqual(LayoutCacheEntry.objects.count(), 2)
+        self.assertTrue(self.create(self.items(), spaces[0])['packing']['cached'])
+        self.assertFalse(self.create(self.items(), spaces[1])['packing']['cached'])
+
+
+class IncrementalRepackingTests(TestCase):
+    """向已有任务添加、删除物品"""
+
+    def setUp(self):
+        task_cache.local.clear()
+        self.task = Task.objects.create(creator=User.objects.create(name='manager'), space_x=4, space_y=4, space_z=4)
+
+    def add_item(self, order_id, position, dims=(1, 1, 1), **flags):
+        return Item.objects.create(task=self.task, order_id=order_id, name=f'item{order_id}',
+                                   position_x=position[0], position_y=position[1], position_z=position[2],
+                                   width=dims[0], height=dims[1], depth=dims[2], **flags)
+
+    def post(self, action, body):
+        return self.client.post(f'/api/tasks/{self.task.id}/items/{action}/', body, content_type='application/json')
+
+    def rows(self):
+        return list(Item.objects.filter(task=self.task).order_by('order_id').values_list(
+            'id', 'order_id', 'position_x', 'position_y', 'position_z'))
+
+    def test_add_keeps_existing_items(self):
+        self.add_item(1, (0, 0, 0), (4, 1, 4))
+        self.add_item(2, (0, 1, 0), (2, 2, 2), fragile=True)
+        before = self.rows()
+        etag = self.client.get(f'/api/tasks/{self.task.id}/')['ETag']
+
+        items = [{'name': f'new{i}', 'dimensions': {'x': 1, 'y': 1, 'z': 1}} for i in range(30)]
+        data = self.post('add', {'items': items}).json()
+        self.assertEqual(self.rows()[:2], before)
+        self.assertEqual([item['order_id'] for item in data['items']], list(range(3, 3 + len(data['items']))))
+        # 第一层之上 4x3x4 的空间减去易碎品上方的 2x3x2，还能放下 36 个
+        self.assertEqual((len(data['items']), data['unplaced']), (30, []))
+
+        stored = Item.objects.filter(task=self.task).values_list(
+            'position_x', 'position_y', 'position_z', 'width', 'height', 'depth')
+        boxes = [((x, y, z), (w, h, d)) for x, y, z, w, h, d in stored]
+        self.assertEqual(layout_check.overlaps(boxes), 0)
+        self.assertEqual(layout_check.out_of_bounds(boxes, (4, 4, 4)), 0)
+        # 没有物品压在易碎品上
+        self.assertFalse([b for b in boxes[2:] if b[0][1] >= 3 and b[0][0] < 2 and b[0][2] < 2])
+        self.assertNotEqual(self.client.get(f'/api/tasks/{self.task.id}/')['ETag'], etag)
+
+    def test_add_reports_unplaced(self):
+        self.add_item(1, (0, 0, 0), (4, 4, 4))
+        data = self.post('add', {'items': [{'name': 'extra', 'dimensions': {'x': 1, 'y': 1, 'z': 1}}]}).json()
+        self.assertEqual((data['items'], data['unplaced']), ([], ['extra']))
+
+    def test_remove_drops_items_above_and_renumbers(self):
+        base = self.add_item(1, (0, 0, 0))
+        side = self.add_item(2, (2, 0, 0))
+        removed = self.add_item(3, (0, 1, 0))
+        top = self.add_item(4, (0, 2, 0))
+        beside = self.add_item(5, (2, 1, 0))  # 在 side 上面，不受影响
+        data = self.post('remove', {'order_ids': [3]}).json()
+        self.assertEqual(data['removed'], 1)
+        self.assertEqual([(item['order_id'], item['position']['y']) for item in data['moved']], [(3, 1.0)])
+        self.assertEqual(self.rows(), [
+            (base.id, 1, 0, 0, 0), (side.id, 2, 2, 0, 0), (top.id, 3, 0, 1, 0), (beside.id, 4, 2, 1, 0),
+        ])
+        self.assertFalse(Item.objects.filter(id=removed.id).exists())
+
+    def test_remove_keeps_unsupported_drops_in_place(self):
+        self.add_item(1, (0, 0, 0))
+        self.add_item(2, (1, 0, 0), (3, 2, 1))
+        self.add_item(3, (0, 2, 0), (4, 1, 1))
+        self.add_item(4, (0, 3, 0), (4, 1, 1), fragile=True)
+        # 落到 y=1 时只有 1/4 的底面压在 item1 上，整摞保持原位
+        data = self.post('remove', {'order_ids': [2]}).json()
+        self.assertEqual(data['moved'], [])
+        self.assertEqual([row[3] for row in self.rows()], [0, 2, 3])
+
+    def test_compact_checks_fragile_items(self):
+        fragile = ((0, 0, 0), (1, 1, 1), True)
+        stack = ((0, 2, 0), (1, 1, 1), False)
+        removed = ((0, 1, 0), (1, 1, 1))
+        self.assertEqual(packing_algorithm.compact({'fragile': fragile, 'stack': stack}, [removed]), {})
+        plain = ((0, 0, 0), (1, 1, 1), False)
+        self.assertEqual(packing_algorithm.compact({'plain': plain, 'stack': stack}, [removed]), {'stack': 1})
+
+    def test_remove_several_keeps_order_contiguous(self):
+        for i in range(8):
+            self.add_item(i + 1, (i % 4, 0, i // 4))
+        self.post('remove', {'order_ids': [2, 5, 6]})
+        self.assertEqual([row[1] for row in self.rows()], [1, 2, 3, 4, 5])
+        self.assertEqual([row[2:5] for row in self.rows()],
+                         [(0, 0, 0), (2, 0, 0), (3, 0, 0), (2, 0, 1), (3, 0, 1)])
+
+    def test_errors(self):
+        self.add_item(1, (0, 0, 0))
+        self.assertEqual(self.post('remove', {'order_ids': [1, 7]}).status_code, 404)
+        self.assertEqual(Item.objects.count(), 1)
+        Task.objects.filter(id=self.task.id).update(status=Task.STATUS_PENDING)
+        self.assertEqual(self.post('remove', {'order_ids': [1]}).status_code, 409)
+        self.assertEqual(self.client.post('/api/tasks/0/items/add/', {'items': []},
+                                          content_type='application/json').status_code, 400)
+
+
+class MultiContainerTests(TestCase):
+    """多容器装箱：装进尽量少的同尺寸容器"""
+
+    SPACE = {'x': 6, 'y': 4, 'z': 6}
+
+    def items(self, count=400):
+        rng = random.Random(7)
+        return [{'name': f'item{i}', 'dimensions': {'x': rng.randint(1, 3), 'y': rng.randint(1, 3), 'z': rng.randint(1, 3)},
+                 'face_up': rng.random() < 0.2, 'fragile': rng.random() < 0.03} for i in range(count)]
+
+    def check_layout(self, placed, stats):
+        by_container = {}
+        for p in placed:
+            by_container.setdefault(p['container'], []).append(p)
+        self.assertEqual(sorted(by_container), list(range(stats['containers'])))
+        self.assertEqual([p['order_id'] for p in placed], list(range(1, len(placed) + 1)))
+        self.assertEqual([p['container'] for p in placed], sorted(p['container'] for p in placed))
+        for container in by_container.values():
+            boxes = layout_check.boxes_of(container)
+            self.assertEqual(layout_check.overlaps(boxes), 0)
+            self.assertEqual(layout_check.out_of_bounds(boxes, (6, 4, 6)), 0)
+
+    def test_packs_everything_into_few_containers(self):
+        items = self.items()
+        placed, stats = packing_algorithm.pack_containers(items, self.SPACE)
+        self.check_layout(placed, stats)
+        self.assertEqual((len(placed), stats['unplaced']), (len(items), 0))
+        self.assertGreater(stats['lower_bound'], 5)
+        self.assertLessEqual(stats['containers'], stats['lower_bound'] + 2)
+        self.assertEqual(stats['container_fill'], sorted(stats['container_fill'], reverse=True))
+
+    def test_same_result_sequential_and_parallel(self):
+        items = self.items(200)
+        with ThreadPoolExecutor(3) as executor:
+            parallel = packing_algorithm.pack_containers(items, self.SPACE, executor=executor)
+        sequential = packing_algorithm.pack_containers(items, self.SPACE)
+        self.assertEqual(parallel[0], sequential[0])
+
+    def test_exact_fit_and_oversized(self):
+        items = [{'name': f'cube{i}', 'dimensions': {'x': 1, 'y': 1, 'z': 1}} for i in range(16)]
+        items.append({'name': 'huge', 'dimensions': {'x': 3, 'y': 1, 'z': 1}})
+        placed, stats = packing_algorithm.pack_containers(items, {'x': 2, 'y': 2, 'z': 2})
+        self.assertEqual((stats['containers'], stats['lower_bound'], stats['unplaced']), (2, 2, 1))
+        self.assertEqual(stats['container_fill'], [1.0, 1.0])
+        self.assertNotIn('huge', [p['name'] for p in placed])
+
+    def test_api(self):
+        creator = User.objects.create(name='manager')
+        body = {'creator_id': creator.id, 'space_info': self.SPACE, 'items': self.items(150)}
+        with ThreadPoolExecutor(2) as executor, mock.patch.object(jobs, 'get_executor', return_value=executor):
+            response = self.client.post('/api/tasks/create/containers/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        containers = data['containers']
+        self.assertGreater(len(containers), 1)
+        self.assertEqual(sum(c['item_count'] for c in containers), len(data['items']))
+        self.assertEqual(data['packing']['unplaced'], 0)
+
+        task_id = data['id']
+        self.assertEqual(self.client.get(f'/api/tasks/{task_id}/containers/').json()['containers'], containers)
+        page = self.client.get(f'/api/tasks/{task_id}/items/', {'container': 1, 'limit': 100}).json()['results']
+        first = containers[0]['item_count']
+        self.assertEqual([item['order_id'] for item in page], list(range(first + 1, first + containers[1]['item_count'] + 1)))
+        self.assertEqual(Item.objects.filter(task_id=task_id, container__isnull=True).count(), 0)
+        self.assertEqual(Container.objects.filter(task_id=task_id).count(), len(containers))
+
+        # 多容器任务不能增量修改
+        response = self.client.post(f'/api/tasks/{task_id}/items/remove/', {'order_ids': [1]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(f'/api/tasks/{task_id}/items/', {'container': 'x'}).status_code, 400)
+
+
+class LayoutValidationTests(TestCase):
+    """布局检查：重叠、越界、支撑、易碎品受压和质量指标"""
+
+    # 每类违规各一个，下标 0~3 是合法的两层
+    BOXES = [
+        ((0, 0, 0), (2, 1, 2)),
+        ((2, 0, 0), (2, 1, 2)),
+        ((0, 1, 0), (2, 1, 2)),       # 放在 0 上
+        ((2, 1, 0), (1, 1, 1)),       # 易碎品 1 上面的物品
+        ((0.5, 0, 2.5), (1, 1, 1)),   # 与 5 重叠
+        ((1, 0, 2), (1, 1, 1)),
+        ((3.5, 0, 3), (1, 1, 1)),     # 越界
+        ((0, 2.5, 0), (1, 1, 1)),     # 悬空
+        ((3, 1, 1.5), (1, 1, 1)),     # 支撑不足：底面只有一半压在 1 的顶面上
+    ]
+    FRAGILE = [False, True, False, False, False, False, False, False, False]
+
+    def test_detects_each_violation(self):
+        for use_numpy in (False, True):
+            result = layout_check.validate(self.BOXES, (4, 4, 4), self.FRAGILE, use_numpy=use_numpy)
+            self.assertEqual(result['details'], {
+                'overlaps': [[4, 5]],
+                'out_of_bounds': [6],
+                'unsupported': [7, 8],
+                'fragile_loaded': [1],
+            })
+            self.assertFalse(result['valid'])
+            volume = 3 * 4 + 6
+            self.assertAlmostEqual(result['utilization'], volume / 64)
+            self.assertAlmostEqual(result['center_of_gravity']['y'],
+                                   (2 * 4 * 0.5 + 4 * 1.5 + 1.5 + 3 * 0.5 + 3 + 1.5) / volume)
+
+    def test_paths_agree_on_random_layouts(self):
+        rng = random.Random(3)
+        for _ in range(20):
+            boxes = [(tuple(rng.choice([0, 0.5, 1, 2, rng.uniform(-1, 5)]) for _ in range(3)),
+                      tuple(rng.choice([0.5, 1, 2, rng.uniform(0, 3)]) for _ in range(3)))
+                     for _ in range(rng.randint(0, 40))]
+            fragile = [rng.random() < 0.3 for _ in boxes]
+            python = layout_check.validate(boxes, (5, 5, 5), fragile, use_numpy=False)
+            vectorized = layout_check.validate(boxes, (5, 5, 5), fragile, use_numpy=True)
+            self.assertEqual(python['details'], vectorized['details'])
+            self.assertEqual(python['overlaps'], layout_check.overlaps([box for box in boxes if min(box[1]) > 0]))
+
+    def test_builtin_layouts_are_valid(self):
+        case = algorithm_bench.synthetic_cases()[3]
+        placed = packing_algorithm.place_items(case.items, dict(zip('xyz', case.space)))
+        self.assertTrue(layout_metrics.of_placed(placed, case.space)['valid'])
+
+    def test_violations_recorded_after_packing(self):
+        creator = User.objects.create(name='manager')
+        version, _ = algorithms.register(LINE_ALGORITHM)
+        items = [{'name': f'item{i}', 'dimensions': {'x': 1, 'y': 1, 'z': 2}} for i in range(5)]
+        body = {'creator_id': creator.id, 'space_info': {'x': 2, 'y': 2, 'z': 4}, 'items': items}
+        data = self.client.post('/api/tasks/create/', dict(body, algorithm_version=str(version.id)),
+                                content_type='application/json').json()
+        self.assertEqual(data['packing']['violations'], 3)
+        data = self.client.post('/api/tasks/create/', dict(body, algorithm_version='builtin'),
+                                content_type='application/json').json()
+        self.assertEqual(data['packing']['violations'], 0)
+
+    def test_metrics_endpoint(self):
+        task = Task.objects.create(creator=User.objects.create(name='manager'), space_x=4, space_y=4, space_z=4)
+        Item.objects.bulk_create([
+            Item(task=task, order_id=index + 1, name=f'item{index}', position_x=corner[0], position_y=corner[1],
+                 position_z=corner[2], width=dims[0], height=dims[1], depth=dims[2], fragile=fragile)
+            for index, ((corner, dims), fragile) in enumerate(zip(self.BOXES, self.FRAGILE))
+        ])
+        response = self.client.get(f'/api/tasks/{task.id}/metrics/')
+        data = response.json()
+        self.assertEqual((data['valid'], data['items'], data['overlaps'], data['unsupported']), (False, 9, 1, 2))
+        self.assertEqual(data['details']['overlaps'], [[5, 6]])
+        self.assertEqual(data['details']['fragile_loaded'], [2])
+        self.assertEqual(self.client.get(f'/api/tasks/{task.id}/metrics/',
+                                         HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get('/api/tasks/0/metrics/').status_code, 404)
+
+    def test_metrics_per_container(self):
+        creator = User.objects.create(name='manager')
+        items = [{'name': f'cube{i}', 'dimensions': {'x': 1, 'y': 1, 'z': 1}} for i in range(12)]
+        body = {'creator_id': creator.id, 'space_info': {'x': 2, 'y': 2, 'z': 2}, 'items': items}
+        with ThreadPoolExecutor(2) as executor, mock.patch.object(jobs, 'get_executor', return_value=executor):
+            task_id = self.client.post('/api/tasks/create/containers/', body, content_type='application/json').json()['id']
+        data = self.client.get(f'/api/tasks/{task_id}/metrics/').json()
+        self.assertTrue(data['valid'])
+        self.assertEqual([(c['index'], c['items'], c['utilization']) for c in data['containers']], [(0, 8, 1.0), (1, 4, 0.5)])
+        self.assertAlmostEqual(data['utilization'], 0.75)
@@ -1,18 +1,21 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from rest_framework import status
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
 from .serializers import *
-from .models import User, Task, Item
+from .models import User, Task, Item, Container, AlgorithmVersion, BenchmarkRun
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .packing_algorithm import place_items
+from . import (algorithm_bench, algorithm_runtime, algorithms, encoders, jobs, layout_cache, layout_format, layout_metrics,
+               pagination, repacking, task_cache)
+from .layout_format import LayoutRenderer
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
 from rest_framework.permissions import AllowAny
-import os
-import importlib.util
-import sys
 from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.db import transaction
+from django.db.models import Count
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 
@@ -139,9 +142,21 @@ def login_user(request):
                     },
                 ),
             ),
+            'algorithm_version': openapi.Schema(type=openapi.TYPE_STRING,
+                                                description="算法版本 id 或 'builtin'，不传时使用当前全局版本"),
+            'time_budget': openapi.Schema(type=openapi.TYPE_NUMBER,
+                                          description='时间预算（秒）：先得到一个合法布局，再在预算内继续改进装填率（仅内置算法）'),
+            'starts': openapi.Schema(type=openapi.TYPE_INTEGER,
+                                     description='多起点并行装箱的起点数量，默认 1（仅内置算法）'),
+            'seed': openapi.Schema(type=openapi.TYPE_INTEGER,
+                                   description='第一个起点的随机种子，相同的 seed、starts 且不给 time_budget 时结果相同'),
         },
     ),
-    responses={201: TaskSerializer}
+    manual_parameters=[
+        openapi.Parameter('async', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                          description='为 true 时后台装箱，立即返回 202 和 job_id')
+    ],
+    responses={201: TaskSerializer, 202: "任务已进入后台队列"}
 )
 
 @csrf_exempt
@@ -175,13 +190,23 @@ def create_task(request):
         # 获取物品信息
         items_data = validated_data['items']
         
-        # 创建任务
-        task = Task.objects.create(
+        # 多起点的随机种子
+        seeds = list(range(validated_data['seed'], validated_data['seed'] + validated_data['starts']))
+        
+        # 获取算法版本（请求指定或当前全局版本，None 为内置算法）
+        try:
+            algorithm = algorithms.resolve(validated_data.get('algorithm_version'))
+        except AlgorithmVersion.DoesNotExist:
+            return Response({"error": "Algorithm version not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        # 创建任务：异步模式先写入 pending 任务，同步模式等物品算好后与物品在同一个事务里写入
+        task = Task(
             creator=creator,
             worker=worker,
             space_x=space_data['x'],
             space_y=space_data['y'],
-            space_z=space_data['z']
+            space_z=space_data['z'],
+            algorithm=algorithm
         )
         
         # 这里应该有算法计算物品的最佳位置和顺序
@@ -230,36 +255,174 @@ def create_task(request):
         #     )
 
 
-                # 使用算法模块计算物品的摆放位置
-        placed_items = place_items(items_data, space_data)
+        # 相同的空间、物品尺寸、算法和选项之前算过时直接使用缓存的布局
+        time_budget = validated_data.get('time_budget')
+        options = {}
+        if algorithm is None:
+            options = {'time_budget': time_budget, 'seeds': seeds if len(seeds) > 1 else None}
+        cache_key = layout_cache.make_key(items_data, space_data, algorithm, options)
+        cached = layout_cache.get(cache_key, items_data)
+        asynchronous = request.query_params.get('async') in ('1', 'true', 'True')
+
+        # 异步模式：任务先以 pending 状态返回，后台进程池计算完成后再写入物品
+        if asynchronous and cached is None:
+            task.status = Task.STATUS_PENDING
+            task.save()
+            jobs.submit(task, items_data, space_data, time_budget, seeds, cache_key=cache_key)
+            return Response({
+                "job_id": task.id,
+                "task_id": task.id,
+                "status": task.status
+            }, status=status.HTTP_202_ACCEPTED)
+
+        # 使用算法模块计算物品的摆放位置；内置算法有多个起点时在后台进程池里并行计算
+        if cached is not None:
+            placed_items, stats = cached
+        elif algorithm is None and len(seeds) > 1:
+            placed_items, stats = jobs.pack_parallel(items_data, space_data, seeds, time_budget)
+        else:
+            try:
+                placed_items, stats = algorithms.pack(algorithm, items_data, space_data, time_budget)
+            except algorithm_runtime.AlgorithmError as e:
+                # 上传的算法出错或超时，任务不保存
+                return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        task.fill_ratio = stats['fill_ratio']
+        task.iterations = stats['iterations']
+        # 检查算法给出的布局（上传的算法不保证合法）
+        task.violations = layout_metrics.violations(layout_metrics.of_placed(placed_items, task_space(task)))
+        
+        # 保存任务和物品到数据库
+        with transaction.atomic():
+            task.save()
+            jobs.save_items(task, placed_items)
+        if cached is None:
+            layout_cache.put(cache_key, items_data, placed_items, stats)
         
-        # 保存物品到数据库
-        for item_data in placed_items:
-            Item.objects.create(
-                task=task,
-                order_id=item_data['order_id'],
-                name=item_data['name'],
-                position_x=item_data['position']['x'],
-                position_y=item_data['position']['y'],
-                position_z=item_data['position']['z'],
-                width=item_data['dimensions']['x'],
-                height=item_data['dimensions']['y'],
-                depth=item_data['dimensions']['z'],
-                face_up=item_data.get('face_up', False),
-                fragile=item_data.get('fragile', False)
-            )
+        # 命中缓存的异步请求已经完成，直接返回完成状态
+        if asynchronous:
+            return Response(job_status(task), status=status.HTTP_202_ACCEPTED)
         
-        # 返回完整的任务信息
-        return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
+        # 返回完整的任务信息，附带装填率和改进的迭代次数
+        data = encoders.encode_task(task)
+        data['packing'] = packing_stats(task)
+        data['packing']['cached'] = cached is not None
+        return Response(data, status=status.HTTP_201_CREATED)
     
     return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# 创建多容器任务：物品装进尽量少的同尺寸容器
+@swagger_auto_schema(
+    method='post',
+    request_body=ContainerTaskInputSerializer,
+    manual_parameters=[
+        openapi.Parameter('async', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                          description='为 true 时立即返回 job_id，在后台计算')
+    ],
+    responses={
+        201: TaskSerializer,
+        202: "任务已提交，在后台计算",
+        400: "输入不合法",
+        404: "创建者或工人不存在"
+    }
+)
+@csrf_exempt
+@api_view(['POST'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def create_container_task(request):
+    input_serializer = ContainerTaskInputSerializer(data=request.data)
+    if not input_serializer.is_valid():
+        return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    validated_data = input_serializer.validated_data
+    
+    try:
+        creator = User.objects.get(id=validated_data['creator_id'])
+    except User.DoesNotExist:
+        return Response({"error": "Creator not found"}, status=status.HTTP_404_NOT_FOUND)
+    worker = None
+    if validated_data.get('worker_id'):
+        try:
+            worker = User.objects.get(id=validated_data['worker_id'])
+        except User.DoesNotExist:
+            return Response({"error": "Worker not found"}, status=status.HTTP_404_NOT_FOUND)
+    
+    space_data = validated_data['space_info']
+    items_data = validated_data['items']
+    task = Task(
+        creator=creator,
+        worker=worker,
+        space_x=space_data['x'],
+        space_y=space_data['y'],
+        space_z=space_data['z']
+    )
+    
+    # 异步模式：任务先以 pending 状态返回，后台计算完成后写入容器和物品
+    if request.query_params.get('async') in ('1', 'true', 'True'):
+        task.status = Task.STATUS_PENDING
+        task.save()
+        jobs.submit_containers(task, items_data, space_data)
+        return Response({
+            "job_id": task.id,
+            "task_id": task.id,
+            "status": task.status
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    placed_items, stats = jobs.pack_containers(items_data, space_data)
+    task.fill_ratio = stats['fill_ratio']
+    task.iterations = stats['iterations']
+    task.violations = layout_metrics.violations(layout_metrics.of_placed(placed_items, task_space(task)))
+    with transaction.atomic():
+        task.save()
+        jobs.save_containers(task, placed_items, stats)
+    
+    # order_id 在容器之间连续编号，按 containers 中的 item_count 依次对应
+    data = encoders.encode_task(task)
+    data['packing'] = packing_stats(task)
+    data['packing'].update(lower_bound=stats['lower_bound'], unplaced=stats['unplaced'])
+    data['containers'] = ContainerSerializer(task_containers(task.id), many=True).data
+    return Response(data, status=status.HTTP_201_CREATED)
+
+def task_containers(task_id):
+    return Container.objects.filter(task_id=task_id).annotate(item_count=Count('items')).order_by('index')
+
+def job_status(task):
+    """后台装箱任务的状态信息"""
+    data = {
+        "job_id": task.id,
+        "task_id": task.id,
+        "status": task.status
+    }
+    if task.status == Task.STATUS_FAILED:
+        data["error"] = task.error
+    elif task.status == Task.STATUS_DONE:
+        data["packing"] = packing_stats(task)
+    return data
+
+def packing_stats(task):
+    return {
+        "fill_ratio": task.fill_ratio,
+        "iterations": task.iterations,
+        "violations": task.violations
+    }
+
+def task_space(task):
+    return (task.space_x, task.space_y, task.space_z)
+
 # 获取任务
 @swagger_auto_schema(
     method='get',
+    manual_parameters=[
+        openapi.Parameter('stream', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                          description='为 true 时分段流式返回，内容与普通模式相同'),
+        openapi.Parameter('format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['json', 'layout'],
+                          description='layout 返回紧凑二进制布局，也可以用 Accept: application/vnd.box.layout')
+    ],
     responses={
         200: TaskSerializer,
-        404: "任务不存在"
+        202: "任务仍在后台计算",
+        304: "ETag 未变化",
+        404: "任务不存在",
+        500: "后台装箱失败"
     }
 )
 
@@ -267,17 +430,113 @@ def create_task(request):
 @api_view(['GET'])
 @authentication_classes([])  # 移除所有认证类
 @permission_classes([AllowAny])  # 允许任何请求
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, LayoutRenderer])  # 支持二进制布局格式
 def get_task(request, task_id):
     try:
-        task = Task.objects.get(id=task_id)
-        serializer = TaskSerializer(task)
-        return Response(serializer.data)
+        # 先只取状态和 revision，ETag 匹配或缓存命中时不再读取任务和物品
+        state = Task.objects.filter(id=task_id).values_list('status', 'revision').first()
+        if state is None:
+            raise Task.DoesNotExist
+        task_status, revision = state
+        if task_status == Task.STATUS_PENDING:
+            return Response(job_status(Task.objects.get(id=task_id)), status=status.HTTP_202_ACCEPTED)
+        if task_status == Task.STATUS_FAILED:
+            return Response(job_status(Task.objects.get(id=task_id)), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        layout = request.accepted_renderer.format == LayoutRenderer.format
+        etag = task_cache.etag(task_id, revision, LayoutRenderer.format if layout else None)
+        if task_cache.etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        # 二进制布局格式：只包含空间尺寸和物品，按列存放
+        elif layout:
+            task = Task.objects.get(id=task_id)
+            response = HttpResponse(layout_format.encode_task_layout(task), content_type=layout_format.MEDIA_TYPE)
+        # 流式模式：物品分批读取、分段写出，输出与普通模式逐字节相同
+        elif request.query_params.get('stream') in ('1', 'true', 'True'):
+            task = Task.objects.select_related('creator', 'worker').get(id=task_id)
+            response = StreamingHttpResponse(encoders.stream_task(task), content_type='application/json')
+        else:
+            body = task_cache.get(task_id, revision)
+            if body is None:
+                # 输出与 TaskSerializer 相同，物品按列元组读取
+                task = Task.objects.select_related('creator', 'worker').get(id=task_id)
+                body = JSONRenderer().render(encoders.encode_task(task))
+                task_cache.put(task_id, revision, body)
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept'])
+        return response
     except Task.DoesNotExist:
         return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
 
+# 查询后台装箱任务的状态
+@swagger_auto_schema(
+    method='get',
+    responses={
+        200: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'job_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'task_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'status': openapi.Schema(type=openapi.TYPE_STRING, enum=['pending', 'done', 'failed']),
+                'error': openapi.Schema(type=openapi.TYPE_STRING),
+            }
+        ),
+        404: "任务不存在"
+    }
+)
+
+@csrf_exempt
+@api_view(['GET'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def get_job(request, job_id):
+    try:
+        task = Task.objects.get(id=job_id)
+    except Task.DoesNotExist:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job_status(task))
+
+# 任务列表的分页和摘要参数
+TASK_LIST_PARAMETERS = [
+    openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description='每页任务数（最大 100），传入 limit 或 cursor 时按页返回'),
+    openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description='上一页返回的 next_cursor'),
+    openapi.Parameter('summary', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                      description='为 true 时只返回物品数量，不展开物品'),
+]
+
+def list_tasks(request, tasks):
+    """
+    不带分页参数时返回完整列表（兼容旧前端）；
+    带 limit 或 cursor 时按 (created_at, id) 从新到旧分页，返回 results 和 next_cursor
+    """
+    if request.query_params.get('summary') in ('1', 'true', 'True'):
+        tasks = TaskSummarySerializer.setup_eager_loading(tasks)
+        encode = lambda page: TaskSummarySerializer(page, many=True).data
+    else:
+        # 输出与 TaskSerializer 相同，所有物品一次查询按列元组读取
+        tasks = tasks.select_related('creator', 'worker')
+        encode = encoders.encode_tasks
+
+    if 'limit' not in request.query_params and 'cursor' not in request.query_params:
+        return Response(encode(tasks))
+
+    try:
+        limit = pagination.parse_limit(request.query_params.get('limit'))
+        page, next_cursor = pagination.paginate_tasks(tasks, request.query_params.get('cursor'), limit)
+    except pagination.InvalidPage:
+        return Response({"error": "Invalid cursor or limit"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        "results": encode(page),
+        "next_cursor": next_cursor
+    })
+
 # 获取用户创建的所有任务
 @swagger_auto_schema(
     method='get',
+    manual_parameters=TASK_LIST_PARAMETERS,
     responses={200: TaskSerializer(many=True)}
 )
 
@@ -286,13 +545,12 @@ def get_task(request, task_id):
 @authentication_classes([])  # 移除所有认证类
 @permission_classes([AllowAny])  # 允许任何请求
 def get_user_tasks(request, user_id):
-    tasks = Task.objects.filter(creator_id=user_id)
-    serializer = TaskSerializer(tasks, many=True)
-    return Response(serializer.data)
+    return list_tasks(request, Task.objects.filter(creator_id=user_id))
 
 # 获取分配给工人的所有任务
 @swagger_auto_schema(
     method='get',
+    manual_parameters=TASK_LIST_PARAMETERS,
     responses={200: TaskSerializer(many=True)}
 )
 @csrf_exempt
@@ -300,20 +558,238 @@ def get_user_tasks(request, user_id):
 @authentication_classes([])  # 移除所有认证类
 @permission_classes([AllowAny])  # 允许任何请求
 def get_worker_tasks(request, worker_id):
-    tasks = Task.objects.filter(worker_id=worker_id)
-    serializer = TaskSerializer(tasks, many=True)
-    return Response(serializer.data)
+    return list_tasks(request, Task.objects.filter(worker_id=worker_id))
+
+# 分页获取一个任务的物品
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                          description='每页物品数（最大 100）'),
+        openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                          description='上一页返回的 next_cursor'),
+        openapi.Parameter('container', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                          description='多容器任务：只返回这个容器里的物品'),
+    ],
+    responses={
+        200: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                'next_cursor': openapi.Schema(type=openapi.TYPE_STRING),
+            }
+        ),
+        404: "任务不存在"
+    }
+)
+
+@csrf_exempt
+@api_view(['GET'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def get_task_items(request, task_id):
+    if not Task.objects.filter(id=task_id).exists():
+        return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+    items = Item.objects.filter(task_id=task_id)
+    container = request.query_params.get('container')
+    if container not in (None, ''):
+        if not container.isdigit():
+            return Response({"error": "Invalid container"}, status=status.HTTP_400_BAD_REQUEST)
+        items = items.filter(container__index=int(container))
+    try:
+        limit = pagination.parse_limit(request.query_params.get('limit'))
+        page, next_cursor = pagination.paginate_items(items, request.query_params.get('cursor'), limit)
+    except pagination.InvalidPage:
+        return Response({"error": "Invalid cursor or limit"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        "results": ItemSerializer(page, many=True).data,
+        "next_cursor": next_cursor
+    })
+
+# 多容器任务的容器列表；单容器任务返回空列表
+@swagger_auto_schema(
+    method='get',
+    responses={
+        200: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'task_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'containers': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            }
+        ),
+        404: "任务不存在"
+    }
+)
+@csrf_exempt
+@api_view(['GET'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def get_task_containers(request, task_id):
+    if not Task.objects.filter(id=task_id).exists():
+        return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        "task_id": task_id,
+        "containers": ContainerSerializer(task_containers(task_id), many=True).data
+    })
+
+
+# 布局检查和质量指标：重叠、越界、支撑不足、易碎品受压，空间利用率和重心
+@swagger_auto_schema(
+    method='get',
+    responses={
+        200: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'task_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'valid': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                'items': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'overlaps': openapi.Schema(type=openapi.TYPE_INTEGER, description='相互重叠的物品对数'),
+                'out_of_bounds': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'unsupported': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'fragile_loaded': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'utilization': openapi.Schema(type=openapi.TYPE_NUMBER),
+                'center_of_gravity': openapi.Schema(type=openapi.TYPE_OBJECT),
+                'details': openapi.Schema(type=openapi.TYPE_OBJECT, description='每类违规的 order_id'),
+                'containers': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                                             description='多容器任务每个容器的指标'),
+            }
+        ),
+        202: "任务仍在后台计算",
+        304: "ETag 未变化",
+        404: "任务不存在",
+        500: "后台装箱失败"
+    }
+)
+@csrf_exempt
+@api_view(['GET'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def get_task_metrics(request, task_id):
+    task = Task.objects.filter(id=task_id).first()
+    if task is None:
+        return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+    if task.status == Task.STATUS_PENDING:
+        return Response(job_status(task), status=status.HTTP_202_ACCEPTED)
+    if task.status == Task.STATUS_FAILED:
+        return Response(job_status(task), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    # 指标只随布局变化，与任务详情共用 revision
+    etag = task_cache.etag(task_id, task.revision, 'metrics')
+    if task_cache.etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = Response({"task_id": task.id, **layout_metrics.of_task(task)})
+    response['ETag'] = etag
+    return response
+
+def editable_task(task_id):
+    """锁定并返回可以修改物品的任务；不存在、仍在后台计算或为多容器任务时返回错误响应"""
+    task = Task.objects.select_for_update().filter(id=task_id).first()
+    if task is None:
+        return None, Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+    if task.status != Task.STATUS_DONE:
+        return None, Response({"error": "Task is not packed yet", **job_status(task)}, status=status.HTTP_409_CONFLICT)
+    if Container.objects.filter(task=task).exists():
+        return None, Response({"error": "Multi-container tasks cannot be edited"}, status=status.HTTP_409_CONFLICT)
+    return task, None
+
+# 向已有任务添加物品：已有物品不动，新物品放进剩余空间
+@swagger_auto_schema(
+    method='post',
+    request_body=AddItemsSerializer,
+    responses={
+        200: openapi.Response(description="新物品的摆放结果", schema=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'task_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'items': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                'unplaced': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)),
+                'fill_ratio': openapi.Schema(type=openapi.TYPE_NUMBER),
+            }
+        )),
+        404: "任务不存在",
+        409: "任务仍在后台计算"
+    }
+)
+@csrf_exempt
+@api_view(['POST'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def add_task_items(request, task_id):
+    serializer = AddItemsSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    with transaction.atomic():
+        task, error = editable_task(task_id)
+        if error is not None:
+            return error
+        placed_items, unplaced, fill_ratio = repacking.add_items(task, serializer.validated_data['items'])
+    return Response({
+        "task_id": task.id,
+        "items": placed_items,
+        "unplaced": unplaced,
+        "fill_ratio": fill_ratio
+    })
 
+# 从已有任务删除物品：上方失去支撑的物品落下，order_id 重新连续编号
+@swagger_auto_schema(
+    method='post',
+    request_body=RemoveItemsSerializer,
+    responses={
+        200: openapi.Response(description="删除结果和落下的物品", schema=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'task_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'removed': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'moved': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                'fill_ratio': openapi.Schema(type=openapi.TYPE_NUMBER),
+            }
+        )),
+        404: "任务或物品不存在",
+        409: "任务仍在后台计算"
+    }
+)
+@csrf_exempt
+@api_view(['POST'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def remove_task_items(request, task_id):
+    serializer = RemoveItemsSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        with transaction.atomic():
+            task, error = editable_task(task_id)
+            if error is not None:
+                return error
+            removed, moved, fill_ratio = repacking.remove_items(task, serializer.validated_data['order_ids'])
+    except repacking.ItemsNotFound as e:
+        return Response({"error": "Items not found", "order_ids": e.order_ids}, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        "task_id": task.id,
+        "removed": removed,
+        "moved": moved,
+        "fill_ratio": fill_ratio
+    })
 
 
-#接收算法文件并更新算法模块
+#接收算法文件并保存为新的算法版本
+@swagger_auto_schema(
+    method='post',
+    manual_parameters=[
+        openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True, description='算法文件（.py）'),
+        openapi.Parameter('name', openapi.IN_FORM, type=openapi.TYPE_STRING, description='版本名称'),
+        openapi.Parameter('activate', openapi.IN_FORM, type=openapi.TYPE_BOOLEAN,
+                          description='是否设为全局版本，默认为 true'),
+    ],
+    responses={200: "算法已保存", 400: "文件不合法或校验失败"}
+)
 @csrf_exempt
 @api_view(['POST'])
 @authentication_classes([])  # 移除所有认证类
 @permission_classes([AllowAny])  # 允许任何请求
 def upload_algorithm(request):
     """
-    接收并验证算法文件，然后更新系统中的算法
+    接收并在子进程中验证算法文件，保存为新的不可变版本，默认同时设为全局版本
     """
 
 
@@ -337,12 +813,19 @@ def upload_algorithm(request):
     
     algorithm_file = request.FILES['file']
     
+    upload_serializer = AlgorithmUploadSerializer(data=request.data)
+    if not upload_serializer.is_valid():
+        return Response(upload_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
     # 检查文件类型
     if not algorithm_file.name.endswith('.py'):
         return Response({"error": "Only Python (.py) files are allowed"}, status=status.HTTP_400_BAD_REQUEST)
     
     # 验证文件内容（检查是否包含必要的函数）
-    file_content = algorithm_file.read().decode('utf-8')
+    try:
+        file_content = algorithm_file.read().decode('utf-8')
+    except UnicodeDecodeError:
+        return Response({"error": "The algorithm file must be UTF-8 encoded"}, status=status.HTTP_400_BAD_REQUEST)
     
     # 检查是否包含必要的函数定义
     if "def place_items(" not in file_content:
@@ -350,42 +833,168 @@ def upload_algorithm(request):
             "error": "The algorithm file must contain a 'place_items' function with the signature: place_items(items_data, space_dimensions)"
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # 创建临时文件来验证语法
-    temp_path = os.path.join(settings.BASE_DIR, 'temp_algorithm.py')
-    with open(temp_path, 'w') as f:
-        f.write(file_content)
-    
-    # 尝试导入验证语法
-    try:
-        spec = importlib.util.spec_from_file_location("temp_algorithm", temp_path)
-        temp_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(temp_module)
-        
-        # 检查place_items函数是否正确定义
-        if not hasattr(temp_module, 'place_items') or not callable(getattr(temp_module, 'place_items')):
-            os.remove(temp_path)
-            return Response({
-                "error": "The algorithm file must contain a callable 'place_items' function"
-            }, status=status.HTTP_400_BAD_REQUEST)
-    except Exception as e:
-        os.remove(temp_path)
-        return Response({
-            "error": f"The algorithm file contains errors: {str(e)}"
-        }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # 清理临时文件
-    os.remove(temp_path)
+    # 在有时间和内存限制的子进程里执行并试运行，不影响当前 Web 进程
+    error = algorithms.validate(file_content)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
     
-    # 保存文件到正确位置，替换原有算法
-    algorithm_path = os.path.join(settings.BASE_DIR, 'box_back', 'app', 'packing_algorithm.py')
-    with open(algorithm_path, 'w') as f:
-        f.write(file_content)
-    
-    # 重新加载算法模块
-    if 'box_back.app.packing_algorithm' in sys.modules:
-        del sys.modules['box_back.app.packing_algorithm']
+    activate = str(request.data.get('activate', 'true')).lower() not in ('0', 'false')
+    version, created = algorithms.register(file_content, name=upload_serializer.validated_data['name'], activate=activate)
     
     return Response({
-        "message": "Algorithm updated successfully",
-        "function": "place_items"
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+        "message": "Algorithm updated successfully" if activate else "Algorithm uploaded successfully",
+        "function": "place_items",
+        "version": AlgorithmVersionSerializer(version).data,
+        "created": created
+    }, status=status.HTTP_200_OK)
+
+
+# 算法版本列表
+@swagger_auto_schema(
+    method='get',
+    responses={200: AlgorithmVersionSerializer(many=True)}
+)
+@csrf_exempt
+@api_view(['GET'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def list_algorithms(request):
+    versions = AlgorithmVersion.objects.defer('source').order_by('-id')
+    active = next((version.id for version in versions if version.is_active), algorithms.BUILTIN)
+    return Response({
+        "active": active,
+        "versions": AlgorithmVersionSerializer(versions, many=True).data
+    })
+
+
+# 设置全局算法版本
+@swagger_auto_schema(
+    method='post',
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['version'],
+        properties={
+            'version': openapi.Schema(type=openapi.TYPE_STRING, description="算法版本 id 或 'builtin'"),
+        }
+    ),
+    responses={200: "已切换", 404: "版本不存在"}
+)
+@csrf_exempt
+@api_view(['POST'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def activate_algorithm(request):
+    requested = str(request.data.get('version', ''))
+    if requested != algorithms.BUILTIN and not requested.isdigit():
+        return Response({"error": "version must be an algorithm version id or 'builtin'"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        version = algorithms.resolve(requested)
+    except AlgorithmVersion.DoesNotExist:
+        return Response({"error": "Algorithm version not found"}, status=status.HTTP_404_NOT_FOUND)
+    algorithms.set_active(version)
+    return Response({
+        "message": "Algorithm activated",
+        "active": version.id if version else algorithms.BUILTIN
+    })
+
+
+# 算法基准排名：GET 返回已保存的结果，POST 把一次基准提交到后台进程池，返回 run_id
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter('corpus', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='语料标识，默认为最近一次运行的语料'),
+    ],
+    responses={200: "按排名排列的基准结果"}
+)
+@swagger_auto_schema(
+    method='post',
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'versions': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                       description="算法版本 id 或 'builtin'，默认为全部版本"),
+            'repeats': openapi.Schema(type=openapi.TYPE_INTEGER, description='每组物品计时运行的次数，默认 3，最多 20'),
+            'recorded': openapi.Schema(type=openapi.TYPE_INTEGER, description='加入最近的已完成任务数量，默认 0，最多 50'),
+        }
+    ),
+    responses={202: "已提交，用 /api/algorithm/leaderboard/runs/<run_id>/ 查询进度", 404: "版本不存在"}
+)
+@csrf_exempt
+@api_view(['GET', 'POST'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def algorithm_leaderboard(request):
+    if request.method == 'POST':
+        try:
+            repeats = int(request.data.get('repeats', 3))
+            recorded = int(request.data.get('recorded', 0))
+        except (TypeError, ValueError):
+            return Response({"error": "repeats and recorded must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= repeats <= 20 or not 0 <= recorded <= 50:
+            return Response({"error": "repeats must be 1-20 and recorded 0-50"}, status=status.HTTP_400_BAD_REQUEST)
+        requested = request.data.get('versions')
+        if requested:
+            try:
+                versions = [algorithms.resolve(str(value)) for value in requested]
+            except (AlgorithmVersion.DoesNotExist, ValueError):
+                return Response({"error": "Algorithm version not found"}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            versions = [None] + list(AlgorithmVersion.objects.order_by('id'))
+        corpus_key, cases = algorithm_bench.corpus(recorded)
+        run = BenchmarkRun.objects.create(corpus=corpus_key, repeats=repeats)
+        jobs.submit_benchmark(run, versions, cases)
+        return Response(benchmark_run_status(run), status=status.HTTP_202_ACCEPTED)
+    corpus_key, results = algorithm_bench.leaderboard(request.query_params.get('corpus'))
+    return Response({
+        "corpus": corpus_key,
+        "results": leaderboard_rows(results)
+    })
+
+def leaderboard_rows(results):
+    rows = AlgorithmBenchmarkSerializer(results, many=True).data
+    for position, row in enumerate(rows, 1):
+        row['rank'] = position
+    return rows
+
+def benchmark_run_status(run):
+    """算法基准的运行状态，完成后带上这次运行的排名"""
+    data = {
+        "run_id": run.id,
+        "status": run.status,
+        "corpus": run.corpus,
+        "repeats": run.repeats
+    }
+    if run.status == BenchmarkRun.STATUS_FAILED:
+        data["error"] = run.error
+    elif run.status == BenchmarkRun.STATUS_DONE:
+        results = run.results.select_related('algorithm').defer('algorithm__source')
+        data["results"] = leaderboard_rows(algorithm_bench.rank(results))
+    return data
+
+# 查询 POST /api/algorithm/leaderboard/ 提交的基准运行
+@swagger_auto_schema(
+    method='get',
+    responses={
+        200: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'run_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'status': openapi.Schema(type=openapi.TYPE_STRING, enum=['pending', 'done', 'failed']),
+                'error': openapi.Schema(type=openapi.TYPE_STRING),
+                'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            }
+        ),
+        404: "运行不存在"
+    }
+)
+@csrf_exempt
+@api_view(['GET'])
+@authentication_classes([])  # 移除所有认证类
+@permission_classes([AllowAny])  # 允许任何请求
+def get_benchmark_run(request, run_id):
+    try:
+        run = BenchmarkRun.objects.get(id=run_id)
+    except BenchmarkRun.DoesNotExist:
+        return Response({"error": "Benchmark run not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(benchmark_run_status(run))
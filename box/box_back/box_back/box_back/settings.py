@@ -179,4 +179,33 @@ REST_FRAMEWORK = {
 REST_FRAMEWORK_SWAGGER = {
     'DEFAULT_AUTO_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
     'SECURITY_DEFINITIONS': {},
-}
\ No newline at end of file
+}
+
+# 异步装箱的后台进程数，默认等于 CPU 核数
+PACKING_WORKERS = int(os.environ['PACKING_WORKERS']) if os.environ.get('PACKING_WORKERS') else None
+
+# 保存装箱结果时每条 INSERT 语句写入的物品数量
+ITEM_BATCH_SIZE = int(os.environ.get('ITEM_BATCH_SIZE', 500))
+
+# get_task 结果缓存：进程内 LRU 的总字节数上限；TASK_CACHE_BACKEND 设为 CACHES 中的别名时改用共享缓存
+TASK_CACHE_MAX_BYTES = int(os.environ.get('TASK_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+TASK_CACHE_BACKEND = os.environ.get('TASK_CACHE_BACKEND') or None
+TASK_CACHE_TIMEOUT = 3600
+
+# 上传算法的校验子进程：超时秒数（同时作为 CPU 时间上限）和内存上限（MB）
+ALGORITHM_VALIDATION_TIMEOUT = int(os.environ.get('ALGORITHM_VALIDATION_TIMEOUT', 10))
+ALGORITHM_VALIDATION_MEMORY_MB = int(os.environ.get('ALGORITHM_VALIDATION_MEMORY_MB', 512))
+
+# 运行上传算法的子进程：超时秒数和内存上限（MB）
+ALGORITHM_RUN_TIMEOUT = int(os.environ.get('ALGORITHM_RUN_TIMEOUT', 60))
+ALGORITHM_RUN_MEMORY_MB = int(os.environ.get('ALGORITHM_RUN_MEMORY_MB', 1024))
+
+# create_task 的 time_budget 上限（秒）
+PACKING_MAX_TIME_BUDGET = float(os.environ.get('PACKING_MAX_TIME_BUDGET', 30))
+
+# 多起点装箱：起点数量上限，以及没有 time_budget 时每个起点的迭代次数
+PACKING_MAX_STARTS = int(os.environ.get('PACKING_MAX_STARTS', 64))
+PACKING_START_ITERATIONS = int(os.environ.get('PACKING_START_ITERATIONS', 4))
+
+# create_task 布局缓存的最大条目数，超过时删除最久没用过的；0 表示关闭
+LAYOUT_CACHE_MAX_ENTRIES = int(os.environ.get('LAYOUT_CACHE_MAX_ENTRIES', 10000))
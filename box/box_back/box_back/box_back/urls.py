@@ -51,12 +51,23 @@ urlpatterns = [
     
     # 任务相关API
     path('api/tasks/create/', views.create_task),
+    path('api/tasks/create/containers/', views.create_container_task),
     path('api/tasks/<int:task_id>/', views.get_task),
+    path('api/tasks/<int:task_id>/items/', views.get_task_items),
+    path('api/tasks/<int:task_id>/items/add/', views.add_task_items),
+    path('api/tasks/<int:task_id>/items/remove/', views.remove_task_items),
+    path('api/tasks/<int:task_id>/containers/', views.get_task_containers),
+    path('api/tasks/<int:task_id>/metrics/', views.get_task_metrics),
+    path('api/jobs/<int:job_id>/', views.get_job),
     path('api/users/<int:user_id>/tasks/', views.get_user_tasks),
     path('api/workers/<int:worker_id>/tasks/', views.get_worker_tasks),
     
     # alg api
     path('api/algorithm/upload/', views.upload_algorithm, name='upload_algorithm'),
+    path('api/algorithm/versions/', views.list_algorithms),
+    path('api/algorithm/activate/', views.activate_algorithm),
+    path('api/algorithm/leaderboard/', views.algorithm_leaderboard),
+    path('api/algorithm/leaderboard/runs/<int:run_id>/', views.get_benchmark_run),
 
     # Swagger URLs
     re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),